@@ -1,19 +1,84 @@
+import os
+import math
+import asyncio
+import concurrent.futures
 
 from agents.a2a_sim import AgentNode
 from agents.parser_agent import parse_problem
 from agents.scene_agent import generate_scene
 from agents.validator_agent import validate_and_refine
+from agents.fused_agent import parse_and_build
 from utils.logger import log
+from utils.cache import ResultCache, problem_key, normalize_problem
+from utils.deadline import Deadline
+from utils.concurrency import get_executor
+from utils.scene_store import SceneStore
+from utils.validators import validate_scene_json, repair_scene, compare_parsed_and_scene
+from utils.singleflight import SingleFlight
+from utils.metrics import SIMULATION_RESULTS, SPECULATIVE_SCENES, PIPELINE_DEGRADATIONS, register_collector
+from ai_processing.physics_parserer import pre_extract
+from ai_processing.scene_templates import shape_key, template_constraints, template_matches, fill_template, library_query
+from ai_processing.scene_builder import try_fast_path, build_parsed_spec, build_scene
 
+CACHE_DIR = os.getenv("A2A_CACHE_DIR") or None
+CACHE_SIZE = int(os.getenv("A2A_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("A2A_CACHE_TTL", "86400")) or None
+# Files kept per cache directory; the oldest are swept first.
+CACHE_DISK_SIZE = int(os.getenv("A2A_CACHE_DISK_SIZE", str(CACHE_SIZE * 16)))
 
-def run_a2a_simulation(problem_text: str) -> dict:
-    """
-    Simulate agent-to-agent (A2A) collaboration.
-    Each agent communicates sequentially: Parser → Scene → Validator.
-    """
+# SQLite library of validated scenes shared by all workers; new problems are
+# answered from the nearest stored scene when one is close enough.
+SCENE_STORE_PATH = os.getenv("A2A_SCENE_STORE") or (os.path.join(CACHE_DIR, "scenes.sqlite3") if CACHE_DIR else None)
+SCENE_STORE_SIZE = int(os.getenv("A2A_SCENE_STORE_SIZE", "5000"))
+SCENE_STORE_TTL = float(os.getenv("A2A_SCENE_STORE_TTL", str(30 * 86400))) or None
+
+# Concurrent pipelines per batch request unless the caller asks for fewer/more.
+BATCH_CONCURRENCY = int(os.getenv("A2A_BATCH_CONCURRENCY", "8"))
+
+# Build canonical incline/plane scenes locally instead of calling the agents.
+FAST_PATH_ENABLED = os.getenv("A2A_FAST_PATH", "1") != "0"
+
+# "agents": Parser → Scene → Validator (three model calls).
+# "fused": ParsedSpec and validated scene from one structured-output call.
+PIPELINE_MODE = os.getenv("A2A_PIPELINE_MODE", "agents").lower()
+
+# Pipeline stages, in order, as they appear in a result.
+STAGES = ("parsed", "scene", "validated")
+
+# Latency budget per simulation in seconds (0 = unlimited). Each stage gets a
+# share of what is left when it starts, so time a stage does not use carries
+# over; a stage that runs out, or whose model calls are failing
+# (utils/resilience.py), is replaced by a local, model-free fallback.
+REQUEST_BUDGET = float(os.getenv("A2A_REQUEST_BUDGET", "30")) or None
+STAGE_SHARES = {"parsed": 0.35, "scene": 0.6, "validated": 1.0}
+# A stage left with less than this is not worth a model call; go straight to its fallback.
+MIN_STAGE_TIME = float(os.getenv("A2A_MIN_STAGE_TIME", "0.5"))
+
+# Start SceneAgent on pre_extract's ParsedSpec while ParserAgent runs, and keep
+# that scene when the model's ParsedSpec agrees with it.
+SPECULATIVE_SCENE = os.getenv("A2A_SPECULATIVE_SCENE", "1") != "0"
+# The speculative scene overlaps the parser, so it may use both stages' shares.
+SPECULATIVE_SHARE = 1 - (1 - STAGE_SHARES["parsed"]) * (1 - STAGE_SHARES["scene"])
+
+# Keyed on the normalized problem text; set A2A_CACHE_DIR to persist across restarts.
+result_cache = ResultCache(max_size=CACHE_SIZE, ttl=CACHE_TTL, directory=CACHE_DIR, disk_max_size=CACHE_DISK_SIZE)
 
-    log("A2A Orchestrator", f"Starting A2A simulation for problem: {problem_text}", "info")
+# Keyed on the problem's shape (text with angle/mass/friction abstracted out).
+shape_cache = ResultCache(
+    max_size=CACHE_SIZE,
+    ttl=CACHE_TTL,
+    directory=os.path.join(CACHE_DIR, "shapes") if CACHE_DIR else None,
+    disk_max_size=CACHE_DISK_SIZE,
+)
 
+scene_store = SceneStore(SCENE_STORE_PATH, max_size=SCENE_STORE_SIZE, ttl=SCENE_STORE_TTL) if SCENE_STORE_PATH else None
+
+
+def _build_agents(problem_text: str, context: dict):
+    """
+    Create the Parser, Scene and Validator nodes for one simulation.
+    `context` carries the parsed result to the validator once it exists.
+    """
     parser = AgentNode(
         name='ParserAgent',
         role='Extracts structured parameters from text',
@@ -29,26 +94,651 @@ def run_a2a_simulation(problem_text: str) -> dict:
     validator = AgentNode(
         name='ValidatorAgent',
         role="Ensures physical realism and fixes missing values",
-        handler=lambda scene: validate_and_refine(scene, parsed_result, problem_text)
+        handler=lambda scene: validate_and_refine(scene, context['parsed'], problem_text)
     )
 
+    return parser, scene, validator
+
+
+def _build_fused_agent():
+    return AgentNode(
+        name='FusedAgent',
+        role='Parses the problem and builds a validated scene in one model call',
+        handler=lambda text: parse_and_build(text)
+    )
+
+
+def _fused_stages(response: dict) -> dict:
+    """parsed/scene/validated from a FusedAgent response, even if its handler raised."""
+    if all(stage in response for stage in STAGES):
+        return {stage: response[stage] for stage in STAGES}
+    return {stage: {"error": response.get("error", "FusedAgent returned no result")} for stage in STAGES}
+
+
+def _usable(payload) -> bool:
+    return isinstance(payload, dict) and "error" not in payload
+
+
+def _too_late(deadline: Deadline) -> bool:
+    remaining = deadline.remaining()
+    return remaining is not None and remaining < MIN_STAGE_TIME
+
+
+def _skipped(node: AgentNode, deadline: Deadline) -> dict:
+    log("A2A Orchestrator", "Only %.2fs left; skipping %s.", "warn", deadline.remaining(), node.name)
+    return {"error": f"{node.name} skipped: request budget exhausted", "timeout": True}
+
+
+def _send(node: AgentNode, message, deadline: Deadline):
+    return _skipped(node, deadline) if _too_late(deadline) else node.send(message, deadline)
+
+
+async def _send_async(node: AgentNode, message, deadline: Deadline):
+    return _skipped(node, deadline) if _too_late(deadline) else await node.send_async(message, deadline)
+
+
+def _local_parsed(problem_text: str, object_type: str = None):
+    """
+    ParsedSpec from pre_extract's regex constraints, or None when no object
+    was recognized and no default `object_type` is given.
+    """
+    constraints = pre_extract(normalize_problem(problem_text))
+    object_type = constraints["object_type"] or object_type
+    if object_type is None:
+        return None
+    return build_parsed_spec(problem_text, {**constraints, "object_type": object_type})
+
+
+def _same_number(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    try:
+        return math.isclose(float(a), float(b), rel_tol=1e-6, abs_tol=1e-9)
+    except (TypeError, ValueError):
+        return False
+
+
+def _specs_agree(local: dict, parsed) -> bool:
+    """
+    Whether a scene built for the local ParsedSpec also fits the model's:
+    same environment, angle, friction and objects (types and masses), and no
+    extra terms the local spec could not have seen.
+    """
+    if not _usable(parsed) or parsed.get("extra_terms"):
+        return False
+    objects = parsed.get("objects")
+    if not isinstance(objects, list) or len(objects) != len(local["objects"]):
+        return False
+    return (
+        str(parsed.get("environment_type") or "").lower() == local["environment_type"]
+        and _same_number(parsed.get("angle_deg"), local["angle_deg"])
+        and _same_number(parsed.get("friction"), local["friction"])
+        and all(
+            isinstance(o, dict)
+            and str(o.get("type") or "").lower() == l["type"]
+            and _same_number(o.get("mass_kg"), l["mass_kg"])
+            for o, l in zip(objects, local["objects"])
+        )
+    )
+
+
+def _speculative_outcome(response) -> bool:
+    """Count a speculative scene that agreed with the parser; True if it can be kept."""
+    kept = _usable(response)
+    SPECULATIVE_SCENES.inc(outcome="hit" if kept else "failed")
+    if kept:
+        log("A2A Orchestrator", "ParsedSpec matches the local one; keeping the speculative scene.", "success")
+    return kept
+
+
+def _speculate(node: AgentNode, problem_text: str, budget: Deadline):
+    """
+    Start `node` (SceneAgent) on the local ParsedSpec on the shared executor.
+
+    Returns:
+        (dict, Future, Deadline) | None: The local spec, the pending send and
+        its deadline, or None when speculation is off or pre_extract found
+        no object.
+    """
+    local = _local_parsed(problem_text) if SPECULATIVE_SCENE else None
+    if local is None:
+        return None
+    deadline = budget.split(SPECULATIVE_SHARE)
+    return local, get_executor().submit(node.send, local, deadline), deadline
+
+
+def _speculation_timed_out() -> None:
+    SPECULATIVE_SCENES.inc(outcome="failed")
+    log("A2A Orchestrator", "Speculative scene missed its deadline; asking SceneAgent again.", "warn")
+
+
+def _take_speculation(speculation, parsed):
+    """The speculative scene if it fits `parsed` and finished usably, else None (run SceneAgent again)."""
+    if speculation is None:
+        return None
+    local, future, deadline = speculation
+    if not _specs_agree(local, parsed):
+        future.cancel()
+        SPECULATIVE_SCENES.inc(outcome="miss")
+        return None
+    # Not started yet means the executor is saturated; the normal path is no slower.
+    if future.cancel():
+        SPECULATIVE_SCENES.inc(outcome="failed")
+        return None
+    try:
+        response = future.result(timeout=deadline.remaining())
+    except concurrent.futures.TimeoutError:
+        # The send keeps its worker until its own deadline; the scene comes from a fresh one.
+        _speculation_timed_out()
+        return None
+    return response if _speculative_outcome(response) else None
+
+
+def _speculate_async(node: AgentNode, problem_text: str, budget: Deadline):
+    """`_speculate` for the async pipeline: (local spec, task) or None."""
+    local = _local_parsed(problem_text) if SPECULATIVE_SCENE else None
+    if local is None:
+        return None
+    deadline = budget.split(SPECULATIVE_SHARE)
+    return local, asyncio.create_task(node.send_async(local, deadline)), deadline
+
+
+async def _take_speculation_async(speculation, parsed):
+    if speculation is None:
+        return None
+    local, task, deadline = speculation
+    if not _specs_agree(local, parsed):
+        task.cancel()
+        SPECULATIVE_SCENES.inc(outcome="miss")
+        return None
+    try:
+        response = await asyncio.wait_for(task, deadline.remaining())
+    except asyncio.TimeoutError:
+        _speculation_timed_out()
+        return None
+    return response if _speculative_outcome(response) else None
+
+
+def _fallback_scene(parsed: dict) -> dict:
+    """SceneJSON from the rule-based builder, or SceneAgent's defaults where it does not apply."""
+    if parsed.get("environment_type") in ("incline", "plane"):
+        try:
+            return build_scene(parsed)
+        except (KeyError, TypeError, ValueError):
+            pass
+    return repair_scene({}, parsed)[0]
+
+
+def _failure_reason(response):
+    """"timeout" or "unavailable" when a stage got no model answer, else None."""
+    if isinstance(response, dict):
+        for reason in ("timeout", "unavailable"):
+            if response.get(reason):
+                return reason
+    return None
+
+
+def _degrade(stage: str, result: dict, reason: str) -> dict:
+    """
+    Local stand-in for a stage that got no model answer, built from whatever
+    the earlier stages in `result` produced: the parser from pre_extract, the
+    scene from the rule-based builder, the validator from repair_scene only.
+    """
+    parsed = result.get("parsed")
+    if not _usable(parsed):
+        parsed = _local_parsed(result["problem"], "box")
+
+    if stage == "parsed":
+        fallback = parsed
+    elif stage == "scene":
+        fallback = _fallback_scene(parsed)
+    else:
+        scene = result.get("scene")
+        fallback = repair_scene(scene, parsed)[0] if _usable(scene) else _fallback_scene(parsed)
+
+    log("A2A Orchestrator", "Stage '%s' got no model answer (%s); using local fallback.", "warn", stage, reason)
+    PIPELINE_DEGRADATIONS.inc(stage=stage, reason=reason)
+    return fallback
+
+
+def _settle(stage: str, response, result: dict, reason: str = None) -> bool:
+    """
+    Record a stage's response in `result`, replacing it with the local
+    fallback if it timed out or the model was unavailable (`reason`, by
+    default read from the response). Returns whether the stage was degraded.
+    """
+    reason = reason or _failure_reason(response)
+    degraded = reason is not None
+    result[stage] = _degrade(stage, result, reason) if degraded else response
+    if degraded:
+        result.setdefault("degraded", []).append(stage)
+    return degraded
+
+
+def _lookup_cache(problem_text: str, key: str):
+    """
+    Return a full result from the exact-text cache, or failing that from a
+    stored scene of the same shape re-filled with this problem's numbers.
+    None on a miss.
+    """
+    cached = result_cache.get(key)
+    if cached is not None:
+        log("A2A Orchestrator", "Cache hit for problem %s.", "success", key[:12])
+        SIMULATION_RESULTS.inc(source="result_cache")
+        return {"problem": problem_text, **cached}
+
+    skey = shape_key(problem_text)
+    if skey is None:
+        return None
+    template = shape_cache.get(skey)
+    if template is None:
+        return None
+
+    old_constraints = template.pop("constraints")
+    filled = fill_template(template, old_constraints, template_constraints(problem_text))
+    if filled is None:
+        return None
+
+    filled["parsed"]["source_text"] = problem_text
+    log("A2A Orchestrator", "Shape cache hit for problem %s; re-filled stored scene.", "success", key[:12])
+    SIMULATION_RESULTS.inc(source="shape_cache")
+    result_cache.set(key, filled)
+    return {"problem": problem_text, **filled}
+
+
+def _lookup_store(problem_text: str, key: str):
+    """
+    Answer from the scene store: the nearest stored scene with the same
+    environment and objects, re-filled with this problem's numbers.
+    None when there is no store, no neighbour or the re-filled scene is
+    invalid or disagrees with the re-filled ParsedSpec after repair.
+    """
+    if scene_store is None:
+        return None
+    query = library_query(problem_text)
+    if query is None:
+        return None
+    new = query["constraints"]
+    match = scene_store.nearest(query["environment_type"], query["object_types"],
+                                new.get("angle_deg"), new.get("friction"), masses=query["masses"])
+    if match is None:
+        return None
+
+    triple = {"parsed": match["parsed"], "scene": match["validated"], "validated": match["validated"]}
+    filled = fill_template(triple, match["constraints"], new)
+    if filled is None:
+        return None
+    if not validate_scene_json(filled["validated"])[0] or compare_parsed_and_scene(filled["parsed"], filled["validated"]):
+        filled["validated"], _ = repair_scene(filled["validated"], filled["parsed"])
+        if not validate_scene_json(filled["validated"])[0] or compare_parsed_and_scene(filled["parsed"], filled["validated"]):
+            return None
+
+    filled["parsed"]["source_text"] = problem_text
+    log("A2A Orchestrator", "Scene store hit for problem %s (distance %.2f); re-filled stored scene.", "success", key[:12], match['distance'])
+    SIMULATION_RESULTS.inc(source="scene_store")
+    result_cache.set(key, filled)
+    return {"problem": problem_text, **filled}
+
+
+def _run_fast_path(problem_text: str, key: str):
+    """Rule-based scene for canonical problems, or None if the agents are needed."""
+    if not FAST_PATH_ENABLED:
+        return None
+    built = try_fast_path(problem_text)
+    if built is None:
+        return None
+
+    log("A2A Orchestrator", "Problem covered by rule-based scene builder; skipping agents.", "success")
+    SIMULATION_RESULTS.inc(source="scene_builder")
+    result = {"problem": problem_text, **built}
+    _store_cache(key, result)
+    return result
+
+
+def _store_cache(key: str, result: dict) -> bool:
+    """
+    Cache a finished result unless one of the agents reported an error or a
+    stage was degraded, and index it by shape when the scene carries the
+    extracted numbers.
+
+    Returns:
+        bool: Whether the result cache kept the entry.
+    """
+    if result.get("degraded"):
+        return False
+    triple = {k: result[k] for k in ("parsed", "scene", "validated")}
+    if any(not isinstance(v, dict) or "error" in v for v in triple.values()):
+        return False
+    stored = result_cache.set(key, triple)
+
+    skey = shape_key(result["problem"])
+    constraints = template_constraints(result["problem"])
+    if skey is not None and template_matches(triple, constraints):
+        shape_cache.set(skey, {**triple, "constraints": constraints})
+
+    if scene_store is not None:
+        try:
+            scene_store.put(triple["parsed"], triple["validated"])
+        except Exception as e:
+            log("A2A Orchestrator", "Could not write to scene store: %s", "warn", e)
+    return stored
+
+
+def has_cached_result(key: str) -> bool:
+    """Whether get_cached_result(key) would currently find a result."""
+    return result_cache.contains(key)
+
+
+def get_cached_result(key: str):
+    """
+    A finished result by content address (problem_key of the normalized
+    problem), or None if it was never stored or has expired.
+
+    Returns:
+        dict | None: {"problem", "parsed", "scene", "validated"}.
+    """
+    cached = result_cache.get(key)
+    if cached is None:
+        return None
+    parsed = cached.get("parsed")
+    problem_text = parsed.get("source_text", "") if isinstance(parsed, dict) else ""
+    return {"problem": problem_text, **cached}
+
+
+def run_a2a_simulation(problem_text: str) -> dict:
+    """
+    Simulate agent-to-agent (A2A) collaboration.
+    Each agent communicates sequentially: Parser → Scene → Validator,
+    except that SceneAgent may already be running on pre_extract's
+    ParsedSpec (SPECULATIVE_SCENE). The chain runs under REQUEST_BUDGET;
+    stages that run out of time or find the model unavailable are replaced
+    by local fallbacks and listed under "degraded".
+    """
+
+    log("A2A Orchestrator", "Starting A2A simulation for problem: %s", "info", problem_text)
+
+    key = problem_key(problem_text)
+    cached = _lookup_cache(problem_text, key)
+    if cached is not None:
+        return cached
+
+    fast = _run_fast_path(problem_text, key)
+    if fast is not None:
+        return fast
+
+    stored = _lookup_store(problem_text, key)
+    if stored is not None:
+        return stored
+
+    budget = Deadline(REQUEST_BUDGET)
+    result = {"problem": problem_text}
+
+    if PIPELINE_MODE == "fused":
+        log("A2A Orchestrator", "Sending problem to FusedAgent...", "info")
+        response = _send(_build_fused_agent(), problem_text, budget)
+        for stage, payload in _fused_stages(response).items():
+            _settle(stage, payload, result, _failure_reason(response))
+        log("A2A Orchestrator", "A2A simulation completed successfully.", "success")
+        SIMULATION_RESULTS.inc(source="fused")
+        _store_cache(key, result)
+        return result
+
+    context = {}
+    parser, scene, validator = _build_agents(problem_text, context)
+
+    speculation = _speculate(scene, problem_text, budget)
+
     log("A2A Orchestrator", "Sending problem to ParserAgent...", "info")
-    parsed_result = parser.send(problem_text)
+    _settle("parsed", _send(parser, problem_text, budget.split(STAGE_SHARES["parsed"])), result)
+    context['parsed'] = result["parsed"]
 
-    log("A2A Orchestrator", "Forwarding parsed output to SceneAgent...", "info")
-    scene_result = scene.send(parsed_result)
+    speculative = _take_speculation(speculation, result["parsed"])
+    if speculative is not None:
+        result["scene"] = speculative
+    else:
+        log("A2A Orchestrator", "Forwarding parsed output to SceneAgent...", "info")
+        _settle("scene", _send(scene, result["parsed"], budget.split(STAGE_SHARES["scene"])), result)
 
     log("A2A Orchestrator", "Passing generated scene to ValidatorAgent...", "info")
-    validated_scene = validator.send(scene_result)
+    _settle("validated", _send(validator, result["scene"], budget.split(STAGE_SHARES["validated"])), result)
 
     # Step 3 — Final result
     log("A2A Orchestrator", "A2A simulation completed successfully.", "success")
+    SIMULATION_RESULTS.inc(source="agents")
+
+    _store_cache(key, result)
+    return result
+
+
+# Concurrent async requests for the same normalized problem share one pipeline run.
+inflight = SingleFlight()
+
+
+def _collect_orchestrator_metrics():
+    for name, cache in (("result", result_cache), ("shape", shape_cache)):
+        stats = cache.stats()
+        for field in ("hits", "misses", "evictions", "size"):
+            yield f"a2a_cache_{field}", f"Result cache {field}", {"cache": name}, stats[field]
+    if scene_store is not None:
+        stats = scene_store.stats()
+        for field in ("hits", "misses", "evictions", "size"):
+            yield f"a2a_scene_store_{field}", f"Scene store {field}", {}, stats[field]
+    for field, value in inflight.stats().items():
+        yield f"a2a_singleflight_{field}", f"Single-flight {field}", {}, value
+    outcomes = {o: SPECULATIVE_SCENES.value(outcome=o) for o in ("hit", "miss", "failed")}
+    if any(outcomes.values()):
+        yield "a2a_speculative_scene_hit_rate", "Share of speculative scenes kept", {}, outcomes["hit"] / sum(outcomes.values())
+
+
+register_collector(_collect_orchestrator_metrics)
+
+
+def _ready_result(problem_text: str, key: str):
+    """(result, source) from the caches or the rule-based builder, or (None, None)."""
+    ready = _lookup_cache(problem_text, key)
+    if ready is not None:
+        return ready, "ResultCache"
+    ready = _run_fast_path(problem_text, key)
+    if ready is not None:
+        return ready, "SceneBuilder"
+    ready = _lookup_store(problem_text, key)
+    if ready is not None:
+        return ready, "SceneStore"
+    return None, None
+
+
+async def _pipeline_events(problem_text: str, key: str):
+    """
+    The Parser → Scene → Validator chain, yielding after each AgentNode.send.
+    In fused mode the three events are yielded together after the single call.
+    A stage replaced by its fallback is yielded with agent "Fallback" and
+    "degraded": True.
+    """
+    budget = Deadline(REQUEST_BUDGET)
+    result = {"problem": problem_text}
+
+    def event(stage: str, node: AgentNode, degraded: bool) -> dict:
+        if degraded:
+            return {"event": stage, "agent": "Fallback", "data": result[stage], "degraded": True}
+        return {"event": stage, "agent": node.name, "data": result[stage]}
+
+    if PIPELINE_MODE == "fused":
+        fused = _build_fused_agent()
+        log("A2A Orchestrator", "Sending problem to FusedAgent...", "info")
+        response = await _send_async(fused, problem_text, budget)
+        degraded = {
+            stage: _settle(stage, payload, result, _failure_reason(response))
+            for stage, payload in _fused_stages(response).items()
+        }
+        log("A2A Orchestrator", "A2A simulation completed successfully.", "success")
+        SIMULATION_RESULTS.inc(source="fused")
+        _store_cache(key, result)
+        for stage in STAGES:
+            yield event(stage, fused, degraded[stage])
+        return
+
+    context = {}
+    parser, scene, validator = _build_agents(problem_text, context)
+
+    speculation = _speculate_async(scene, problem_text, budget)
+
+    log("A2A Orchestrator", "Sending problem to ParserAgent...", "info")
+    degraded = _settle("parsed", await _send_async(parser, problem_text, budget.split(STAGE_SHARES["parsed"])), result)
+    context['parsed'] = result["parsed"]
+    yield event("parsed", parser, degraded)
+
+    speculative = await _take_speculation_async(speculation, result["parsed"])
+    if speculative is not None:
+        result["scene"], degraded = speculative, False
+    else:
+        log("A2A Orchestrator", "Forwarding parsed output to SceneAgent...", "info")
+        degraded = _settle("scene", await _send_async(scene, result["parsed"], budget.split(STAGE_SHARES["scene"])), result)
+    yield event("scene", scene, degraded)
+
+    log("A2A Orchestrator", "Passing generated scene to ValidatorAgent...", "info")
+    degraded = _settle("validated", await _send_async(validator, result["scene"], budget.split(STAGE_SHARES["validated"])), result)
+
+    log("A2A Orchestrator", "A2A simulation completed successfully.", "success")
+    SIMULATION_RESULTS.inc(source="agents")
+
+    _store_cache(key, result)
+    yield event("validated", validator, degraded)
+
+
+async def _collect_pipeline(problem_text: str, key: str, events: asyncio.Queue = None) -> dict:
+    """
+    Run the pipeline to a result. With `events`, each event is also put on
+    the queue as it happens, followed by None when the run ends (or fails).
+    """
+    result = {"problem": problem_text}
+    try:
+        async for event in _pipeline_events(problem_text, key):
+            result[event["event"]] = event["data"]
+            if event.get("degraded"):
+                result.setdefault("degraded", []).append(event["event"])
+            if events is not None:
+                events.put_nowait(event)
+    finally:
+        if events is not None:
+            events.put_nowait(None)
+    return result
+
+
+async def stream_a2a_simulation(problem_text: str):
+    """
+    Run the A2A pipeline and yield each agent's output as soon as it is ready.
+    Events are dicts of {"event", "agent", "data"}, one per AgentNode.send:
+    "parsed" (ParserAgent), "scene" (SceneAgent), "validated" (ValidatorAgent).
+    Cached, rule-built and coalesced results are replayed as the same three events.
+
+    A stream that finds no ready result leads the single-flight run for its
+    problem: concurrent streams and /simulate calls wait on it instead of
+    starting their own, while this stream still gets each event as it happens.
+    """
+
+    log("A2A Orchestrator", "Starting async A2A simulation for problem: %s", "info", problem_text)
+
+    key = problem_key(problem_text)
+    ready, source = _ready_result(problem_text, key)
+
+    if ready is None:
+        events = asyncio.Queue()
+        run, leader = inflight.join(key, lambda: _collect_pipeline(problem_text, key, events))
+        if leader:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            await asyncio.shield(run)  # re-raise a failed run
+            return
+        log("A2A Orchestrator", "Joining in-flight simulation for problem %s.", "info", key[:12])
+        ready, source = await asyncio.shield(run), "SingleFlight"
+
+    for stage in STAGES:
+        if stage in ready.get("degraded", ()):
+            yield {"event": stage, "agent": "Fallback", "data": ready[stage], "degraded": True}
+        else:
+            yield {"event": stage, "agent": source, "data": ready[stage]}
+
+
+async def run_a2a_simulation_async(problem_text: str) -> dict:
+    """
+    Async variant of `run_a2a_simulation` for the API.
+    Each agent call runs on the bounded agent executor, so many simulations
+    can be in flight on one worker without blocking the event loop.
+    Concurrent calls for the same normalized problem wait on a single run.
+    """
+
+    log("A2A Orchestrator", "Starting async A2A simulation for problem: %s", "info", problem_text)
+
+    key = problem_key(problem_text)
+    ready, _ = _ready_result(problem_text, key)
+    if ready is None:
+        ready = await inflight.do(key, lambda: _collect_pipeline(problem_text, key))
+    return {**ready, "problem": problem_text}
+
+
+def _agent_error(result: dict):
+    """First error reported by an agent in a finished result, if any."""
+    for stage in STAGES:
+        payload = result.get(stage)
+        if isinstance(payload, dict) and "error" in payload:
+            return f"{stage}: {payload['error']}"
+    return None
+
+
+async def run_a2a_simulation_batch(problems: list, max_concurrency: int = None) -> list:
+    """
+    Run many problems through the async pipeline at once.
+    Identical problems (after normalization) run once and share a result,
+    at most `max_concurrency` pipelines run at the same time, and a failure
+    in one item is reported on that item only.
+
+    Args:
+        problems (list[str]): Word problems, e.g. a whole problem set.
+        max_concurrency (int): Concurrent pipelines (default A2A_BATCH_CONCURRENCY).
+
+    Returns:
+        list[dict]: One entry per input, in order, each with index, problem,
+        status ("success" | "error") and either the result or an error detail.
+    """
+    limit = asyncio.Semaphore(max(1, max_concurrency or BATCH_CONCURRENCY))
+    unique = {}
+    for problem in problems:
+        if isinstance(problem, str) and problem.strip():
+            unique.setdefault(problem_key(problem), problem)
+
+    log("A2A Orchestrator", "Starting batch of %s problems (%s unique).", "info", len(problems), len(unique))
+
+    async def run_one(problem_text: str) -> dict:
+        async with limit:
+            try:
+                result = await run_a2a_simulation_async(problem_text)
+            except Exception as e:
+                log("A2A Orchestrator", "Batch item failed: %s", "error", e)
+                return {"status": "error", "detail": str(e)}
+
+        error = _agent_error(result)
+        if error is not None:
+            return {"status": "error", "detail": error, **result}
+        return {"status": "success", **result}
+
+    keys = list(unique)
+    outcomes = dict(zip(keys, await asyncio.gather(*(run_one(unique[k]) for k in keys))))
+
+    items = []
+    for index, problem in enumerate(problems):
+        if not isinstance(problem, str) or not problem.strip():
+            items.append({"index": index, "problem": problem, "status": "error", "detail": "Empty problem text"})
+            continue
+        outcome = outcomes[problem_key(problem)]
+        item = {"index": index, **outcome}
+        item["problem"] = problem
+        items.append(item)
 
-    return {
-        "problem": problem_text,
-        "parsed": parsed_result,
-        "scene": scene_result,
-        "validated": validated_scene
-    }
+    failed = sum(1 for item in items if item["status"] == "error")
+    log("A2A Orchestrator", "Batch completed: %s succeeded, %s failed.", "success", len(items) - failed, failed)
+    return items
 
-__all__ = ["run_a2a_simulation"]
\ No newline at end of file
+__all__ = ["run_a2a_simulation", "run_a2a_simulation_async", "stream_a2a_simulation", "run_a2a_simulation_batch", "get_cached_result", "has_cached_result"]
\ No newline at end of file
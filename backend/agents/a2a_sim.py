@@ -1,4 +1,11 @@
-from utils.logger import log
+import time
+import asyncio
+
+from utils.logger import log, truncate, Truncated
+from utils.concurrency import run_blocking
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.resilience import ModelUnavailable, failure_scope
+from utils.metrics import AGENT_DURATION
 
 class AgentNode:
     """
@@ -16,24 +23,72 @@ class AgentNode:
         self.role = role
         self.handler = handler
 
-    def send(self, message: dict):
+    def send(self, message: dict, deadline=None):
         """
         Simulate sending a message to the agent and returning a response.
+        With a `deadline` (utils/deadline.Deadline), model calls made by the
+        handler are bounded by it; running out gives {"error", "timeout": True}.
+        If the model layer gave up (utils/resilience.py), an error response is
+        marked "unavailable": True.
         """
-        log(self.name, f"Received message → {self._truncate(message)}", "info")
+        log(self.name, "Received message → %s", "info", Truncated(message))
 
+        start = time.perf_counter()
         try:
             # response = self.handler(**message) if isinstance(message, dict) else self.handler(message)
-            response = self.handler(message)
+            with deadline_scope(deadline), failure_scope() as failures:
+                response = self.handler(message)
             log(self.name, "Processed successfully.", "success")
+        except DeadlineExceeded as e:
+            response = {"error": str(e), "timeout": True}
+            log(self.name, "Timed out: %s", "warn", e)
+        except ModelUnavailable as e:
+            response = {"error": str(e), "unavailable": True}
+            log(self.name, "Model unavailable: %s", "warn", e)
         except Exception as e:
             response = {"error": str(e)}
-            log(self.name, f"Error: {e}", "error")
+            log(self.name, "Error: %s", "error", e)
+
+        # Handlers turn their own exceptions into error dicts; one that comes
+        # back after the deadline passed is reported as a timeout.
+        if deadline is not None and deadline.expired() and isinstance(response, dict) and "error" in response:
+            response["timeout"] = True
+        elif failures and isinstance(response, dict) and "error" in response:
+            response["unavailable"] = True
+
+        status = _status(response)
+        AGENT_DURATION.observe(time.perf_counter() - start, agent=self.name, status=status)
 
-        log(self.name, f"Sending response → {self._truncate(response)}", "info")
+        log(self.name, "Sending response → %s", "info", Truncated(response))
         return response
 
+    async def send_async(self, message: dict, deadline=None):
+        """
+        Same as `send`, but runs the handler on the shared agent executor
+        so the event loop stays free while the model call blocks. The wait
+        is cut off at the deadline even if the model call itself is not;
+        the worker thread then finishes in the background.
+        """
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is None:
+            return await run_blocking(self.send, message, deadline)
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(run_blocking(self.send, message, deadline), remaining)
+        except asyncio.TimeoutError:
+            log(self.name, "No response within %.2fs, giving up.", "warn", remaining)
+            AGENT_DURATION.observe(time.perf_counter() - start, agent=self.name, status="timeout")
+            return {"error": f"{self.name} timed out after {remaining:.2f}s", "timeout": True}
+
     def _truncate(self, data, max_len=250):
         """Shorten long messages for clean console logs."""
-        text = str(data)
-        return text[:max_len] + ("..." if len(text) > max_len else "")
\ No newline at end of file
+        return truncate(data, max_len)
+
+
+def _status(response) -> str:
+    if not isinstance(response, dict) or "error" not in response:
+        return "ok"
+    if response.get("timeout"):
+        return "timeout"
+    return "unavailable" if response.get("unavailable") else "error"
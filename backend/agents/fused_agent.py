@@ -0,0 +1,131 @@
+import copy
+import json
+from typing import Dict, Any
+
+from utils.logger import log
+from utils.llm_backend import call_model
+from utils.metrics import JSON_FALLBACKS
+from utils.validators import validate_parsed_spec
+from utils.prompt_templates import FUSED_PROMPT
+from ai_processing.physics_parserer import SCENE_RESPONSE_SCHEMA, apply_constraints, pre_extract
+from agents.validator_agent import validate_and_refine
+
+# ParsedSpec as a response schema. extra_terms is free-form, so it is left
+# out of the schema and defaulted to {} after the call.
+PARSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "environment_type": {"type": "string", "enum": ["incline", "plane", "pulley", "unknown"]},
+        "angle_deg": {"type": "number", "nullable": True},
+        "friction": {"type": "number", "nullable": True},
+        "objects": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"type": {"type": "string"}, "mass_kg": {"type": "number", "nullable": True}},
+                "required": ["type"]
+            }
+        }
+    },
+    "required": ["environment_type", "objects"]
+}
+
+FUSED_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "object",
+        "properties": {"parsed": PARSED_RESPONSE_SCHEMA, "scene": SCENE_RESPONSE_SCHEMA},
+        "required": ["parsed", "scene"]
+    }
+}
+
+
+def _constrain_parsed(parsed: dict, constraints: dict) -> dict:
+    """Overwrite ParsedSpec fields with the values pre_extract found in the text."""
+    if constraints.get("angle_deg") is not None:
+        parsed["environment_type"] = "incline"
+        parsed["angle_deg"] = constraints["angle_deg"]
+    elif constraints.get("is_incline"):
+        parsed["environment_type"] = "incline"
+
+    if constraints.get("friction") is not None:
+        parsed["friction"] = constraints["friction"]
+
+    objects = parsed.get("objects")
+    if not isinstance(objects, list) or not objects:
+        objects = [{}]
+    if not isinstance(objects[0], dict):
+        # e.g. "objects": ["box"]; schema-fill rather than fail on the reply.
+        objects[0] = {"type": objects[0]} if isinstance(objects[0], str) else {}
+    if constraints.get("object_type") is not None:
+        objects[0]["type"] = constraints["object_type"]
+    if constraints.get("mass_kg") is not None:
+        objects[0]["mass_kg"] = constraints["mass_kg"]
+    parsed["objects"] = objects
+    return parsed
+
+
+def parse_and_build(text: str) -> Dict[str, Any]:
+    """
+    Produce the ParsedSpec and the validated SceneJSON for a word problem in
+    one structured-output model call, instead of Parser → Scene → Validator.
+
+    Args:
+        text (str): Full word problem.
+
+    Returns:
+        dict: {"parsed", "scene", "validated"} — the same stages the agent
+              pipeline returns. "scene" is the model's SceneJSON and
+              "validated" that scene after the ValidatorAgent's checks
+              (validate, reconcile with the ParsedSpec, repair; a model
+              refinement only if still invalid) with pre_extract
+              constraints enforced. On failure each stage carries an
+              "error" key.
+    """
+    log("FusedAgent", "Starting single-call parse and scene generation...", "info")
+
+    constraints = pre_extract(text)
+    prompt = FUSED_PROMPT.render(constraints=constraints, problem=text)
+
+    try:
+        response_text = call_model(prompt, "FusedAgent", FUSED_GENERATION_CONFIG)
+        raw_output = response_text.strip()
+        cleaned = raw_output.replace("```json", "").replace("```", "").strip()
+
+        try:
+            data = json.loads(cleaned)
+            parsed, scene = data["parsed"], data["scene"]
+            if not isinstance(parsed, dict) or not isinstance(scene, dict):
+                raise TypeError("parsed and scene must be JSON objects")
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            log("FusedAgent", "JSON parsing failed: %s", "error", e)
+            JSON_FALLBACKS.inc(agent="FusedAgent", kind="invalid_json")
+            error = {"error": "Invalid JSON from model", "raw_output": raw_output}
+            return {"error": error["error"], "parsed": {**error, "source_text": text}, "scene": error, "validated": error}
+
+        parsed.setdefault("angle_deg", None)
+        parsed.setdefault("friction", None)
+        parsed.setdefault("extra_terms", {})
+        parsed["source_text"] = text
+        parsed = _constrain_parsed(parsed, constraints)
+
+        is_valid, errors = validate_parsed_spec(parsed)
+        if not is_valid:
+            log("FusedAgent", "ParsedSpec validation failed: %s", "warn", errors)
+            JSON_FALLBACKS.inc(agent="FusedAgent", kind="schema_fill")
+
+        # Same checks the agent pipeline's ValidatorAgent applies; a valid,
+        # consistent scene costs no model call.
+        validated = validate_and_refine(copy.deepcopy(scene), parsed, text)
+        if "error" not in validated:
+            validated = apply_constraints(validated, constraints)
+
+        log("FusedAgent", "Parsed spec and scene generated in one call.", "success")
+        return {"parsed": parsed, "scene": scene, "validated": validated}
+    except Exception as e:
+        log("FusedAgent", "Error in fused generation: %s", "error", e)
+        error = {"error": str(e)}
+        return {"error": str(e), "parsed": {**error, "source_text": text}, "scene": error, "validated": error}
+
+
+__all__ = ["parse_and_build", "PARSED_RESPONSE_SCHEMA", "FUSED_GENERATION_CONFIG"]
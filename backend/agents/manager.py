@@ -1,51 +1,108 @@
 from agents.parser_agent import parse_problem
-from agents.scene_agent import generate_scene
+from agents.scene_agent import generate_scene, generate_sections
 from agents.validator_agent import validate_and_refine
-from utils.logger import log
+from utils.logger import log, Truncated
+from utils.concurrency import run_blocking
+from utils.validators import scene_section_errors
 
-import time
+import os
+import random
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-REFINEMENT_DELAY = 2
+# Base delay before a retry; doubles each round (with jitter) up to MAX_REFINEMENT_DELAY.
+REFINEMENT_DELAY = float(os.getenv("A2A_REFINEMENT_DELAY", "0.5"))
+MAX_REFINEMENT_DELAY = float(os.getenv("A2A_MAX_REFINEMENT_DELAY", "4"))
+
+# Rounds kept in the returned history (the most recent ones).
+HISTORY_LIMIT = int(os.getenv("A2A_REFINEMENT_HISTORY", "3"))
+
+SECTIONS = ["scene", "environment", "objects", "simulation"]
 
 def scene_is_valid(scene: dict) -> bool:
-    required = ["scene", "environment", "objects", "simulation"]
+    required = SECTIONS
     return all(k in scene and scene[k] for k in required)
 
-def run_autonomous_simulation(problem_text: str, max_refinements: int = 3) -> dict:
+def flagged_sections(scene: dict) -> list:
+    """Top-level sections that are missing, empty or fail validate_scene_json."""
+    if not isinstance(scene, dict) or "error" in scene:
+        return list(SECTIONS)
+    errors = scene_section_errors(scene)
+    return [k for k in SECTIONS if not scene.get(k) or k in errors]
+
+def _backoff(round: int) -> float:
+    """Exponential delay for `round` with full +/-50% jitter, so retries don't line up."""
+    delay = min(MAX_REFINEMENT_DELAY, REFINEMENT_DELAY * 2 ** (round - 1))
+    return delay * random.uniform(0.5, 1.5)
+
+def _patch(scene: dict, fresh: dict, sections: list) -> dict:
+    """`scene` with only `sections` replaced by the freshly generated ones."""
+    if not isinstance(scene, dict) or "error" in scene:
+        return fresh
+    if not isinstance(fresh, dict) or "error" in fresh:
+        return scene
+    patched = dict(scene)
+    for section in sections:
+        if fresh.get(section):
+            patched[section] = fresh[section]
+    return patched
+
+async def run_autonomous_simulation_async(problem_text: str, max_refinements: int = 3) -> dict:
     """
     Run a full autonomous simulation loop with Parser → Scene → Validator.
     Retries up to `max_refinements` times if validation fails.
+
+    Agent calls run on the shared agent executor and retries wait with a
+    jittered `asyncio.sleep`, so no worker thread is held between rounds.
+    After the first round the model is only asked for the sections the
+    validator flagged (generate_sections); the rest of the last scene is kept.
+    A round whose scene is unusable as a whole regenerates it in full.
     """
-    log("Manager", f"Starting autonomous loop for: {problem_text}", "info")
+    log("Manager", "Starting autonomous loop for: %s", "info", problem_text)
 
-    parsed = parse_problem(problem_text)
-    log("Manager", f"ParsedSpec: {parsed}", "success")
+    parsed = await run_blocking(parse_problem, problem_text)
+    log("Manager", "ParsedSpec: %s", "success", Truncated(parsed))
 
     current_scene = None
     final_scene = None
+    flagged = list(SECTIONS)
+    attempts = 0
 
-    history = []
+    history = deque(maxlen=max(1, HISTORY_LIMIT))
     for round in range(1, max_refinements+1):
-        log("Manager", f"--- Round {round} ---", "info")
+        log("Manager", "--- Round %s ---", "info", round)
+        attempts = round
 
-        current_scene = generate_scene(parsed)
-        log("Manager", "Scene generated. Passing to Validator...", "info")
+        if current_scene is None or "error" in current_scene:
+            current_scene = await run_blocking(generate_scene, parsed)
+        else:
+            fresh = await run_blocking(generate_sections, parsed, current_scene, flagged)
+            current_scene = _patch(current_scene, fresh, flagged)
+        log("Manager", "Scene generated (sections: %s). Passing to Validator...", "info", ', '.join(flagged))
 
-        validated = validate_and_refine(current_scene, parsed, problem_text)
+        validated = await run_blocking(validate_and_refine, current_scene, parsed, problem_text)
 
         history.append({
             'round':round,
+            'flagged':flagged,
             'scene':current_scene,
             'validated':validated
         })
 
-        if scene_is_valid(validated):
-            log("Manager", f"Validation successful at round {round}.", "success")
+        if isinstance(validated, dict) and scene_is_valid(validated):
+            log("Manager", "Validation successful at round %s.", "success", round)
             final_scene = validated
             break
-        else:
-            log("Manager", f"Validation still failing — retrying (Round {round})", "warn")
-            time.sleep(REFINEMENT_DELAY)
+
+        flagged = flagged_sections(validated)
+        if isinstance(validated, dict) and "error" not in validated:
+            # Keep what the validator already fixed; regenerate only the rest.
+            current_scene = validated
+        if round < max_refinements:
+            delay = _backoff(round)
+            log("Manager", "Validation still failing on %s — retrying in %.2fs (Round %s)", "warn", flagged, delay, round)
+            await asyncio.sleep(delay)
 
     if final_scene is None:
         log("Manager", "Max refinements reached. Returning last known scene.", "warn")
@@ -54,8 +111,23 @@ def run_autonomous_simulation(problem_text: str, max_refinements: int = 3) -> di
     log("Manager", "Autonomous simulation completed.", "success")
     return {
         "final_scene": final_scene,
-        "attempts": len(history),
-        "history": history
+        "attempts": attempts,
+        "history": list(history)
     }
 
-__all__ = ["run_autonomous_simulation"]
\ No newline at end of file
+def run_autonomous_simulation(problem_text: str, max_refinements: int = 3) -> dict:
+    """
+    Blocking wrapper around `run_autonomous_simulation_async` for scripts.
+
+    asyncio.run cannot start inside a running event loop, so when one is
+    running in this thread the loop gets its own thread instead (the caller
+    still blocks). Coroutines should await the async version.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run_autonomous_simulation_async(problem_text, max_refinements))
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="autonomous") as pool:
+        return pool.submit(asyncio.run, run_autonomous_simulation_async(problem_text, max_refinements)).result()
+
+__all__ = ["run_autonomous_simulation", "run_autonomous_simulation_async"]
\ No newline at end of file
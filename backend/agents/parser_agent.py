@@ -1,20 +1,12 @@
-import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
 from typing import Dict, Any
 
 from utils.logger import log
+from utils.llm_backend import call_model
+from utils.metrics import JSON_FALLBACKS
 from utils.validators import validate_parsed_spec
 from utils.schema import ParsedSpecSchema
-
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-if not GOOGLE_API_KEY:
-    raise EnvironmentError("Missing GOOGLE_API_KEY in .env file")
-
-genai.configure(api_key=GOOGLE_API_KEY)
+from utils.prompt_templates import PARSER_PROMPT
 
 def parse_problem(text: str) -> Dict[str, Any]:
     """
@@ -30,80 +22,19 @@ def parse_problem(text: str) -> Dict[str, Any]:
     log("ParserAgent", "Starting problem parsing...", "info")
 
     try:
-        prompt = f"""
-        You are a Physics Problem Parser.
-        Your job is to read a natural-language physics problem and extract all key details
-        for building a 3D physics simulation.
-
-        ---
-
-        OUTPUT FORMAT (must always be valid JSON):
-        {{
-        "environment_type": "string (incline | plane | pulley | unknown)",
-        "angle_deg": "float or null",
-        "friction": "float or null",
-        "objects": [
-            {{
-            "type": "string (e.g., box, sphere, ball)",
-            "mass_kg": "float or null"
-            }}
-        ],
-        "extra_terms": {{ "key": "value" }},
-        "source_text": "original input text"
-        }}
-
-        ---
-
-        RULES:
-        1. Output only JSON, no explanations or markdown.
-        2. All keywords and types should be lowercase.
-        3. Use null if a value is not explicitly stated.
-        4. Detect angles (in degrees) and friction coefficients.
-        5. Detect object masses and assign them to "mass_kg".
-        6. Recognize environment context (incline, plane, pulley, etc.).
-        7. Use conservative defaults — do not assume values not mentioned.
-        8. Include "source_text" identical to the given problem.
-        9. Return nothing except the final JSON object.
-
-        ---
-
-        EXAMPLE:
-        Problem:
-        "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
-
-        Expected Output:
-        {{
-        "environment_type": "incline",
-        "angle_deg": 30,
-        "friction": 0.2,
-        "objects": [
-            {{ "type": "box", "mass_kg": 5 }}
-        ],
-        "extra_terms": {{}},
-        "source_text": "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
-        }}
-
-        ---
-
-        Now, process the following problem carefully:
-
-        Problem:
-        \"\"\"{text}\"\"\"
-
-        Return only the JSON.
-        """
+        prompt = PARSER_PROMPT.render(problem=text)
 
         log("ParserAgent", "Sending prompt to Gemini model...", "info")
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        response_text = call_model(prompt, "ParserAgent")
 
-        raw_output = response.text.strip()
+        raw_output = response_text.strip()
         cleaned = raw_output.replace("```json", "").replace("```", "").strip()
 
         try:
             parsed = json.loads(cleaned)
         except json.JSONDecodeError as e:
-            log("ParserAgent", f"JSON parsing failed: {e}", "error")
+            log("ParserAgent", "JSON parsing failed: %s", "error", e)
+            JSON_FALLBACKS.inc(agent="ParserAgent", kind="invalid_json")
             return {
                 "error": "Invalid JSON from model",
                 "raw_output": raw_output,
@@ -112,7 +43,8 @@ def parse_problem(text: str) -> Dict[str, Any]:
         
         is_valid, errors = validate_parsed_spec(parsed)
         if not is_valid:
-            log("ParserAgent", f"Validation failed: {errors}", "error")
+            log("ParserAgent", "Validation failed: %s", "error", errors)
+            JSON_FALLBACKS.inc(agent="ParserAgent", kind="schema_fill")
             parsed = {
                 "environment_type": parsed.get("environment_type", "unknown"),
                 "angle_deg": parsed.get("angle_deg"),
@@ -137,7 +69,7 @@ def parse_problem(text: str) -> Dict[str, Any]:
         log("ParserAgent", "Parsing completed successfully.", "success")
         return parsed
     except Exception as e:
-        log("ParserAgent", f"Error parsing problem: {e}", "error")
+        log("ParserAgent", "Error parsing problem: %s", "error", e)
         return {"error": str(e), "source_text": text}
     
 __all__ = ['parse_problem']
\ No newline at end of file
@@ -1,20 +1,12 @@
-import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
 from typing import Dict, Any
 
 from utils.logger import log
+from utils.llm_backend import call_model
+from utils.metrics import JSON_FALLBACKS
 from utils.validators import validate_scene_json
 from utils.schema import SceneJSONSchema
-
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-if not GOOGLE_API_KEY:
-    raise EnvironmentError("Missing GOOGLE_API_KEY in .env file")
-
-genai.configure(api_key=GOOGLE_API_KEY)
+from utils.prompt_templates import SCENE_PROMPT, SCENE_SECTIONS_PROMPT
 
 def generate_scene(parsed: dict) -> dict:
     """
@@ -29,92 +21,19 @@ def generate_scene(parsed: dict) -> dict:
     log("SceneAgent", "Starting scene generation...", "info")
 
     try:
-        prompt = f"""
-        You are a Physics Simulation Scene Generator.
-
-        Your job is to take structured physics data (ParsedSpec) and generate
-        a complete 3D physics simulation configuration (SceneJSON) that can
-        be rendered in Three.js + Cannon.js.
-
-        ---
-
-        🎯 INPUT FORMAT (ParsedSpec):
-        {{
-        "environment_type": "string (incline | plane | pulley | unknown)",
-        "angle_deg": "float or null",
-        "friction": "float or null",
-        "objects": [{{ "type": "string", "mass_kg": "float or null" }}],
-        "extra_terms": {{"key": "value"}},
-        "source_text": "original problem text"
-        }}
-
-        ---
-
-        🎨 OUTPUT FORMAT (SceneJSON):
-        {{
-        "scene": {{
-            "gravity": {{"x": 0, "y": -9.81, "z": 0}},
-            "camera": {{
-            "position": {{"x": 5, "y": 5, "z": 10}},
-            "lookAt": {{"x": 0, "y": 0, "z": 0}}
-            }},
-            "lighting": [
-            {{"type": "ambient", "intensity": 0.5}},
-            {{"type": "directional", "direction": {{"x": 0.5, "y": -1, "z": 0.5}}, "intensity": 0.8}}
-            ]
-        }},
-        "environment": {{
-            "type": "string (from environment_type)",
-            "angle": "float (use angle_deg if available)",
-            "material": {{"friction": "float (use friction if available)", "restitution": 0.2}}
-        }},
-        "objects": [
-            {{
-            "type": "string",
-            "mass": "float",
-            "size": {{"width": 1, "height": 1, "depth": 1}},
-            "position": {{"x": 0, "y": 2, "z": 0}},
-            "material": {{"color": "#E2562C", "friction": "float", "restitution": 0.3}}
-            }}
-        ],
-        "simulation": {{
-            "timestep": 0.016,
-            "duration": 5.0,
-            "solver": "Cannon"
-        }}
-        }}
-
-        ---
-
-        🧠 RULES:
-        1. Use ParsedSpec values to guide physics setup.
-        2. If environment_type = "incline", include "angle".
-        3. If friction is missing, assume 0.3.
-        4. If mass is missing, assume 1.
-        5. Return only valid JSON, no markdown or text.
-        6. Maintain physical realism — gravity must act downward (y = -9.81).
-        7. Ensure each object rests correctly on its environment (e.g., above incline).
-        8. Use lowercase for keywords.
-
-        ---
-
-        Here is the ParsedSpec input:
-        \"\"\"{parsed}\"\"\"
-
-        Return only the SceneJSON.
-        """
+        prompt = SCENE_PROMPT.render(parsed=parsed)
 
         log("SceneAgent", "Sending prompt to Gemini model...", "info")
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        response_text = call_model(prompt, "SceneAgent")
 
-        raw_output = response.text.strip()
+        raw_output = response_text.strip()
         cleaned = raw_output.replace("```json", "").replace("```", "").strip()
 
         try:
             scene_json = json.loads(cleaned)
         except json.JSONDecodeError as e:
-            log("SceneAgent", f"JSON parsing failed: {e}", "error")
+            log("SceneAgent", "JSON parsing failed: %s", "error", e)
+            JSON_FALLBACKS.inc(agent="SceneAgent", kind="invalid_json")
             return {
                 "error": "Invalid JSON from Gemini",
                 "raw_output": raw_output,
@@ -123,7 +42,8 @@ def generate_scene(parsed: dict) -> dict:
         
         is_valid, errors = validate_scene_json(scene_json)
         if not is_valid:
-            log("SceneAgent", f"Validation failed: {errors}", "error")
+            log("SceneAgent", "Validation failed: %s", "error", errors)
+            JSON_FALLBACKS.inc(agent="SceneAgent", kind="schema_fill")
             scene_json = {
                 "scene": scene_json.get("scene", {
                     "gravity": {"x": 0, "y": -9.81, "z": 0},
@@ -147,8 +67,46 @@ def generate_scene(parsed: dict) -> dict:
         log("SceneAgent", "Scene JSON parsed successfully.", "success")
         return scene_json
     except Exception as e:
-        log("SceneAgent", f"Error generating scene: {e}", "error")
+        log("SceneAgent", "Error generating scene: %s", "error", e)
         return {"error": str(e), "parsed_spec": parsed}
 
+def generate_sections(parsed: dict, scene: dict, sections: list) -> dict:
+    """
+    Regenerate only some top-level sections of an existing scene.
+
+    Args:
+        parsed (dict): ParsedSpec produced by Parser Agent.
+        scene (dict): Current SceneJSON; the sections not listed are kept by the caller.
+        sections (list): Top-level keys to regenerate.
+
+    Returns:
+        dict: {section: value} for each listed section the model returned,
+        or {"error": ...} when the response is unusable.
+    """
+    log("SceneAgent", "Regenerating sections: %s", "info", ", ".join(sections))
+
+    try:
+        prompt = SCENE_SECTIONS_PROMPT.render(sections=list(sections), parsed=parsed, scene=scene)
+        response_text = call_model(prompt, "SceneAgent")
+        cleaned = response_text.strip().replace("```json", "").replace("```", "").strip()
+
+        try:
+            fresh = json.loads(cleaned)
+        except json.JSONDecodeError as e:
+            log("SceneAgent", "JSON parsing failed: %s", "error", e)
+            JSON_FALLBACKS.inc(agent="SceneAgent", kind="invalid_json")
+            return {"error": "Invalid JSON from Gemini", "raw_output": cleaned}
+        if not isinstance(fresh, dict):
+            return {"error": "Sections response is not a JSON object", "raw_output": cleaned}
+
+        returned = {k: fresh[k] for k in sections if fresh.get(k)}
+        missing = [k for k in sections if k not in returned]
+        if missing:
+            log("SceneAgent", "Sections missing from response: %s", "warn", missing)
+        return returned
+    except Exception as e:
+        log("SceneAgent", "Error regenerating sections: %s", "error", e)
+        return {"error": str(e)}
+
 
-__all__ = ["generate_scene"]
\ No newline at end of file
+__all__ = ["generate_scene", "generate_sections"]
\ No newline at end of file
@@ -1,18 +1,28 @@
-import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
 from typing import Dict, Any
 
 from utils.logger import log
-from utils.validators import validate_scene_json
+from utils.llm_backend import call_model
+from utils.metrics import JSON_FALLBACKS, VALIDATOR_REFINEMENTS
+from utils.validators import validate_scene_json, repair_scene, compare_parsed_and_scene
+from utils.prompt_templates import VALIDATOR_PROMPT
+from ai_processing.scene_builder import retilt_incline
 
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise EnvironmentError("Missing GOOGLE_API_KEY in .env file")
+def _reconcile(scene: dict, parsed: dict):
+    """
+    repair_scene, keeping objects on the ramp when the repair changes the
+    angle of an incline (repair_scene only rewrites environment.angle).
+    """
+    env = scene.get("environment") if isinstance(scene.get("environment"), dict) else {}
+    old_type, old_angle = env.get("type"), env.get("angle")
+    repaired, changes = repair_scene(scene, parsed)
+    new_angle = repaired["environment"]["angle"]
+    if (old_type == "incline" and repaired["environment"]["type"] == "incline"
+            and isinstance(old_angle, (int, float)) and not isinstance(old_angle, bool)
+            and new_angle != old_angle and retilt_incline(repaired, old_angle, new_angle)):
+        changes.append(f"objects: moved with the incline from {old_angle} to {new_angle} degrees")
+    return repaired, changes
 
-genai.configure(api_key=GOOGLE_API_KEY)
 
 def validate_and_refine(scene: dict, parsed: dict, problem_text: str) -> dict:
     """
@@ -31,87 +41,64 @@ def validate_and_refine(scene: dict, parsed: dict, problem_text: str) -> dict:
     try:
         is_valid, errors = validate_scene_json(scene)
         if is_valid:
-            log("ValidatorAgent", "Scene JSON passed base validation.", "success")
-            return scene
+            # Structurally valid is not enough: values must agree with the ParsedSpec.
+            mismatches = compare_parsed_and_scene(parsed, scene)
+            if not mismatches:
+                log("ValidatorAgent", "Scene JSON passed base validation.", "success")
+                VALIDATOR_REFINEMENTS.inc(outcome="skipped")
+                return scene
+            log("ValidatorAgent", "Scene disagrees with ParsedSpec: %s", "warn", mismatches)
         else:
-            log("ValidatorAgent", f"Base validation failed: {errors}", "warn")
+            log("ValidatorAgent", "Base validation failed: %s", "warn", errors)
+
+        # Rule-based repair first; only what it cannot fix goes to the model.
+        if "error" not in scene:
+            repaired, changes = _reconcile(scene, parsed)
+            is_valid, errors = validate_scene_json(repaired)
+            if changes:
+                log("ValidatorAgent", "Local repair applied: %s", "info", "; ".join(changes))
+            if is_valid:
+                # Whatever still differs was clamped to NUMERIC_BOUNDS; a model could not do better.
+                mismatches = compare_parsed_and_scene(parsed, repaired)
+                if mismatches:
+                    log("ValidatorAgent", "Kept clamped values: %s", "warn", mismatches)
+                log("ValidatorAgent", "Scene JSON repaired locally; no refinement needed.", "success")
+                VALIDATOR_REFINEMENTS.inc(outcome="repaired")
+                return repaired
+            log("ValidatorAgent", "Still invalid after local repair: %s", "warn", errors)
+            scene = repaired
+
+        VALIDATOR_REFINEMENTS.inc(outcome="requested")
 
         log("ValidatorAgent", "Preparing to request AI-based refinement...", "info")
 
-        prompt = f"""
-You are a Physics Simulation Validator and Refiner.
-Your task is to ensure a simulation JSON accurately represents
-a given word problem and parsed specification.
-
----
-
-INPUTS
-1. Problem Text: the full physics word problem
-2. ParsedSpec: structured description (environment, friction, mass, etc.)
-3. SceneJSON: proposed simulation setup for Three.js + Cannon.js
-
----
-
-YOUR JOB
-- Verify that SceneJSON matches the ParsedSpec.
-- Fix missing or incorrect fields.
-- Ensure consistency with physical reality.
-
----
-
-CHECKLIST
-1. Does environment.type match ParsedSpec.environment_type?
-2. If environment_type = "incline", ensure angle is present and numeric.
-3. If friction is missing or unrealistic (<0 or >1), replace with 0.3.
-4. If object mass or type is missing, use ParsedSpec.objects values.
-5. Ensure each object has a valid position (above environment).
-6. Add default camera, lighting, and gravity if missing.
-7. Simulation block must include: timestep, duration, solver.
-8. All numbers must be floats, not strings.
-9. Return only valid JSON (no text, no comments).
-
----
-
-Here are the inputs:
-
-Problem Text:
-\"\"\"{problem_text}\"\"\"
-
-ParsedSpec:
-\"\"\"{json.dumps(parsed, indent=2)}\"\"\"
-
-SceneJSON:
-\"\"\"{json.dumps(scene, indent=2)}\"\"\"
-
----
-
-Return only the corrected SceneJSON.
-        """
+        prompt = VALIDATOR_PROMPT.render(problem=problem_text, parsed=parsed, scene=scene)
 
         log("ValidatorAgent", "Sending scene for AI-based refinement...", "info")
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        response_text = call_model(prompt, "ValidatorAgent")
 
-        raw_output = response.text.strip()
+        raw_output = response_text.strip()
         cleaned = raw_output.replace("```json", "").replace("```", "").strip()
         
         try:
             refined = json.loads(cleaned)
             log("ValidatorAgent", "Refined SceneJSON parsed successfully.", "success")
         except json.JSONDecodeError as e:
-            log("ValidatorAgent", f"JSON parsing failed: {e}", "error")
+            log("ValidatorAgent", "JSON parsing failed: %s", "error", e)
+            JSON_FALLBACKS.inc(agent="ValidatorAgent", kind="invalid_json")
             refined = scene
 
         is_valid, errors = validate_scene_json(refined)
         if not is_valid:
-            log("ValidatorAgent", f"Post-refinement validation failed: {errors}", "warn")
+            log("ValidatorAgent", "Post-refinement validation failed: %s", "warn", errors)
+            JSON_FALLBACKS.inc(agent="ValidatorAgent", kind="post_refinement_invalid")
         else:
             log("ValidatorAgent", "SceneJSON validated successfully after refinement.", "success")
 
         return refined
     except Exception as e:
-        log("ValidatorAgent", f"Error during validation: {e}", "error")
+        log("ValidatorAgent", "Error during validation: %s", "error", e)
         return {"error": str(e), "scene_json": scene}
     
 __all__ = ["validate_and_refine"]
\ No newline at end of file
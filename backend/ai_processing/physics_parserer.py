@@ -1,167 +1,144 @@
-from dotenv import load_dotenv
-import os
 import json
-import re
-from typing import Optional, Literal
+from typing import List
 
-import google.generativeai as genai
+from ai_processing.quantities import OBJECT_WORDS, constraints_from, extract_quantities, quantity_spans
+from utils.llm_backend import call_model
+from utils.metrics import JSON_FALLBACKS
+from utils.prompt_templates import EXTRACTOR_PROMPT
+from utils.resilience import ModelUnavailable
+from utils.validators import repair_scene
 
-load_dotenv()
-
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
-
-OBJECT_WORDS = {
-    'spehere':['sphere', 'ball'],
-    'box':['box', 'block', 'cube', 'crate']
-}
+def find_quantity_spans(text: str) -> dict:
+    """
+    Locate the numbers pre_extract reads, as {name: (start, end, value)}.
+    `text` is expected to be lowercased already.
+    """
+    return quantity_spans(extract_quantities(text))
 
 def pre_extract(problem: str):
-    text = problem.lower()
-
-    angle = None
-    m = re.search(r'(\d+(?:\.\d+)?)\s*(?:°|degrees?)', text)
-    if m: angle = float(m.group(1))
-    if angle is None:
-        m  = re.search(r'angle\s*(?:of|=)?\s*(\d+(?:\.\d+)?)', text)
-        if m: angle = float(m.group(1))
-
-    mass = None
-    m = re.search(r'(\d+(?:\.\d+)?)\s*kg\b', text)
-    if m: mass = float(m.group(1))
-
-    friction = None
-    m = re.search(r'(?:μ|mu|coefficient of friction|friction coefficient|mu=|μ=)\s*(\d+(?:\.\d+)?)', text)
-    if m: friction = float(m.group(1))
-    if friction is None and ("no friction" in text or "frictionless" in text or "smooth" in text):
-        friction = 0.0
-
-    obj_type: Optional[Literal['sphere', 'box']] = None
-    for t, words in OBJECT_WORDS.items():
-        if any(w in text for w in words):
-            obj_type = t
-            break
-
-    is_incline = any(w in text for w in ["incline", "ramp", "slope", "angle"]) or (angle is not None)
-
-    return {
-        'angle_deg': angle,
-        "mass_kg": mass,
-        "friction": friction,
-        "object_type": obj_type,
-        "is_incline": is_incline
-    }
+    """
+    Regex-certain constraints for a problem: first angle (degrees), first
+    mass (kg, converted from g/lb), friction coefficient (0 for frictionless
+    wording), first object's type and whether it is an incline.
+    """
+    return constraints_from(extract_quantities(problem))
+
+def pre_extract_batch(texts: List[str]) -> List[dict]:
+    """
+    `pre_extract` for many problems (e.g. a problem set) in one call: one
+    compiled pass per text, keeping only the constraints (holding thousands
+    of full extractions at once costs more in GC than the scan itself).
+    """
+    return [constraints_from(extract_quantities(text)) for text in texts]
 
 # for m in genai.list_models():
 #     print(m.name)
 
-def extract_simulation_data(problem: str):
-    constraints = pre_extract(problem)
-
-    system_rules = f"""
-    You convert physics word problems into a JSON scene for a 3D simulation.
-    You MUST honor the provided constraints EXACTLY when present:
-
-    CONSTRAINTS (use these values verbatim if not null):
-    {json.dumps(constraints)}
-
-    Rules:
-    - If constraints.angle_deg is not null -> environment.type = "incline" and environment.angle = that exact number.
-    - If constraints.is_incline is true and angle_deg is null -> still use "incline" but omit angle.
-    - If constraints.object_type is not null -> objects[0].type = that exact value.
-    - If constraints.mass_kg is not null -> objects[0].mass = that exact value.
-    - If constraints.friction is not null -> set BOTH environment.material.friction and objects[0].material.friction to that exact value.
-    - Always use gravity -9.81 on Y.
-    - Use meters, kilograms, seconds.
-    - Return ONLY JSON (no markdown, no text).
-
-    The JSON MUST have these keys: scene, environment, objects, simulation.
-    """
-
-    # Define a strict response schema the model must follow
-    response_schema = {
-        "type": "object",
-        "properties": {
-            "scene": {
-                "type": "object",
-                "properties": {
-                    "gravity": {"type": "object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},
-                    "camera": {"type":"object","properties":{"position":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},"lookAt":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]}},"required":["position","lookAt"]},
-                    "lighting": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "type": {"type": "string"},
-                                "intensity": {"type": "number"}
-                            },
-                            "required": ["type", "intensity"]
-                        }
+# Strict response schema the model must follow; built once at import, not per call
+SCENE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scene": {
+            "type": "object",
+            "properties": {
+                "gravity": {"type": "object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},
+                "camera": {"type":"object","properties":{"position":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},"lookAt":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]}},"required":["position","lookAt"]},
+                "lighting": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "type": {"type": "string"},
+                            "intensity": {"type": "number"}
+                        },
+                        "required": ["type", "intensity"]
                     }
-                },
-                "required": ["gravity","camera","lighting"]
+                }
             },
-            "environment": {
+            "required": ["gravity","camera","lighting"]
+        },
+        "environment": {
+            "type":"object",
+            "properties":{
+                "type":{"type":"string"},
+                "angle":{"type":"number"},
+                "dimensions":{"type":"object","properties":{"width":{"type":"number"},"depth":{"type":"number"},"height":{"type":"number"}}},
+                "material":{"type":"object","properties":{"color":{"type":"string"},"friction":{"type":"number"},"restitution":{"type":"number"}}}
+            },
+            "required":["type"]
+        },
+        "objects": {
+            "type":"array",
+            "items":{
                 "type":"object",
                 "properties":{
                     "type":{"type":"string"},
-                    "angle":{"type":"number"},
-                    "dimensions":{"type":"object","properties":{"width":{"type":"number"},"depth":{"type":"number"},"height":{"type":"number"}}},
-                    "material":{"type":"object","properties":{"color":{"type":"string"},"friction":{"type":"number"},"restitution":{"type":"number"}}}
-                },
-                "required":["type"]
-            },
-            "objects": {
-                "type":"array",
-                "items":{
-                    "type":"object",
-                    "properties":{
-                        "type":{"type":"string"},
-                        "mass":{"type":"number"},
-                        "size": {
-                            "type": "object",
-                            "properties": {
-                                "width": {"type": "number"},
-                                "height": {"type": "number"},
-                                "depth": {"type": "number"},
-                                "radius": {"type": "number"}
-                            }
-                        },
-                        "position":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},
-                        "material":{"type":"object","properties":{"color":{"type":"string"},"friction":{"type":"number"},"restitution":{"type":"number"}}}
+                    "mass":{"type":"number"},
+                    "size": {
+                        "type": "object",
+                        "properties": {
+                            "width": {"type": "number"},
+                            "height": {"type": "number"},
+                            "depth": {"type": "number"},
+                            "radius": {"type": "number"}
+                        }
                     },
-                    "required":["type","mass","position"]
+                    "position":{"type":"object","properties":{"x":{"type":"number"},"y":{"type":"number"},"z":{"type":"number"}},"required":["x","y","z"]},
+                    "material":{"type":"object","properties":{"color":{"type":"string"},"friction":{"type":"number"},"restitution":{"type":"number"}}}
                 },
+                "required":["type","mass","position"]
             },
-            "simulation": {
-                "type":"object",
-                "properties":{"timestep":{"type":"number"},"duration":{"type":"number"},"solver":{"type":"string"},"notes":{"type":"string"}},
-                "required":["timestep","duration","solver"]
-            }
         },
-        "required": ["scene","environment","objects","simulation"]
-    }
-
-    generation_config = {
-        "response_mime_type": "application/json",
-        "response_schema": response_schema
-    }
+        "simulation": {
+            "type":"object",
+            "properties":{"timestep":{"type":"number"},"duration":{"type":"number"},"solver":{"type":"string"},"notes":{"type":"string"}},
+            "required":["timestep","duration","solver"]
+        }
+    },
+    "required": ["scene","environment","objects","simulation"]
+}
 
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-flash", generation_config=generation_config)
+SCENE_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": SCENE_RESPONSE_SCHEMA
+}
 
-    prompt = f"""{system_rules}
+def extract_simulation_data(problem: str):
+    constraints = pre_extract(problem)
 
-    Problem:
-    \"\"\"{problem}\"\"\"
-    """
+    prompt = EXTRACTOR_PROMPT.render(constraints=constraints, problem=problem)
 
     try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+        text = call_model(prompt, "SimulationExtractor", SCENE_GENERATION_CONFIG).strip()
         data = json.loads(text)
+    except ModelUnavailable as e:
+        # Fail fast while the model is down: default scene plus the regex-certain values.
+        JSON_FALLBACKS.inc(agent="SimulationExtractor", kind="model_unavailable")
+        data = repair_scene({}, {
+            "environment_type": "incline" if constraints["is_incline"] else "plane",
+            "angle_deg": constraints["angle_deg"],
+            "friction": constraints["friction"],
+            "objects": [{"type": constraints["object_type"] or "box", "mass_kg": constraints["mass_kg"]}],
+        })[0]
     except Exception as e:
+        JSON_FALLBACKS.inc(agent="SimulationExtractor", kind="invalid_json")
         return {"error": f"AI generation/parsing failed: {str(e)}"}
     
+    return apply_constraints(data, constraints)
+
+
+def apply_constraints(data: dict, constraints: dict) -> dict:
+    """
+    Overwrite a model-generated SceneJSON with the values pre_extract found in
+    the problem text, so regex-certain numbers always win over the model.
+
+    Args:
+        data (dict): SceneJSON (modified in place).
+        constraints (dict): Output of pre_extract.
+
+    Returns:
+        dict: The same SceneJSON.
+    """
     env = data.get('environment', {})
     obj0 = (data.get('objects') or [{}])[0]
 
@@ -0,0 +1,216 @@
+"""
+Single-pass quantity extraction for physics word problems
+- extract_quantities: every number-with-unit in the text, normalized to SI, plus
+  the objects it mentions with per-object masses, speeds and forces
+- extract_batch: the same for a whole problem set in one call
+- constraints_from: the pre_extract view (first angle/mass/friction, object type)
+
+One precompiled regex walks the lowercased text once, left to right; each
+match is a quantity, a friction coefficient, an object mention or a keyword.
+Angles are reported in degrees (the unit ParsedSpec and SceneJSON use); every
+other quantity is converted to SI: kg, m, m/s, m/s², N, s.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+OBJECT_WORDS = {
+    'sphere': ['sphere', 'ball'],
+    'box': ['box', 'block', 'cube', 'crate'],
+}
+_OBJECT_TYPES = {w: t for t, words in OBJECT_WORDS.items() for w in words}
+
+# unit -> (kind, factor to the canonical unit)
+UNITS = {
+    "kg": ("mass", 1.0), "kgs": ("mass", 1.0), "kilogram": ("mass", 1.0), "kilograms": ("mass", 1.0),
+    "g": ("mass", 1e-3), "gram": ("mass", 1e-3), "grams": ("mass", 1e-3),
+    "lb": ("mass", 0.45359237), "lbs": ("mass", 0.45359237), "pound": ("mass", 0.45359237), "pounds": ("mass", 0.45359237),
+    "°": ("angle", 1.0), "deg": ("angle", 1.0), "degree": ("angle", 1.0), "degrees": ("angle", 1.0),
+    "rad": ("angle", 180.0 / math.pi), "radian": ("angle", 180.0 / math.pi), "radians": ("angle", 180.0 / math.pi),
+    "m/s²": ("acceleration", 1.0), "m/s^2": ("acceleration", 1.0), "m/s2": ("acceleration", 1.0),
+    "m/s": ("speed", 1.0), "km/h": ("speed", 1 / 3.6),
+    "cm": ("length", 1e-2), "km": ("length", 1e3),
+    "m": ("length", 1.0), "meter": ("length", 1.0), "meters": ("length", 1.0), "metre": ("length", 1.0), "metres": ("length", 1.0),
+    "n": ("force", 1.0), "newton": ("force", 1.0), "newtons": ("force", 1.0),
+    "s": ("time", 1.0), "sec": ("time", 1.0), "second": ("time", 1.0), "seconds": ("time", 1.0),
+}
+
+# Quantities that describe a body rather than the environment.
+OBJECT_KINDS = ("mass", "speed", "force")
+
+_NUM = r'\d+(?:\.\d+)?'
+# Longest spellings first so "m/s²" is not read as "m", "kgs" not as "kg".
+_UNIT_ALT = "|".join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True))
+_OBJECT_ALT = "|".join(sorted(_OBJECT_TYPES, key=len, reverse=True))
+
+# The leading lookahead lists every alternative's first character, so the
+# engine skips most positions without trying each branch.
+TOKEN_RE = re.compile(
+    r'(?=[\dμmckfsanwbric])(?:'
+    rf'(?P<mu>\b(?:μ|mu)(?:_?[sk])?\b\s*(?:=|is|of)?\s*|'
+    rf'coefficient of (?:kinetic |static )?friction\s*(?:=|is|of)?\s*|'
+    rf'(?:kinetic |static )?friction coefficient\s*(?:=|is|of)?\s*)(?P<mu_val>{_NUM})'
+    rf'|\bangle\s*(?:of|=|is)?\s*(?P<angle_val>{_NUM})(?:\s*(?:°|degrees?)(?![a-z]))?'
+    rf'|(?P<num>{_NUM})[\s-]*(?P<unit>{_UNIT_ALT})(?![a-zμ\d])'
+    rf'|\b(?P<obj>{_OBJECT_ALT})(?:e?s)?\b(?:\s+(?P<label>[a-d1-4])\b)?'
+    rf'|(?P<frictionless>\bno friction|\bwithout friction|\bfrictionless|\bsmooth\b)'
+    rf'|\b(?P<incline>incline|ramp|slope|angle))'
+)
+
+# A new object starts at "a/an/another/second ... block", or at "block a/b/1/2".
+_NEW_OBJECT_RE = re.compile(r'\b(?:a|an|another|second|first|other|one)\s+(?:[\w.-]+\s+){0,3}$')
+# Between a quantity and the noun it describes: "2 kg block", "2-kg wooden box".
+_ATTACH_RE = re.compile(
+    r'^[\s-]*(?:(?!(?:and|or|to|on|in|at|with|is|are|has|of|a|an|the|by|from|over)\b)[a-z]+\s+){0,2}$'
+)
+
+
+class Quantity(NamedTuple):
+    kind: str
+    value: float
+    unit: str
+    start: int
+    end: int
+    obj: Optional[int]
+
+
+def _scan(text: str) -> Dict[str, Any]:
+    """One extraction from the matches of TOKEN_RE in lowercased `text`."""
+    result = {"quantities": [], "objects": [], "friction": None, "frictionless": False, "is_incline": False}
+    objects = result["objects"]
+    quantities = result["quantities"]
+    last_by_type: Dict[str, int] = {}
+    labels: Dict[tuple, int] = {}
+    last_obj: Optional[int] = None
+    pending: List[tuple] = []
+
+    for m in TOKEN_RE.finditer(text):
+        group = m.lastgroup
+        if group == "obj" or group == "label":
+            word = m.group("obj")
+            obj_type = _OBJECT_TYPES[word]
+            label = m.group("label")
+            if label is not None and (obj_type, label) in labels:
+                index = labels[(obj_type, label)]
+            elif label is None and obj_type in last_by_type and not _NEW_OBJECT_RE.search(text[max(0, m.start() - 40):m.start()]):
+                index = last_by_type[obj_type]
+            else:
+                index = len(objects)
+                objects.append({"type": obj_type, "word": word, "start": m.start()})
+                if label is not None:
+                    labels[(obj_type, label)] = index
+            last_by_type[obj_type] = last_obj = index
+
+            # Quantities written just before the noun ("a 2 kg block") belong to it.
+            for q_index, q_end in pending:
+                if _ATTACH_RE.match(text[q_end:m.start()]):
+                    quantities[q_index] = quantities[q_index]._replace(obj=index)
+            pending = []
+            continue
+
+        if group == "mu_val":
+            value = float(m.group("mu_val"))
+            quantities.append(Quantity("friction", value, "", m.start("mu_val"), m.end("mu_val"), None))
+            if result["friction"] is None:
+                result["friction"] = value
+        elif group == "angle_val":
+            value = float(m.group("angle_val"))
+            quantities.append(Quantity("angle", value, "°", m.start("angle_val"), m.end("angle_val"), None))
+            result["is_incline"] = True
+        elif group == "unit":
+            unit = m.group("unit")
+            kind, factor = UNITS[unit]
+            # "block of mass 2 kg": the last object mentioned, unless the
+            # quantity turns out to precede its own noun.
+            owner = last_obj if kind in OBJECT_KINDS else None
+            if kind in OBJECT_KINDS:
+                pending.append((len(quantities), m.end()))
+            quantities.append(Quantity(kind, round(float(m.group("num")) * factor, 9), unit, m.start("num"), m.end("num"), owner))
+            if kind == "angle":
+                result["is_incline"] = True
+        elif group == "frictionless":
+            result["frictionless"] = True
+        elif group == "incline":
+            result["is_incline"] = True
+
+    for q in quantities:
+        if q.obj is not None:
+            objects[q.obj].setdefault(q.kind, q.value)
+    return result
+
+
+def extract_quantities(problem: str) -> Dict[str, Any]:
+    """
+    Extract every quantity and object from one problem.
+
+    Args:
+        problem (str): Word problem (any case).
+
+    Returns:
+        dict: {
+            "quantities": [Quantity(kind, value, unit, start, end, obj)],
+            "objects": [{"type", "word", "start", "mass"?, "speed"?, "force"?}],
+            "friction": float | None, "frictionless": bool, "is_incline": bool
+        }. `obj` is the index into "objects" a quantity is bound to; spans
+        index the lowercased text.
+    """
+    return _scan(problem.lower())
+
+
+def extract_batch(problems: List[str]) -> List[Dict[str, Any]]:
+    """
+    `extract_quantities` for a whole problem set: one pass of the compiled
+    TOKEN_RE per text, without per-call overhead.
+
+    Returns:
+        list: One extraction per problem, in order.
+    """
+    return [_scan(problem.lower()) for problem in problems]
+
+
+def constraints_from(extraction: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    pre_extract's view of an extraction: the first angle, the first mass and
+    friction coefficient, the first object's type and whether it is an incline.
+    """
+    angle = mass = None
+    for q in extraction["quantities"]:
+        if q.kind == "angle" and angle is None:
+            angle = q.value
+        elif q.kind == "mass" and mass is None:
+            mass = q.value
+
+    friction = extraction["friction"]
+    if friction is None and extraction["frictionless"]:
+        friction = 0.0
+
+    objects = extraction["objects"]
+    return {
+        'angle_deg': angle,
+        "mass_kg": mass,
+        "friction": friction,
+        "object_type": objects[0]["type"] if objects else None,
+        "is_incline": extraction["is_incline"] or angle is not None,
+    }
+
+
+def quantity_spans(extraction: Dict[str, Any]) -> Dict[str, tuple]:
+    """{name: (start, end, value)} of the quantities constraints_from uses."""
+    spans = {}
+    for q in extraction["quantities"]:
+        name = {"angle": "angle_deg", "mass": "mass_kg", "friction": "friction"}.get(q.kind)
+        if name is not None and name not in spans:
+            spans[name] = (q.start, q.end, q.value)
+    return spans
+
+
+__all__ = [
+    "OBJECT_WORDS",
+    "UNITS",
+    "Quantity",
+    "extract_quantities",
+    "extract_batch",
+    "constraints_from",
+    "quantity_spans",
+]
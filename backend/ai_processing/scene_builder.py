@@ -0,0 +1,235 @@
+"""
+Rule-based scene builder (LLM-free fast path)
+- can_build: decide whether pre_extract's constraints fully describe the problem
+- build_parsed_spec / build_scene: assemble ParsedSpec and SceneJSON from constraints
+- incline_to_world / world_to_incline / retilt_incline: incline geometry, shared with scene_templates
+- try_fast_path: all of the above, returning None when the LLM pipeline is needed
+
+Covers single-object incline and flat-plane problems whose only numbers are
+the angle, mass and friction coefficient pre_extract already reads.
+"""
+
+import re
+import math
+import copy
+from typing import Any, Dict, Optional, Tuple
+
+from ai_processing.physics_parserer import find_quantity_spans, pre_extract, OBJECT_WORDS
+from utils.cache import normalize_problem
+from utils.schema import NUMERIC_BOUNDS, DEFAULT_FRICTION, DEFAULT_MASS
+
+# Matches the incline the frontend renders (SceneRenderer.EnvironmentRigid).
+INCLINE_WIDTH = 30.0
+INCLINE_LENGTH = 30.0
+INCLINE_THICKNESS = 0.8
+OBJECT_SIZE = 1.0
+
+PLANE_WORDS = ["plane", "floor", "ground", "surface", "table", "horizontal"]
+
+# Anything that brings in a second body, a connector or a launch needs the LLM.
+UNSUPPORTED_WORDS = [
+    "pulley", "spring", "pendulum", "rope", "string", "cable", "tension",
+    "projectile", "launched", "thrown", "fired", "collide", "collision",
+    "two", "second", "both", "each", "another", "stacked", "attached",
+]
+
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _word_in(word: str, text: str) -> bool:
+    return re.search(rf'\b{re.escape(word)}s?\b', text) is not None
+
+
+def can_build(problem: str, constraints: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    True when the constraints extracted from `problem` are enough to build the
+    whole scene: one known object, an incline with an angle or a flat surface,
+    no unsupported mechanics and no numbers the extractor did not consume.
+    """
+    text = normalize_problem(problem)
+    constraints = constraints or pre_extract(text)
+
+    if constraints.get("object_type") is None:
+        return False
+    if any(_word_in(w, text) for w in UNSUPPORTED_WORDS):
+        return False
+
+    object_words = {w for words in OBJECT_WORDS.values() for w in words if _word_in(w, text)}
+    if len(object_words) > 1:
+        return False
+
+    consumed = [(start, end) for start, end, _ in find_quantity_spans(text).values()]
+    for m in _NUMBER_RE.finditer(text):
+        if not any(start <= m.start() and m.end() <= end for start, end in consumed):
+            return False
+
+    angle = constraints.get("angle_deg")
+    if constraints.get("is_incline"):
+        low, high = NUMERIC_BOUNDS["angle"]
+        if angle is None or not (low < angle < high):
+            return False
+    elif not any(_word_in(w, text) for w in PLANE_WORDS):
+        return False
+
+    friction = constraints.get("friction")
+    if friction is None and "friction" in text:
+        return False
+    if friction is not None:
+        low, high = NUMERIC_BOUNDS["friction"]
+        if not (low <= friction <= high):
+            return False
+
+    mass = constraints.get("mass_kg")
+    if mass is not None:
+        low, high = NUMERIC_BOUNDS["mass"]
+        if not (low <= mass <= high):
+            return False
+
+    return True
+
+
+def build_parsed_spec(problem: str, constraints: Dict[str, Any]) -> Dict[str, Any]:
+    """ParsedSpec equivalent to what ParserAgent returns for the same problem."""
+    obj_type = constraints["object_type"]
+    return {
+        "environment_type": "incline" if constraints.get("is_incline") else "plane",
+        "angle_deg": constraints.get("angle_deg"),
+        "friction": constraints.get("friction"),
+        "objects": [{"type": obj_type, "mass_kg": constraints.get("mass_kg")}],
+        "extra_terms": {},
+        "source_text": problem,
+    }
+
+
+def incline_to_world(local_y: float, local_z: float, angle_deg: float,
+                     length: float = INCLINE_LENGTH, thickness: float = INCLINE_THICKNESS) -> Tuple[float, float]:
+    """
+    World (y, z) of a point given in the incline's own frame (y along the
+    face normal, z along the slope, origin at the box centre). The incline is
+    a box centred so its low edge touches y=0, tilted about x.
+    """
+    theta = math.radians(angle_deg)
+    center_y = (thickness * 0.5) * math.cos(theta) + (length * 0.5) * math.sin(theta)
+    return (
+        center_y + local_y * math.cos(theta) + local_z * math.sin(theta),
+        -local_y * math.sin(theta) + local_z * math.cos(theta),
+    )
+
+
+def world_to_incline(y: float, z: float, angle_deg: float,
+                     length: float = INCLINE_LENGTH, thickness: float = INCLINE_THICKNESS) -> Tuple[float, float]:
+    """Inverse of `incline_to_world`."""
+    theta = math.radians(angle_deg)
+    dy = y - ((thickness * 0.5) * math.cos(theta) + (length * 0.5) * math.sin(theta))
+    return dy * math.cos(theta) - z * math.sin(theta), dy * math.sin(theta) + z * math.cos(theta)
+
+
+def _resting_position(angle_deg: float) -> Dict[str, float]:
+    """Centre of an OBJECT_SIZE body resting at the top of the incline."""
+    # Point on the incline in its local frame: above the top face, one size in from the high edge.
+    y, z = incline_to_world(INCLINE_THICKNESS * 0.5 + OBJECT_SIZE * 0.5, INCLINE_LENGTH * 0.5 - OBJECT_SIZE, angle_deg)
+    return {"x": 0.0, "y": round(y, 4), "z": round(z, 4)}
+
+
+def retilt_incline(scene: Dict[str, Any], old_angle: float, new_angle: float) -> bool:
+    """
+    Move every object of an incline SceneJSON (in place) so it keeps its
+    place relative to the incline when the angle goes from `old_angle` to
+    `new_angle`: a block resting on the ramp stays on the ramp.
+
+    Returns:
+        bool: False if an object has no numeric y/z position to move.
+    """
+    dims = (scene.get("environment") or {}).get("dimensions") or {}
+    length = dims.get("depth", INCLINE_LENGTH)
+    thickness = dims.get("height", INCLINE_THICKNESS)
+    if not all(isinstance(v, (int, float)) for v in (length, thickness, old_angle, new_angle)):
+        return False
+
+    for obj in scene.get("objects") or []:
+        position = obj.get("position") if isinstance(obj, dict) else None
+        if not isinstance(position, dict) or not all(
+            isinstance(position.get(axis), (int, float)) for axis in ("y", "z")
+        ):
+            return False
+        local = world_to_incline(position["y"], position["z"], old_angle, length, thickness)
+        y, z = incline_to_world(*local, new_angle, length, thickness)
+        position["y"], position["z"] = round(y, 4), round(z, 4)
+    return True
+
+
+def build_scene(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    SceneJSON for a single-object incline/plane ParsedSpec, filled the way
+    SceneAgent's template describes (defaults: friction 0.3, mass 1).
+    """
+    is_incline = parsed["environment_type"] == "incline"
+    angle = float(parsed["angle_deg"]) if is_incline else 0.0
+    friction = parsed["friction"] if parsed["friction"] is not None else DEFAULT_FRICTION
+
+    objects = []
+    for obj in parsed["objects"]:
+        size = ({"radius": OBJECT_SIZE * 0.5} if obj["type"] == "sphere"
+                else {"width": OBJECT_SIZE, "height": OBJECT_SIZE, "depth": OBJECT_SIZE})
+        position = _resting_position(angle) if is_incline else {"x": 0.0, "y": OBJECT_SIZE * 0.5, "z": 0.0}
+        objects.append({
+            "type": obj["type"],
+            "mass": obj["mass_kg"] if obj.get("mass_kg") is not None else DEFAULT_MASS,
+            "size": size,
+            "position": position,
+            "material": {"color": "#E2562C", "friction": friction, "restitution": 0.3},
+        })
+
+    return {
+        "scene": {
+            "gravity": {"x": 0, "y": -9.81, "z": 0},
+            "camera": {
+                "position": {"x": 5, "y": 5, "z": 10},
+                "lookAt": {"x": 0, "y": 0, "z": 0},
+            },
+            "lighting": [
+                {"type": "ambient", "intensity": 0.5},
+                {"type": "directional", "direction": {"x": 0.5, "y": -1, "z": 0.5}, "intensity": 0.8},
+            ],
+        },
+        "environment": {
+            "type": parsed["environment_type"],
+            "angle": angle,
+            "dimensions": {"width": INCLINE_WIDTH, "depth": INCLINE_LENGTH, "height": INCLINE_THICKNESS},
+            "material": {"friction": friction, "restitution": 0.2},
+        },
+        "objects": objects,
+        "simulation": {
+            "timestep": 0.016,
+            "duration": 5.0,
+            "solver": "Cannon",
+        },
+    }
+
+
+def try_fast_path(problem: str) -> Optional[Dict[str, Any]]:
+    """
+    Build parsed/scene/validated without any model call.
+
+    Returns:
+        dict | None: {"parsed", "scene", "validated"}, or None if the problem
+        is outside what the rules cover.
+    """
+    constraints = pre_extract(normalize_problem(problem))
+    if not can_build(problem, constraints):
+        return None
+
+    parsed = build_parsed_spec(problem, constraints)
+    scene = build_scene(parsed)
+    return {"parsed": parsed, "scene": scene, "validated": copy.deepcopy(scene)}
+
+
+__all__ = [
+    "can_build",
+    "build_parsed_spec",
+    "build_scene",
+    "incline_to_world",
+    "world_to_incline",
+    "retilt_incline",
+    "try_fast_path",
+]
@@ -0,0 +1,193 @@
+"""
+Parameter-templated scenes
+- problem_shape: problem text with the angle/mass/friction numbers abstracted out
+- template_matches: whether a stored result agrees with the constraints it came from
+- fill_template: re-fill a stored parsed/scene/validated triple with new numbers
+- library_query: scene-store lookup parameters for a problem
+
+Two problems with the same shape differ only in the quantities pre_extract
+reads, so a scene generated for one can be reused for the other.
+"""
+
+import re
+import copy
+import hashlib
+from typing import Any, Dict, Optional
+
+from ai_processing.physics_parserer import find_quantity_spans, pre_extract
+from ai_processing.quantities import extract_quantities, constraints_from
+from ai_processing.scene_builder import UNSUPPORTED_WORDS, retilt_incline
+from utils.cache import normalize_problem
+
+TEMPLATE_FIELDS = ("angle_deg", "mass_kg", "friction")
+# Quantity kinds (ai_processing.quantities) behind the templated fields.
+TEMPLATE_KINDS = ("angle", "mass", "friction")
+
+
+def problem_shape(problem: str) -> Optional[str]:
+    """
+    Normalized problem text with its templated quantities replaced by
+    placeholders, e.g. "a <mass_kg>kg box on a <angle_deg>° incline".
+
+    Returns:
+        str | None: The shape, or None if the text has no templated quantity.
+    """
+    text = normalize_problem(problem)
+    spans = find_quantity_spans(text)
+    if not spans:
+        return None
+
+    for name, (start, end, _) in sorted(spans.items(), key=lambda item: item[1][0], reverse=True):
+        text = f"{text[:start]}<{name}>{text[end:]}"
+    return text
+
+
+def shape_key(problem: str) -> Optional[str]:
+    """sha256 of `problem_shape`, or None if the problem has no shape."""
+    shape = problem_shape(problem)
+    if shape is None:
+        return None
+    return hashlib.sha256(shape.encode("utf-8")).hexdigest()
+
+
+def template_constraints(problem: str) -> Dict[str, Any]:
+    """pre_extract on the normalized text, the same text the shape is built from."""
+    return pre_extract(normalize_problem(problem))
+
+
+def _same(a, b) -> bool:
+    return isinstance(a, (int, float)) and isinstance(b, (int, float)) and float(a) == float(b)
+
+
+def _slots(triple: Dict[str, Any]):
+    """Yield (container, key, field) for every place a templated quantity lives."""
+    parsed = triple.get("parsed") or {}
+    yield parsed, "angle_deg", "angle_deg"
+    yield parsed, "friction", "friction"
+    for obj in parsed.get("objects") or []:
+        yield obj, "mass_kg", "mass_kg"
+
+    for section in ("scene", "validated"):
+        scene = triple.get(section) or {}
+        env = scene.get("environment") or {}
+        yield env, "angle", "angle_deg"
+        yield env.get("material") or {}, "friction", "friction"
+        for obj in scene.get("objects") or []:
+            yield obj, "mass", "mass_kg"
+            yield obj.get("material") or {}, "friction", "friction"
+
+
+def template_matches(triple: Dict[str, Any], constraints: Dict[str, Any]) -> bool:
+    """
+    Check that the validated scene actually carries the extracted numbers,
+    so that re-filling those slots later is meaningful.
+    """
+    validated = triple.get("validated") or {}
+    env = validated.get("environment") or {}
+    objects = validated.get("objects") or []
+
+    if constraints.get("angle_deg") is not None and not _same(env.get("angle"), constraints["angle_deg"]):
+        return False
+    if constraints.get("mass_kg") is not None and not any(_same(o.get("mass"), constraints["mass_kg"]) for o in objects):
+        return False
+    if constraints.get("friction") is not None:
+        if not _same((env.get("material") or {}).get("friction"), constraints["friction"]):
+            return False
+    return True
+
+
+def fill_template(triple: Dict[str, Any], old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Re-fill a stored triple generated under `old` constraints with `new` ones.
+    Only slots holding exactly the old value are rewritten. When the angle
+    changes, objects on an incline are moved with it (retilt_incline), so
+    they stay on the ramp.
+
+    Returns:
+        dict | None: The filled copy, or None if the two constraint sets
+        do not describe the same quantities, or the angle changes in a scene
+        whose geometry cannot be re-derived (not an incline, or objects
+        without positions).
+    """
+    for field in TEMPLATE_FIELDS:
+        if (old.get(field) is None) != (new.get(field) is None):
+            return None
+
+    # Per section: sections sharing one dict (scene is validated) must not be re-tilted twice.
+    filled = {section: copy.deepcopy(value) for section, value in triple.items()}
+    for container, key, field in _slots(filled):
+        if old.get(field) is not None and _same(container.get(key), old[field]):
+            container[key] = new[field]
+
+    old_angle, new_angle = old.get("angle_deg"), new.get("angle_deg")
+    if old_angle is not None and not _same(old_angle, new_angle):
+        for section in ("scene", "validated"):
+            scene = filled.get(section)
+            if not isinstance(scene, dict):
+                continue
+            if (scene.get("environment") or {}).get("type") != "incline" or not retilt_incline(scene, old_angle, new_angle):
+                return None
+    return filled
+
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# Connectors a stored pulley scene already has; any other unsupported word
+# (springs, launches, extra bodies) means the stored scenes do not fit.
+PULLEY_WORDS = ("pulley", "rope", "string", "cable", "tension", "attached")
+
+
+def library_query(problem: str) -> Optional[Dict[str, Any]]:
+    """
+    What to look a problem up by in the scene store: environment type, object
+    types and the templated constraints.
+
+    Returns:
+        dict | None: {"environment_type", "object_types", "masses",
+        "constraints"} (masses per object, None where unstated), or
+        None when the problem states something a re-filled scene would not
+        carry: any number besides one angle, one mass and one friction, or
+        mechanics beyond an incline, a plane or a pulley.
+    """
+    text = normalize_problem(problem)
+    extraction = extract_quantities(text)
+    if not extraction["objects"]:
+        return None
+
+    kinds = [q.kind for q in extraction["quantities"]]
+    if any(k not in TEMPLATE_KINDS for k in kinds) or any(kinds.count(k) > 1 for k in TEMPLATE_KINDS):
+        return None
+    spans = [(q.start, q.end) for q in extraction["quantities"]]
+    for m in _NUMBER_RE.finditer(text):
+        if not any(start <= m.start() and m.end() <= end for start, end in spans):
+            return None
+
+    present = {w for w in UNSUPPORTED_WORDS if re.search(rf"\b{w}s?\b", text)}
+    is_pulley = "pulley" in present
+    if present.difference(PULLEY_WORDS if is_pulley else ()):
+        return None
+
+    constraints = constraints_from(extraction)
+    masses = [o.get("mass") for o in extraction["objects"]]
+    if masses == [None] and constraints["mass_kg"] is not None:
+        masses = [constraints["mass_kg"]]  # "5 kg on a ramp ... the block": one object, one mass
+    if is_pulley:
+        environment_type = "pulley"
+    else:
+        environment_type = "incline" if constraints["is_incline"] else "plane"
+    return {
+        "environment_type": environment_type,
+        "object_types": [o["type"] for o in extraction["objects"]],
+        "masses": masses,
+        "constraints": constraints,
+    }
+
+
+__all__ = [
+    "problem_shape",
+    "shape_key",
+    "template_constraints",
+    "template_matches",
+    "fill_template",
+    "library_query",
+]
@@ -0,0 +1,86 @@
+"""
+Throughput of /simulate's pipeline under concurrent clients.
+
+The three agent calls are replaced with sleeps that mimic Gemini latency,
+so the numbers show how well one event loop overlaps in-flight simulations:
+- blocking: the old behaviour, run_a2a_simulation called from async code
+- async:    run_a2a_simulation_async on the bounded agent executor
+
+Run from backend/:
+    python -m benchmarks.concurrency --latency 0.5 --clients 1 4 16 64
+"""
+
+import os
+import io
+import time
+import asyncio
+import argparse
+import contextlib
+
+# Measure the pipeline itself, not the result cache or the rule-based fast path.
+os.environ["A2A_CACHE_SIZE"] = "0"
+os.environ["A2A_FAST_PATH"] = "0"
+
+from agents import a2a_manager
+from utils.concurrency import set_max_workers
+from utils.logger import set_level
+
+PROBLEM = "A 2 kg block on a 30° incline is connected over a pulley to a hanging 3 kg block (client {n})."
+
+
+def _install_fake_agents(latency: float) -> None:
+    def parse_problem(text):
+        time.sleep(latency)
+        return {"environment_type": "incline", "angle_deg": 30, "friction": 0.2,
+                "objects": [{"type": "box", "mass_kg": 5}], "extra_terms": {}, "source_text": text}
+
+    def generate_scene(parsed):
+        time.sleep(latency)
+        return {"scene": {}, "environment": {"type": "incline"}, "objects": [{}], "simulation": {}}
+
+    def validate_and_refine(scene, parsed, problem_text):
+        time.sleep(latency)
+        return scene
+
+    a2a_manager.parse_problem = parse_problem
+    a2a_manager.generate_scene = generate_scene
+    a2a_manager.validate_and_refine = validate_and_refine
+
+
+async def _blocking_client(n: int):
+    return a2a_manager.run_a2a_simulation(PROBLEM.format(n=n))
+
+
+async def _async_client(n: int):
+    # Distinct text per client so requests are not coalesced.
+    return await a2a_manager.run_a2a_simulation_async(PROBLEM.format(n=n))
+
+
+async def _measure(client, n_clients: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(n_clients)))
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--latency", type=float, default=0.5, help="simulated seconds per agent call")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--workers", type=int, default=None, help="override A2A_MAX_WORKERS")
+    args = ap.parse_args()
+    set_level("error")
+
+    _install_fake_agents(args.latency)
+    if args.workers:
+        set_max_workers(args.workers)
+
+    print(f"{'clients':>8} {'mode':>9} {'wall (s)':>10} {'req/s':>8}")
+    for n in args.clients:
+        for mode, client in (("blocking", _blocking_client), ("async", _async_client)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = asyncio.run(_measure(client, n))
+            print(f"{n:>8} {mode:>9} {elapsed:>10.2f} {n / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of the quantity extractor behind pre_extract.
+
+Builds --count distinct problems from the corpus (each copy with its numbers
+shifted, so nothing is repeated) and times pre_extract one problem at a time
+against pre_extract_batch over the whole list, then prints the corpus problems
+that have more than one object with its own mass.
+
+Run from backend/:
+    python -m benchmarks.extraction --count 20000
+"""
+
+import re
+import time
+import argparse
+
+from ai_processing.physics_parserer import pre_extract, pre_extract_batch
+from ai_processing.quantities import extract_batch
+from benchmarks.fast_path_coverage import DEFAULT_CORPUS, load_corpus
+
+
+_NUMBER_RE = re.compile(r'\d+')
+
+
+def _variant(problem: str, n: int) -> str:
+    """`problem` with every integer shifted by n, so copies are distinct texts."""
+    return _NUMBER_RE.sub(lambda m: str(int(m.group()) + n), problem)
+
+
+def _rate(count: int, elapsed: float) -> str:
+    return f"{count / elapsed:>12,.0f} problems/s  ({elapsed * 1e6 / count:.1f} µs each)"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--count", type=int, default=20000)
+    args = ap.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    problems = [_variant(corpus[i % len(corpus)], i // len(corpus)) for i in range(args.count)]
+
+    start = time.perf_counter()
+    single = [pre_extract(p) for p in problems]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = pre_extract_batch(problems)
+    batch_s = time.perf_counter() - start
+
+    assert single == batch, "batch and per-problem extraction disagree"
+    print(f"pre_extract        {_rate(len(problems), single_s)}")
+    print(f"pre_extract_batch  {_rate(len(problems), batch_s)}")
+
+    multi = [
+        (p, [o.get("mass") for o in e["objects"]])
+        for p, e in zip(corpus, extract_batch(corpus))
+        if sum(1 for o in e["objects"] if "mass" in o) > 1
+    ]
+    print(f"multi-object problems with per-object masses: {len(multi)}/{len(corpus)}")
+    for problem, masses in multi:
+        print(f"  {masses}  {problem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+How much of a problem corpus the rule-based scene builder answers on its own.
+
+For each problem prints whether it was covered and the build time, then the
+overall coverage fraction. Problems it rejects go to the Gemini pipeline.
+
+Run from backend/:
+    python -m benchmarks.fast_path_coverage [--corpus benchmarks/corpus.txt] [-v]
+"""
+
+import os
+import time
+import argparse
+
+from ai_processing.scene_builder import try_fast_path
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def load_corpus(path: str = DEFAULT_CORPUS):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("-v", "--verbose", action="store_true", help="print every problem")
+    args = ap.parse_args()
+
+    problems = load_corpus(args.corpus)
+    covered = 0
+    timings = []
+
+    for problem in problems:
+        start = time.perf_counter()
+        built = try_fast_path(problem)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings.append(elapsed_ms)
+
+        if built is not None:
+            covered += 1
+        if args.verbose:
+            status = "fast" if built is not None else "llm "
+            print(f"[{status}] {elapsed_ms:7.3f} ms  {problem}")
+
+    timings.sort()
+    print(f"covered: {covered}/{len(problems)} ({covered / len(problems):.0%})")
+    print(f"build time: median {timings[len(timings) // 2]:.3f} ms, max {timings[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Size and serialization time of /simulate responses, JSON vs the packed layout.
+
+Builds the response body for a typical single-object incline problem and for
+scenes with --objects bodies sliding on a plane (trajectories included, as
+/simulate returns them), then reports bytes (raw and gzipped) and the median
+encode/decode time of each encoding.
+
+Run from backend/:
+    python -m benchmarks.payload_size --objects 10 50 --repeat 50
+"""
+
+import copy
+import gzip
+import json
+import time
+import argparse
+import statistics
+
+from ai_processing.scene_builder import try_fast_path
+from physics.trajectory import simulate_trajectory
+from utils.encoding import encode_packed, decode_packed
+
+TYPICAL_PROBLEM = "A 5 kg box slides down a 30° incline with coefficient of friction 0.2"
+PLANE_PROBLEM = "A 2 kg block slides on a horizontal surface with coefficient of friction 0.3"
+
+
+def response_body(built: dict) -> dict:
+    """What /simulate returns for a pipeline result."""
+    return {
+        "status": "success",
+        "message": "Simulation generated successfully",
+        "problem": built["parsed"].get("problem", ""),
+        **built,
+        "trajectory": simulate_trajectory(built["validated"]),
+    }
+
+
+def many_objects(built: dict, count: int) -> dict:
+    """`built` with its first object repeated `count` times, spread out and moving."""
+    built = copy.deepcopy(built)
+    template = built["scene"]["objects"][0]
+    objects = []
+    for i in range(count):
+        obj = copy.deepcopy(template)
+        obj["position"] = {**obj["position"], "x": (i % 10) * 1.5 - 7.0, "z": (i // 10) * 1.5 - 7.0}
+        obj["velocity"] = {"x": 1.0 + (i % 7) * 0.5, "y": 0.0, "z": 0.0}
+        objects.append(obj)
+    built["scene"]["objects"] = objects
+    built["validated"] = copy.deepcopy(built["scene"])
+    return built
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def measure(name: str, body: dict, repeat: int) -> dict:
+    as_json = json.dumps(body).encode("utf-8")
+    packed = encode_packed(body)
+    return {
+        "name": name,
+        "json_bytes": len(as_json),
+        "json_gzip_bytes": len(gzip.compress(as_json)),
+        "packed_bytes": len(packed),
+        "packed_gzip_bytes": len(gzip.compress(packed)),
+        "json_encode_ms": _median_ms(lambda: json.dumps(body).encode("utf-8"), repeat),
+        "packed_encode_ms": _median_ms(lambda: encode_packed(body), repeat),
+        "json_decode_ms": _median_ms(lambda: json.loads(as_json), repeat),
+        "packed_decode_ms": _median_ms(lambda: decode_packed(packed), repeat),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--objects", type=int, nargs="+", default=[10, 50])
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    rows = [measure("typical (incline, 1 object)", response_body(try_fast_path(TYPICAL_PROBLEM)), args.repeat)]
+    plane = try_fast_path(PLANE_PROBLEM)
+    for count in args.objects:
+        rows.append(measure(f"plane, {count} objects", response_body(many_objects(plane, count)), args.repeat))
+
+    print(f"{'payload':<30}{'json':>10}{'json.gz':>10}{'packed':>10}{'packed.gz':>11}"
+          f"{'enc json':>10}{'enc pack':>10}{'dec json':>10}{'dec pack':>10}")
+    for r in rows:
+        print(f"{r['name']:<30}{r['json_bytes']:>10,}{r['json_gzip_bytes']:>10,}{r['packed_bytes']:>10,}"
+              f"{r['packed_gzip_bytes']:>11,}{r['json_encode_ms']:>8.2f}ms{r['packed_encode_ms']:>8.2f}ms"
+              f"{r['json_decode_ms']:>8.2f}ms{r['packed_decode_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
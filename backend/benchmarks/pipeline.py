@@ -0,0 +1,251 @@
+"""
+End-to-end benchmark for the agent pipelines, fully offline.
+
+Pushes the problem corpus through run_a2a_simulation (agent and fused modes),
+run_autonomous_simulation and extract_simulation_data with model calls served by StubBackend (or a
+ReplayBackend recording via --recording) and reports:
+- p50/p95/p99 latency per agent stage and per path
+- requests/sec of run_a2a_simulation_async at several concurrency levels
+- tracemalloc peak memory and net allocated blocks per request
+
+Results are written as JSON so runs can be diffed between versions.
+
+Run from backend/:
+    python -m benchmarks.pipeline --latency 0.05 --output bench_results.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import functools
+import contextlib
+import subprocess
+import tracemalloc
+
+# Measure the pipelines themselves: no result cache, no rule-based fast path.
+os.environ["A2A_CACHE_SIZE"] = "0"
+os.environ["A2A_FAST_PATH"] = "0"
+
+from agents import a2a_manager, manager
+from ai_processing import physics_parserer
+from benchmarks.fast_path_coverage import DEFAULT_CORPUS, load_corpus
+from benchmarks.stub_backend import StubBackend
+from utils.llm_backend import ReplayBackend, set_backend, get_backend
+from utils.logger import set_level
+
+STAGE_FUNCTIONS = {
+    "parser": "parse_problem",
+    "scene": "generate_scene",
+    "validator": "validate_and_refine",
+    "fused": "parse_and_build",
+}
+
+
+def percentile(values, p: float) -> float:
+    """Linear-interpolated percentile of `values` (p in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples_ms) -> dict:
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+class StageTimer:
+    """Wraps the agent functions each orchestrator calls and records their latency."""
+
+    def __init__(self):
+        self.samples = {}
+        self.path = None
+        self._originals = []
+
+    def record(self, name: str, elapsed_s: float) -> None:
+        key = f"{self.path}.{name}" if self.path else name
+        self.samples.setdefault(key, []).append(elapsed_s * 1000)
+
+    def _wrap(self, stage: str, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def install(self):
+        for module in (a2a_manager, manager):
+            for stage, attr in STAGE_FUNCTIONS.items():
+                if not hasattr(module, attr):
+                    continue
+                original = getattr(module, attr)
+                self._originals.append((module, attr, original))
+                setattr(module, attr, self._wrap(stage, original))
+
+        backend = get_backend()
+        original_generate = backend.generate
+        self._originals.append((backend, "generate", original_generate))
+        backend.generate = self._wrap("llm_call", original_generate)
+
+    def uninstall(self):
+        for target, attr, original in reversed(self._originals):
+            setattr(target, attr, original)
+        self._originals.clear()
+
+
+def run_fused(problem: str) -> dict:
+    """run_a2a_simulation in single-call fused mode."""
+    mode, a2a_manager.PIPELINE_MODE = a2a_manager.PIPELINE_MODE, "fused"
+    try:
+        return a2a_manager.run_a2a_simulation(problem)
+    finally:
+        a2a_manager.PIPELINE_MODE = mode
+
+
+PATHS = {
+    "a2a": a2a_manager.run_a2a_simulation,
+    "fused": run_fused,
+    "autonomous": manager.run_autonomous_simulation,
+    "extract": physics_parserer.extract_simulation_data,
+}
+
+
+def bench_paths(problems, repeat: int, timer: StageTimer) -> dict:
+    path_samples = {}
+    for name, func in PATHS.items():
+        timer.path = name
+        for _ in range(repeat):
+            for problem in problems:
+                start = time.perf_counter()
+                func(problem)
+                path_samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+    timer.path = None
+    return {name: summarize(samples) for name, samples in path_samples.items()}
+
+
+def bench_concurrency(problems, levels) -> dict:
+    results = {}
+    for level in levels:
+        batch = [f"{problems[i % len(problems)]} (request {i})" for i in range(level * 4)]
+
+        async def run():
+            limit = asyncio.Semaphore(level)
+
+            async def client(problem):
+                async with limit:
+                    await a2a_manager.run_a2a_simulation_async(problem)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client(p) for p in batch))
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run())
+        results[str(level)] = {
+            "requests": len(batch),
+            "wall_s": round(elapsed, 4),
+            "requests_per_s": round(len(batch) / elapsed, 3),
+        }
+    return results
+
+
+def bench_allocations(problems) -> dict:
+    results = {}
+    for name, func in PATHS.items():
+        tracemalloc.start()
+        blocks_before = sys.getallocatedblocks()
+        for problem in problems:
+            func(problem)
+        blocks_after = sys.getallocatedblocks()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            "peak_kib": round(peak / 1024, 1),
+            "net_blocks_per_request": round((blocks_after - blocks_before) / len(problems), 1),
+        }
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--recording", help="JSONL file from RecordingBackend to replay instead of the stub")
+    ap.add_argument("--latency", type=float, default=0.0, help="simulated seconds per model call")
+    ap.add_argument("--jitter", type=float, default=0.0, help="max extra random seconds per model call")
+    ap.add_argument("--repeat", type=int, default=3, help="passes over the corpus per path")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--output", default="bench_results.json")
+    args = ap.parse_args()
+    set_level("error")
+
+    problems = load_corpus(args.corpus)
+    if args.recording:
+        set_backend(ReplayBackend(args.recording, latency=args.latency, jitter=args.jitter, seed=0))
+    else:
+        set_backend(StubBackend(latency=args.latency, jitter=args.jitter))
+    manager.REFINEMENT_DELAY = 0
+
+    timer = StageTimer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer.install()
+        try:
+            paths = bench_paths(problems, args.repeat, timer)
+        finally:
+            timer.uninstall()
+        concurrency = bench_concurrency(problems, args.concurrency)
+        allocations = bench_allocations(problems)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "backend": get_backend().name,
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "corpus_size": len(problems),
+            "repeat": args.repeat,
+        },
+        "stages": {name: summarize(samples) for name, samples in sorted(timer.samples.items())},
+        "paths": paths,
+        "concurrency": concurrency,
+        "allocations": allocations,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for section in ("stages", "paths"):
+        print(f"{section}:")
+        for name, s in results[section].items():
+            print(f"  {name:<22} n={s['count']:<5} p50={s['p50_ms']:>9.3f} ms  p95={s['p95_ms']:>9.3f} ms  p99={s['p99_ms']:>9.3f} ms")
+    print("concurrency:")
+    for level, c in concurrency.items():
+        print(f"  {level:>4} clients  {c['requests_per_s']:>9.2f} req/s")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Model-call resilience (utils/resilience.py) against a faulty StubBackend.
+
+Three scenarios, each run without a policy and with one:
+- tail:    a share of calls is much slower; hedging bounds p99
+- faults:  a share of calls fails transiently; retries turn them into answers
+- outage:  every call fails; the circuit breaker stops calling the backend
+
+Run from backend/:
+    python -m benchmarks.resilience --calls 1000 --latency 0.02
+"""
+
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_backend import StubBackend
+from utils.llm_backend import call_model, set_backend
+from utils.logger import set_level
+from utils.prompt_templates import PARSER_PROMPT
+from utils.resilience import CircuitBreaker, ResiliencePolicy, set_policy
+
+PROMPT = PARSER_PROMPT.render(problem="A 5 kg box slides down a 30° incline with friction coefficient 0.2.")
+
+
+class _NoPolicy(ResiliencePolicy):
+    """Plain single attempt, to compare against."""
+
+    def call(self, agent, fn, idempotent=True):
+        return fn()
+
+
+def _run(backend: StubBackend, policy: ResiliencePolicy, calls: int, clients: int) -> dict:
+    set_backend(backend)
+    set_policy(policy)
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            call_model(PROMPT, "ParserAgent")
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one, range(calls)))
+
+    latencies = sorted(r[0] for r in results)
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "failed": sum(1 for r in results if not r[1]),
+        "backend_calls": backend.calls,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=1000)
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.02)
+    args = ap.parse_args()
+    set_level("error")
+
+    lat = args.latency
+    scenarios = {
+        "tail": dict(latency=lat, tail_rate=0.05, tail_latency=lat * 25),
+        "faults": dict(latency=lat, error_rate=0.2),
+        "outage": dict(latency=lat, error_rate=1.0),
+    }
+
+    def policy():
+        return ResiliencePolicy(
+            retries=2, base_delay=lat, max_delay=lat * 8, hedge_percentile=0.9, hedge_min_delay=lat * 1.5,
+            breaker=CircuitBreaker(threshold=5, cooldown=60.0), seed=0,
+        )
+
+    print(f"{args.calls} calls, {args.clients} clients, base latency {lat * 1000:.0f} ms")
+    for name, faults in scenarios.items():
+        for label, make in (("none", lambda: _NoPolicy(breaker=CircuitBreaker())), ("policy", policy)):
+            r = _run(StubBackend(seed=1, **faults), make(), args.calls, args.clients)
+            print(f"  {name:<7} {label:<7} p50={r['p50'] * 1000:8.1f} ms  p99={r['p99'] * 1000:8.1f} ms  "
+                  f"failed={r['failed']:4d}  backend calls={r['backend_calls']}")
+
+    set_policy(None)
+    set_backend(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold-start cost of the API worker.
+
+Each sample imports a module in a fresh interpreter (as an autoscaled worker
+would) and reports the median wall time, plus whether the Gemini SDK ended
+up in sys.modules. For comparison it also times importing the SDK alone,
+which main.py used to pay on every start.
+
+Run from backend/:
+    python -m benchmarks.startup_time --runs 10
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+SDK_MODULE = "google.generativeai"
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "sdk_loaded": "{sdk}" in sys.modules}}))
+"""
+
+
+def time_import(module: str, runs: int) -> dict:
+    """Median import time of `module` over `runs` fresh interpreters."""
+    samples = []
+    sdk_loaded = False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, sdk=SDK_MODULE)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return {"module": module, "error": out.stderr.strip().splitlines()[-1:]}
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"] * 1000)
+        sdk_loaded = result["sdk_loaded"]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "sdk_loaded": sdk_loaded,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--modules", nargs="+", default=["main", "agents.a2a_manager", SDK_MODULE])
+    args = ap.parse_args()
+
+    for module in args.modules:
+        r = time_import(module, args.runs)
+        if "error" in r:
+            print(f"{module:<30} failed: {' '.join(r['error'])}")
+            continue
+        print(f"{module:<30} median={r['median_ms']:>8.2f} ms  min={r['min_ms']:>8.2f} ms  gemini sdk loaded: {r['sdk_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
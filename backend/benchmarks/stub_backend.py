@@ -0,0 +1,113 @@
+"""
+Deterministic offline stand-in for Gemini used by the benchmarks.
+
+Recognises which agent sent a prompt and answers with well-formed JSON built
+from pre_extract and the rule-based scene builder, after a configurable
+simulated latency. Faults (TransientModelError) and slow tail calls can be
+injected at given rates to exercise utils/resilience.py. Use benchmarks with a ReplayBackend file instead when
+real recorded responses are available.
+"""
+
+import re
+import json
+import time
+import random
+from typing import Any, Dict, Optional
+
+from ai_processing.physics_parserer import pre_extract
+from ai_processing.scene_builder import build_scene
+from utils.llm_backend import LLMBackend
+from utils.resilience import TransientModelError
+
+_QUOTED_RE = re.compile(r'"""(.*?)"""', re.S)
+_SECTIONS_RE = re.compile(r"^Sections: (.*)$", re.M)
+
+
+def _parsed_from_text(text: str) -> Dict[str, Any]:
+    c = pre_extract(text)
+    obj_type = c["object_type"] or "box"
+    return {
+        "environment_type": "incline" if c["is_incline"] else "plane",
+        "angle_deg": c["angle_deg"],
+        "friction": c["friction"],
+        "objects": [{"type": obj_type, "mass_kg": c["mass_kg"]}],
+        "extra_terms": {},
+        "source_text": text,
+    }
+
+
+def _scene_from_parsed(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    parsed = dict(parsed)
+    if parsed.get("environment_type") == "incline" and parsed.get("angle_deg") is None:
+        parsed["angle_deg"] = 30
+    parsed["objects"] = [
+        {"type": o.get("type") or "box", "mass_kg": o.get("mass_kg")} for o in parsed.get("objects") or [{}]
+    ]
+    parsed.setdefault("friction", None)
+    return build_scene(parsed)
+
+
+class StubBackend(LLMBackend):
+    """
+    Answers Parser, Scene (full and sections), Validator, FusedAgent and
+    extract_simulation_data prompts.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = 0,
+        error_rate: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 0.0,
+    ):
+        """
+        Args:
+            latency (float): Base simulated latency in seconds.
+            jitter (float): Max extra random latency in seconds.
+            seed (int | None): Seed for jitter and fault injection.
+            error_rate (float): Share of calls that raise TransientModelError.
+            tail_rate (float): Share of calls that take `tail_latency` more seconds.
+            tail_latency (float): Extra latency of a tail call.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.calls = 0
+        self.faults = 0
+        self._rng = random.Random(seed)
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        self.calls += 1
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if self.tail_rate and self._rng.random() < self.tail_rate:
+            delay += self.tail_latency
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.faults += 1
+            raise TransientModelError("injected fault (503 Service Unavailable)")
+
+        quoted = _QUOTED_RE.findall(prompt)
+        if "Physics Problem Parser" in prompt:
+            return json.dumps(_parsed_from_text(quoted[-1]))
+        if "Simulation Scene Generator" in prompt:
+            return json.dumps(_scene_from_parsed(json.loads(quoted[-1])))
+        if "Scene Section Repairer" in prompt:
+            scene = _scene_from_parsed(json.loads(quoted[0]))
+            return json.dumps({k: scene[k] for k in json.loads(_SECTIONS_RE.search(prompt).group(1))})
+        if "Validator and Refiner" in prompt:
+            return quoted[-1]
+        if "Physics Simulation Compiler" in prompt:
+            parsed = _parsed_from_text(quoted[-1])
+            return json.dumps({"parsed": parsed, "scene": _scene_from_parsed(parsed)})
+        # extract_simulation_data: the problem is the last quoted block.
+        return json.dumps(_scene_from_parsed(_parsed_from_text(quoted[-1])))
+
+
+__all__ = ["StubBackend"]
@@ -1,9 +1,26 @@
-from fastapi import FastAPI, HTTPException
+import os
+import re
+import json
+from typing import Optional
+
+from utils.env import load_env
+
+# Before the app modules read their A2A_* / LOG_* settings at import time.
+load_env()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from schemas import ProblemInput
-from ai_processing.physics_parserer import extract_simulation_data
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, Response
+from schemas import ProblemInput, BatchProblemInput, SweepInput
 from utils.logger import log
-from agents.a2a_manager import run_a2a_simulation
+from utils import metrics
+from physics.trajectory import simulate_trajectory
+from physics.sweep import sweep_scene
+from utils.concurrency import run_blocking
+from utils.encoding import negotiate, encode_packed, PACKED_MEDIA_TYPE
+from utils.cache import problem_key
+from utils.http_cache import parse_fields, project, result_etag, etag_matches
+from agents.a2a_manager import run_a2a_simulation_async, stream_a2a_simulation, run_a2a_simulation_batch, get_cached_result, has_cached_result
 
 app = FastAPI(
     title='Visigen API',
@@ -12,12 +29,19 @@ app = FastAPI(
 
 origins = {"http://localhost:5173"}
 
+# Browser/CDN lifetime of GET /simulate/result/{key}; after it, clients revalidate with If-None-Match.
+RESULT_MAX_AGE = int(os.getenv("A2A_RESULT_MAX_AGE", "3600"))
+
+STAGES = ("parsed", "scene", "validated")
+_KEY_RE = re.compile(r"[0-9a-f]{64}")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=['*'],
-    allow_headers=['*']
+    allow_headers=['*'],
+    expose_headers=['Content-Location', 'ETag']
 )
 
 # @app.post('/process_problem')
@@ -26,24 +50,178 @@ app.add_middleware(
 
 #     return {"parameters": result}
 
+def _trajectory(validated):
+    """Precomputed keyframes for the validated scene, or None if it cannot be integrated."""
+    if not isinstance(validated, dict) or "error" in validated:
+        return None
+    try:
+        return simulate_trajectory(validated)
+    except Exception as e:
+        log("SimulationAPI", "Trajectory precomputation failed: %s", "warn", e)
+        return None
+
+async def _respond(request: Request, body: dict, headers: dict = None):
+    """
+    `body` as JSON, or in the packed binary layout (utils/encoding.py) when
+    the client's Accept header prefers it.
+    """
+    headers = {"Vary": "Accept", **(headers or {})}
+    if negotiate(request.headers.get("accept")) == PACKED_MEDIA_TYPE:
+        content = await run_blocking(encode_packed, body)
+        return Response(content, media_type=PACKED_MEDIA_TYPE, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+def _fields(fields: Optional[str]):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _result_body(result: dict, key: str, message: str, wanted) -> dict:
+    """
+    Response for a pipeline result, projected to `wanted`; the trajectory is
+    only computed if asked for, on the agent executor (it is CPU-bound).
+    """
+    body = {'status': 'success', 'message': message, 'key': key, **result}
+    if wanted is None or 'trajectory' in wanted:
+        body['trajectory'] = await run_blocking(_trajectory, result.get('validated'))
+    return project(body, wanted)
+
 @app.post('/simulate')
-async def simulate_physics_problem(req: ProblemInput):
+async def simulate_physics_problem(req: ProblemInput, request: Request, fields: Optional[str] = None):
+    """
+    Receives a physics word problem and returns a generated 3D simulation JSON,
+    plus per-object keyframes (`trajectory`) the client can play back.
+    `?fields=validated,trajectory` returns only those fields. Successful
+    results are also served, cacheably, from the Content-Location
+    /simulate/result/{key}.
+    Send `Accept: application/vnd.visigen.packed` for the compact binary layout.
+    """
+    log("SimulationAPI", "Received simulation request: %s", "info", req.problem)
+    wanted = _fields(fields)
+
+    try:
+        result = await run_a2a_simulation_async(req.problem)
+    except Exception as e:
+        log("SimulationAPI", "Error running simulation: %s", "error", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    key = problem_key(req.problem)
+    headers = {}
+    # Only point at the stored copy if there is one: degraded results are not
+    # stored, and with the cache disabled nothing is.
+    if has_cached_result(key):
+        headers["Content-Location"] = f"/simulate/result/{key}"
+    return await _respond(request, await _result_body(result, key, 'Simulation generated successfully', wanted), headers)
+
+@app.get('/simulate/result/{key}')
+async def get_simulation_result(key: str, request: Request, fields: Optional[str] = None):
+    """
+    A stored simulation by key (returned by POST /simulate), with `fields`
+    projection. Responses carry an ETag and Cache-Control, so a reload is a
+    conditional GET answered with 304 Not Modified.
+    """
+    wanted = _fields(fields)
+    result = get_cached_result(key) if _KEY_RE.fullmatch(key) else None
+    if result is None:
+        raise HTTPException(status_code=404, detail="No stored result for this key; POST /simulate to compute it")
+
+    media_type = negotiate(request.headers.get("accept"))
+    headers = {
+        "ETag": result_etag(key, {s: result[s] for s in STAGES}, wanted, media_type),
+        "Cache-Control": f"public, max-age={RESULT_MAX_AGE}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers={"Vary": "Accept", **headers})
+    return await _respond(request, await _result_body(result, key, 'Simulation loaded', wanted), headers)
+
+def _sse(event: str, data) -> str:
+    """Frame one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post('/simulate/stream')
+async def simulate_physics_problem_stream(req: ProblemInput):
     """
-    Receives a physics word problem and returns a generated 3D simulation JSON.
+    Same pipeline as /simulate, streamed as server-sent events:
+    `parsed`, `scene` and `validated` as each agent finishes, `trajectory`,
+    then `done`.
     """
-    log("SimulationAPI", f"Received simulation request: {req.problem}", "info")
+    log("SimulationAPI", "Received streaming simulation request: %s", "info", req.problem)
+
+    async def events():
+        yield _sse("problem", {"problem": req.problem})
+        try:
+            validated = None
+            async for event in stream_a2a_simulation(req.problem):
+                payload = {"agent": event["agent"], "data": event["data"]}
+                if event.get("degraded"):
+                    payload["degraded"] = True
+                yield _sse(event["event"], payload)
+                if event["event"] == "validated":
+                    validated = event["data"]
+            yield _sse("trajectory", {"data": await run_blocking(_trajectory, validated)})
+            yield _sse("done", {"status": "success", "message": "Simulation generated successfully"})
+        except Exception as e:
+            log("SimulationAPI", "Error streaming simulation: %s", "error", e)
+            yield _sse("error", {"status": "error", "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post('/simulate/batch')
+async def simulate_problem_batch(req: BatchProblemInput, request: Request):
+    """
+    Simulates a whole problem set. Duplicates are computed once and each item
+    carries its own status, so one bad problem does not fail the batch.
+    """
+    log("SimulationAPI", "Received batch simulation request: %s problems", "info", len(req.problems))
 
     try:
-        result = run_a2a_simulation(req.problem)
-        return {
-            'status':'success',
-            'message':'Simulation generated successfully',
-            **result
-        }
+        results = await run_a2a_simulation_batch(req.problems, req.max_concurrency)
     except Exception as e:
-        log("SimulationAPI", f"Error running simulation: {e}", "error")
+        log("SimulationAPI", "Error running batch simulation: %s", "error", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    failed = sum(1 for item in results if item['status'] == 'error')
+    return await _respond(request, {
+        'status': 'success' if failed == 0 else 'partial',
+        'message': f'{len(results) - failed} of {len(results)} simulations generated successfully',
+        'results': results
+    })
+
+@app.post('/simulate/sweep')
+async def sweep_simulation(req: SweepInput, request: Request):
+    """
+    "What if" exploration: outcomes of one validated scene across ranges of
+    angle, friction and mass, computed in one NumPy evaluation (no agents).
+    """
+    axes = {name: getattr(req, name).model_dump() if getattr(req, name) else None for name in ("angle", "friction", "mass")}
+    log("SimulationAPI", "Received sweep request: %s", "info", axes)
+
+    try:
+        result = await run_blocking(sweep_scene, req.scene, **axes)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        log("SimulationAPI", "Error running sweep: %s", "error", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return await _respond(request, {
+        'status': 'success',
+        'message': f'{result["shape"][0] * result["shape"][1] * result["shape"][2]} variants evaluated',
+        **result
+    })
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Agent, model-call and cache metrics in Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def root():
     return {"status": "ok", "message": "Visigen backend running."}
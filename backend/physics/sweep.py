@@ -0,0 +1,116 @@
+"""
+Parameter sweeps over a validated scene ("what if the angle were 45°?")
+- sweep_scene: outcomes for every (angle, friction, mass) combination at once
+- linspace_axis: one sweep axis from {start, stop, steps}
+
+Every variant keeps the scene's geometry (where objects[0] sits along the
+surface, the hanging mass of a pulley) and changes only the swept values,
+so the whole grid is a handful of NumPy array expressions.
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from physics.trajectory import pulley_acceleration, slope_acceleration, slope_distances
+from utils.schema import DEFAULT_FRICTION, DEFAULT_MASS
+
+# Largest grid evaluated in one request.
+MAX_VARIANTS = 250_000
+
+
+def linspace_axis(spec: Optional[Dict[str, Any]], default: float):
+    """Values for one axis: `steps` evenly spaced from start to stop, or [default]."""
+    if not spec:
+        return np.array([default], dtype=float)
+    steps = int(spec.get("steps") or 1)
+    if steps == 1:
+        return np.array([float(spec["start"])])
+    return np.linspace(float(spec["start"]), float(spec["stop"]), steps)
+
+
+def _scene_value(value, default: float) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def _nullable(values: np.ndarray) -> list:
+    """Nested lists with non-finite entries (never reached, never stops) as None."""
+    out = np.round(values, 4).astype(object)
+    out[~np.isfinite(values)] = None
+    return out.tolist()
+
+
+def sweep_scene(
+    scene: Dict[str, Any],
+    angle: Optional[Dict[str, Any]] = None,
+    friction: Optional[Dict[str, Any]] = None,
+    mass: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate a scene over a grid of angles (degrees), friction coefficients
+    and masses of objects[0]. Axes left out hold the scene's own value.
+
+    Args:
+        scene (dict): Validated SceneJSON (incline/plane, or pulley with a
+            hanging objects[1]).
+        angle, friction, mass (dict | None): {"start", "stop", "steps"}.
+
+    Returns:
+        dict: {"model", "axes", "shape", "outcomes"} where each outcome is a
+        nested [angle][friction][mass] list: acceleration (m/s², along the
+        motion), slides (bool), time_to_end (s until objects[0] reaches the
+        end of its travel, None if it never moves) and final_velocity (m/s).
+
+    Raises:
+        ValueError: If the grid exceeds MAX_VARIANTS.
+    """
+    env = scene.get("environment") or {}
+    objects = [o for o in scene.get("objects") or [] if isinstance(o, dict)] or [{}]
+    material = env.get("material") or {}
+
+    angles = linspace_axis(angle, _scene_value(env.get("angle"), 0.0))
+    frictions = linspace_axis(friction, _scene_value(material.get("friction"), DEFAULT_FRICTION))
+    masses = linspace_axis(mass, _scene_value(objects[0].get("mass"), DEFAULT_MASS))
+
+    variants = angles.size * frictions.size * masses.size
+    if variants > MAX_VARIANTS:
+        raise ValueError(f"Sweep has {variants} variants; the limit is {MAX_VARIANTS}")
+
+    theta, mu, m1 = np.meshgrid(np.radians(angles), np.clip(frictions, 0.0, None), masses, indexing="ij")
+    room = slope_distances(scene)
+
+    if env.get("type") == "pulley" and len(objects) >= 2:
+        model = "pulley"
+        m2 = _scene_value(objects[1].get("mass"), DEFAULT_MASS)
+        signed = pulley_acceleration(theta, mu, m1, m2)
+        a = np.abs(signed)
+        distance = np.where(signed > 0, min(room["up"], room["drop"]), room["down"])
+    else:
+        model = "incline"
+        a = slope_acceleration(theta, mu)
+        distance = np.full(a.shape, room["down"])
+
+    slides = a > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        time_to_end = np.where(slides, np.sqrt(2 * distance / a), math.inf)
+    final_velocity = np.sqrt(2 * a * distance)
+
+    return {
+        "model": model,
+        "axes": {
+            "angle": np.round(angles, 6).tolist(),
+            "friction": np.round(frictions, 6).tolist(),
+            "mass": np.round(masses, 6).tolist(),
+        },
+        "shape": list(a.shape),
+        "outcomes": {
+            "acceleration": np.round(a, 4).tolist(),
+            "slides": slides.tolist(),
+            "time_to_end": _nullable(time_to_end),
+            "final_velocity": np.round(final_velocity, 4).tolist(),
+        },
+    }
+
+
+__all__ = ["sweep_scene", "linspace_axis", "MAX_VARIANTS"]
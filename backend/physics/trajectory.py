@@ -0,0 +1,323 @@
+"""
+Server-side trajectories for validated scenes
+- simulate_trajectory: per-object position/velocity/acceleration keyframes
+  over simulation.duration at simulation.timestep
+- motion_parameters: the analytic constant-acceleration legs behind them
+- slope_acceleration / pulley_acceleration: the closed-form accelerations,
+  elementwise over NumPy arrays (also used by the parameter sweep)
+
+Supported environments, all with constant accelerations, so every sample is
+evaluated in closed form over a (objects x time steps) grid:
+- incline: a = g(sinθ − μcosθ) down the slope when tanθ > μ, then the body
+  runs out onto the ground and decelerates at μg
+- plane: a body with an initial "velocity" decelerates at μg; others rest
+- pulley: objects[0] on the surface (tilted by environment.angle, 0 = table)
+  tied over a pulley at its high edge to a hanging objects[1]
+
+Coordinates match the frontend: the incline is tilted about x with its low
+edge at y=0 and its high edge towards +z.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ai_processing.scene_builder import INCLINE_LENGTH, INCLINE_THICKNESS, OBJECT_SIZE
+from utils.schema import DEFAULT_FRICTION, DEFAULT_MASS, DEFAULT_SIMULATION
+
+G = 9.81
+
+# Keyframe limit per request, so a tiny timestep cannot blow up the payload.
+MAX_STEPS = 2000
+DECIMALS = 4
+
+
+def _number(value, default: float) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def _vector(value, default=(0.0, 0.0, 0.0)) -> np.ndarray:
+    if isinstance(value, dict):
+        return np.array([_number(value.get(k), d) for k, d in zip("xyz", default)], dtype=float)
+    return np.array(default, dtype=float)
+
+
+def _half_height(obj: Dict[str, Any]) -> float:
+    size = obj.get("size") or {}
+    if "radius" in size:
+        return _number(size["radius"], OBJECT_SIZE * 0.5)
+    return _number(size.get("height"), OBJECT_SIZE) * 0.5
+
+
+def _friction(env: Dict[str, Any], obj: Dict[str, Any]) -> float:
+    mu = (env.get("material") or {}).get("friction")
+    if not isinstance(mu, (int, float)):
+        mu = (obj.get("material") or {}).get("friction")
+    return max(0.0, _number(mu, DEFAULT_FRICTION))
+
+
+def _slope_frame(env: Dict[str, Any]):
+    """(angle in radians, up-slope unit vector, incline centre height, half length)."""
+    theta = math.radians(_number(env.get("angle"), 0.0))
+    dims = env.get("dimensions") or {}
+    length = _number(dims.get("depth"), INCLINE_LENGTH)
+    thickness = _number(dims.get("height"), INCLINE_THICKNESS)
+    center_y = (thickness * 0.5) * math.cos(theta) + (length * 0.5) * math.sin(theta)
+    up = np.array([0.0, math.sin(theta), math.cos(theta)])
+    return theta, up, center_y, length * 0.5
+
+
+def _slope_coordinate(position: np.ndarray, theta: float, center_y: float) -> float:
+    """Distance of a point along the slope from the incline centre (+ towards the high edge)."""
+    return (position[1] - center_y) * math.sin(theta) + position[2] * math.cos(theta)
+
+
+def slope_acceleration(theta, mu):
+    """
+    Acceleration down a slope, a = g(sinθ − μcosθ), or 0 where the body
+    stays put (tanθ <= μ). Works elementwise on NumPy arrays.
+    """
+    a = G * (np.sin(theta) - mu * np.cos(theta))
+    return np.where((theta > 0) & (np.tan(theta) > mu) & (a > 0), a, 0.0)
+
+
+def pulley_acceleration(theta, mu, m1, m2):
+    """
+    Signed acceleration of a body of mass m1 on a slope tied over a pulley at
+    the high edge to a hanging mass m2: positive when m2 falls and m1 moves up
+    the slope, negative when m1 slides down, 0 when friction holds both.
+    Works elementwise on NumPy arrays.
+    """
+    pull = m2 * G - m1 * G * np.sin(theta)
+    friction = mu * m1 * G * np.cos(theta)
+    a = (np.abs(pull) - friction) / (m1 + m2)
+    return np.where(np.abs(pull) > friction, np.sign(pull) * a, 0.0)
+
+
+def _leg(v0: float = 0.0, a: float = 0.0, direction=(0.0, 0.0, 0.0), s_max: float = math.inf) -> Dict[str, Any]:
+    return {"v0": v0, "a": a, "direction": np.asarray(direction, dtype=float), "s_max": max(0.0, s_max)}
+
+
+def _incline_legs(env, obj) -> List[Dict[str, Any]]:
+    theta, up, _, _ = _slope_frame(env)
+    mu = _friction(env, obj)
+    if theta <= 0:
+        return _plane_legs(env, obj)
+
+    a = float(slope_acceleration(theta, mu))
+    if a <= 0:
+        return [_leg()]
+
+    to_bottom = slope_distances({"environment": env, "objects": [obj]})["down"]
+    return [
+        _leg(0.0, a, -up, to_bottom),
+        # Off the low edge: along the ground towards -z, slowed by friction.
+        {**_leg(None, -mu * G, (0.0, 0.0, -1.0)), "ground_y": _half_height(obj)},
+    ]
+
+
+def _plane_legs(env, obj) -> List[Dict[str, Any]]:
+    velocity = _vector(obj.get("velocity"))
+    velocity[1] = 0.0
+    speed = float(np.linalg.norm(velocity))
+    if speed == 0:
+        return [_leg()]
+    return [_leg(speed, -_friction(env, obj) * G, velocity / speed)]
+
+
+def _pulley_legs(env, objects) -> List[List[Dict[str, Any]]]:
+    """Rope-coupled legs for objects[0] (on the surface) and objects[1] (hanging)."""
+    theta, up, _, _ = _slope_frame(env)
+    m1 = _number(objects[0].get("mass"), DEFAULT_MASS)
+    m2 = _number(objects[1].get("mass"), DEFAULT_MASS)
+    signed = float(pulley_acceleration(theta, _friction(env, objects[0]), m1, m2))
+    if signed == 0:
+        return [[_leg()], [_leg()]]
+
+    a = abs(signed)
+    room = slope_distances({"environment": env, "objects": objects})
+    if signed > 0:
+        # Hanging mass falls, surface body moves up towards the pulley.
+        s_max = min(room["up"], room["drop"])
+        return [[_leg(0.0, a, up, s_max)], [_leg(0.0, a, (0.0, -1.0, 0.0), s_max)]]
+    s_max = room["down"]
+    return [[_leg(0.0, a, -up, s_max)], [_leg(0.0, a, (0.0, 1.0, 0.0), s_max)]]
+
+
+def slope_distances(scene: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Room objects[0] has to move along its surface: "down" to the low edge and
+    "up" to the high edge (where a pulley sits), plus "drop", how far a hanging
+    objects[1] can fall before reaching the ground (inf if there is none).
+    Measured along the slope, so they do not change when the angle does.
+    """
+    env = scene.get("environment") or {}
+    objects = [o for o in scene.get("objects") or [] if isinstance(o, dict)] or [{}]
+    theta, _, center_y, half_length = _slope_frame(env)
+    position = _vector(objects[0].get("position"), (0.0, OBJECT_SIZE * 0.5, 0.0))
+    along = _slope_coordinate(position, theta, center_y)
+    h0 = _half_height(objects[0])
+
+    drop = math.inf
+    if len(objects) >= 2:
+        drop = _vector(objects[1].get("position"), (0.0, OBJECT_SIZE * 0.5, 0.0))[1] - _half_height(objects[1])
+    return {
+        "down": max(0.0, along + half_length - h0),
+        "up": max(0.0, half_length - h0 - along),
+        "drop": max(0.0, drop),
+    }
+
+
+def motion_parameters(scene: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """
+    The constant-acceleration legs each object moves through.
+
+    Returns:
+        list: Per object, a list of legs {v0, a, direction, s_max} where a is
+        the acceleration along `direction` and the leg ends after s_max metres
+        or when the speed reaches zero. A v0 of None continues the previous
+        leg's final speed.
+    """
+    env = scene.get("environment") or {}
+    objects = [o for o in scene.get("objects") or [] if isinstance(o, dict)]
+    env_type = env.get("type")
+
+    legs = []
+    for i, obj in enumerate(objects):
+        if env_type == "pulley" and len(objects) >= 2 and i < 2:
+            legs.append(_pulley_legs(env, objects)[i])
+        elif env_type == "incline":
+            legs.append(_incline_legs(env, obj))
+        else:
+            legs.append(_plane_legs(env, obj))
+    return legs
+
+
+def _leg_duration(v0: np.ndarray, a: np.ndarray, s_max: np.ndarray) -> np.ndarray:
+    """Time until each leg stops: at s_max, or when a deceleration brings v to 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stop = np.where(a < 0, -v0 / a, np.inf)
+        disc = v0 ** 2 + 2 * a * s_max
+        t_reach = np.where(
+            a != 0,
+            np.where(disc >= 0, (-v0 + np.sqrt(np.maximum(disc, 0))) / a, np.inf),
+            np.where(v0 > 0, s_max / v0, np.inf),
+        )
+    t_reach = np.where(np.isfinite(s_max), t_reach, np.inf)
+    duration = np.minimum(t_stop, t_reach)
+    return np.where((v0 <= 0) & (a <= 0), 0.0, np.maximum(duration, 0.0))
+
+
+def _evaluate_legs(t: np.ndarray, start: np.ndarray, v0: np.ndarray, a: np.ndarray, s_max: np.ndarray):
+    """
+    Distance, speed and acceleration along one leg for every object (rows)
+    at every time (columns). Objects have stopped once the leg's time is up.
+    """
+    duration = _leg_duration(v0, a, s_max)
+    tau = np.clip(t[None, :] - start[:, None], 0.0, None)
+    active = (t[None, :] >= start[:, None]) & (tau < duration[:, None])
+    tau_c = np.minimum(tau, duration[:, None])
+    s = v0[:, None] * tau_c + 0.5 * a[:, None] * tau_c ** 2
+    v = np.where(active, v0[:, None] + a[:, None] * tau_c, 0.0)
+    acc = np.where(active, a[:, None], 0.0)
+    return s, v, acc, duration
+
+
+def _rounded(values: np.ndarray) -> list:
+    # + 0.0 turns the -0.0s left by direction vectors into 0.0.
+    return (np.round(values, DECIMALS) + 0.0).tolist()
+
+
+def simulate_trajectory(scene: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Keyframes for every object of a validated SceneJSON.
+
+    Args:
+        scene (dict): Validated SceneJSON (environment incline, plane or pulley).
+
+    Returns:
+        dict | None: {"timestep", "times", "objects": [{"position", "velocity",
+        "acceleration", "analytic"}]}, vectors as [x, y, z] per time step, or
+        None if the scene has no objects.
+    """
+    objects = [o for o in scene.get("objects") or [] if isinstance(o, dict)]
+    if not objects:
+        return None
+
+    sim = scene.get("simulation") or {}
+    dt = _number(sim.get("timestep"), DEFAULT_SIMULATION["timestep"])
+    duration = _number(sim.get("duration"), DEFAULT_SIMULATION["duration"])
+    if dt <= 0 or duration <= 0:
+        return None
+    steps = int(math.floor(duration / dt + 1e-9)) + 1
+    if steps > MAX_STEPS:
+        steps, dt = MAX_STEPS, duration / (MAX_STEPS - 1)
+    t = np.arange(steps) * dt
+
+    legs = motion_parameters(scene)
+    n = len(objects)
+    start_pos = np.stack([_vector(o.get("position"), (0.0, OBJECT_SIZE * 0.5, 0.0)) for o in objects])
+
+    # Leg 1 for every object at once.
+    first = [l[0] for l in legs]
+    v0_1 = np.array([l["v0"] for l in first], dtype=float)
+    a_1 = np.array([l["a"] for l in first], dtype=float)
+    d_1 = np.stack([l["direction"] for l in first])
+    s_1 = np.array([l["s_max"] for l in first], dtype=float)
+    s, v, acc, end_1 = _evaluate_legs(t, np.zeros(n), v0_1, a_1, s_1)
+
+    position = start_pos[:, None, :] + s[:, :, None] * d_1[:, None, :]
+    velocity = v[:, :, None] * d_1[:, None, :]
+    acceleration = acc[:, :, None] * d_1[:, None, :]
+
+    # Leg 2 (incline run-out) for the objects that have one, continuing from leg 1's end.
+    second = [l[1] if len(l) > 1 else _leg() for l in legs]
+    has_2 = np.array([len(l) > 1 for l in legs]) & np.isfinite(end_1) & (a_1 > 0)
+    if has_2.any():
+        v_end = np.where(has_2, v0_1 + a_1 * np.where(np.isfinite(end_1), end_1, 0.0), 0.0)
+        a_2 = np.where(has_2, [l["a"] for l in second], 0.0)
+        d_2 = np.stack([l["direction"] for l in second])
+        s_2 = np.array([l["s_max"] for l in second], dtype=float)
+        start_2 = np.where(has_2, end_1, np.inf)
+        s2, v2, acc2, _ = _evaluate_legs(t, start_2, v_end, a_2, s_2)
+
+        end_pos = start_pos + (v0_1 * end_1 + 0.5 * a_1 * end_1 ** 2)[:, None] * d_1
+        ground_y = np.array([l.get("ground_y", 0.0) for l in second])
+        end_pos[:, 1] = np.where(has_2, ground_y, end_pos[:, 1])
+        after = has_2[:, None] & (t[None, :] >= start_2[:, None])
+
+        position = np.where(after[:, :, None], end_pos[:, None, :] + s2[:, :, None] * d_2[:, None, :], position)
+        velocity = np.where(after[:, :, None], v2[:, :, None] * d_2[:, None, :], velocity)
+        acceleration = np.where(after[:, :, None], acc2[:, :, None] * d_2[:, None, :], acceleration)
+
+    objects_out = []
+    for i in range(n):
+        objects_out.append({
+            "index": i,
+            "position": _rounded(position[i]),
+            "velocity": _rounded(velocity[i]),
+            "acceleration": _rounded(acceleration[i]),
+            "analytic": {
+                "acceleration": round(float(a_1[i]), DECIMALS),
+                "moves": bool(v0_1[i] > 0 or a_1[i] > 0),
+                "leg_duration": round(float(end_1[i]), DECIMALS) if np.isfinite(end_1[i]) else None,
+            },
+        })
+
+    return {
+        "timestep": round(dt, 6),
+        "duration": round(float(t[-1]), 6),
+        "times": np.round(t, 6).tolist(),
+        "objects": objects_out,
+    }
+
+
+__all__ = [
+    "simulate_trajectory",
+    "motion_parameters",
+    "slope_acceleration",
+    "pulley_acceleration",
+    "slope_distances",
+    "G",
+]
@@ -1,4 +1,46 @@
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from utils.schema import NUMERIC_BOUNDS
+
+# One word problem, as accepted by /simulate and by each item of /simulate/batch.
+ProblemText = Annotated[str, Field(min_length=5, max_length=1000)]
 
 class ProblemInput(BaseModel):
-    problem: str = Field(..., min_length=5, max_length=1000, description='User provided word problem text')
\ No newline at end of file
+    problem: ProblemText = Field(..., description='User provided word problem text')
+
+class BatchProblemInput(BaseModel):
+    problems: List[ProblemText] = Field(..., min_length=1, max_length=100, description='Word problems to simulate, e.g. a whole problem set')
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description='Pipelines to run at once (server default if omitted)')
+
+class SweepRange(BaseModel):
+    start: float = Field(..., description='First value of the axis')
+    stop: float = Field(..., description='Last value of the axis (inclusive)')
+    steps: int = Field(..., ge=1, le=1000, description='Number of evenly spaced values')
+
+class SweepInput(BaseModel):
+    scene: Dict[str, Any] = Field(..., description='Validated SceneJSON to vary')
+    angle: Optional[SweepRange] = Field(None, description='Incline angles in degrees (0-90)')
+    friction: Optional[SweepRange] = Field(None, description='Friction coefficients (0-1)')
+    mass: Optional[SweepRange] = Field(None, description='Masses of objects[0] in kg')
+
+    @model_validator(mode='after')
+    def check_axes_and_scene(self):
+        """Keep every swept value inside the scene bounds and the scene shaped like SceneJSON."""
+        for name in ('angle', 'friction', 'mass'):
+            axis = getattr(self, name)
+            if axis is None:
+                continue
+            low, high = NUMERIC_BOUNDS[name]
+            for value in (axis.start, axis.stop):
+                if not low <= value <= high:
+                    raise ValueError(f'{name} values must be within [{low}, {high}], got {value}')
+
+        env = self.scene.get('environment')
+        if env is not None and not isinstance(env, dict):
+            raise ValueError('scene.environment must be an object')
+        if isinstance(env, dict) and env.get('material') is not None and not isinstance(env['material'], dict):
+            raise ValueError('scene.environment.material must be an object')
+        if self.scene.get('objects') is not None and not isinstance(self.scene['objects'], list):
+            raise ValueError('scene.objects must be a list')
+        return self
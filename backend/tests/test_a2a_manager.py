@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents import a2a_manager
+from utils.deadline import Deadline
+from utils.singleflight import SingleFlight
+
+PROBLEM = "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    runs = []
+
+    async def events(problem_text, key):
+        runs.append(problem_text)
+        for stage in a2a_manager.STAGES:
+            await asyncio.sleep(0.01)
+            yield {"event": stage, "agent": stage.title() + "Agent", "data": {"stage": stage}}
+
+    monkeypatch.setattr(a2a_manager, "inflight", SingleFlight())
+    monkeypatch.setattr(a2a_manager, "_ready_result", lambda problem_text, key: (None, None))
+    monkeypatch.setattr(a2a_manager, "_pipeline_events", events)
+    return runs
+
+
+async def _stream():
+    return [event async for event in a2a_manager.stream_a2a_simulation(PROBLEM)]
+
+
+def test_concurrent_streams_and_requests_share_one_run(pipeline):
+    async def scenario():
+        return await asyncio.gather(_stream(), _stream(), a2a_manager.run_a2a_simulation_async(PROBLEM))
+
+    leader, follower, result = asyncio.run(scenario())
+
+    assert len(pipeline) == 1
+    assert [e["agent"] for e in leader] == ["ParsedAgent", "SceneAgent", "ValidatedAgent"]
+    assert [e["agent"] for e in follower] == ["SingleFlight"] * 3
+    assert [e["data"] for e in follower] == [e["data"] for e in leader]
+    assert result["validated"] == {"stage": "validated"}
+
+
+def test_a_failed_streamed_run_reaches_every_caller(pipeline, monkeypatch):
+    async def failing(problem_text, key):
+        yield {"event": "parsed", "agent": "ParserAgent", "data": {}}
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(a2a_manager, "_pipeline_events", failing)
+
+    async def scenario():
+        return await asyncio.gather(_stream(), a2a_manager.run_a2a_simulation_async(PROBLEM), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario()))
+    assert a2a_manager.inflight.stats()["in_flight"] == 0
+
+
+class _HungNode:
+    """A SceneAgent whose speculative send outlives its deadline."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def send(self, message, deadline):
+        self.release.wait(5)
+        return {"objects": []}
+
+    async def send_async(self, message, deadline):
+        await asyncio.sleep(5)
+
+
+def _spec_and_outcomes():
+    local = a2a_manager._local_parsed(PROBLEM)
+    return local, lambda: a2a_manager.SPECULATIVE_SCENES.value(outcome="failed")
+
+
+def test_a_hung_speculative_scene_falls_back_after_its_deadline():
+    node = _HungNode()
+    local, failed = _spec_and_outcomes()
+    before = failed()
+    speculation = a2a_manager._speculate(node, PROBLEM, Deadline(0.05))
+    try:
+        started = time.monotonic()
+        assert a2a_manager._take_speculation(speculation, local) is None
+        assert time.monotonic() - started < 1
+        assert failed() == before + 1
+    finally:
+        node.release.set()
+
+
+def test_a_hung_async_speculative_scene_falls_back_after_its_deadline():
+    local, failed = _spec_and_outcomes()
+    before = failed()
+
+    async def scenario():
+        speculation = a2a_manager._speculate_async(_HungNode(), PROBLEM, Deadline(0.05))
+        return await a2a_manager._take_speculation_async(speculation, local)
+
+    started = time.monotonic()
+    assert asyncio.run(scenario()) is None
+    assert time.monotonic() - started < 1
+    assert failed() == before + 1
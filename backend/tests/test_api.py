@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+from utils.cache import problem_key
+
+PROBLEM = "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
+PARSED = build_parsed_spec(
+    PROBLEM, {"angle_deg": 30, "mass_kg": 5.0, "friction": 0.2, "object_type": "box", "is_incline": True}
+)
+SCENE = build_scene(PARSED)
+RESULT = {"parsed": PARSED, "scene": SCENE, "validated": SCENE}
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    threads = {}
+    simulate = main.simulate_trajectory
+
+    async def run(problem):
+        threads["loop"] = threading.current_thread()
+        return dict(RESULT)
+
+    def trajectory(scene):
+        threads["trajectory"] = threading.current_thread()
+        return simulate(scene)
+
+    monkeypatch.setattr(main, "run_a2a_simulation_async", run)
+    monkeypatch.setattr(main, "simulate_trajectory", trajectory)
+    monkeypatch.setattr(main, "get_cached_result", lambda key: dict(RESULT) if key == problem_key(PROBLEM) else None)
+    monkeypatch.setattr(main, "has_cached_result", lambda key: key == problem_key(PROBLEM))
+    return threads
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_simulate_computes_the_trajectory_off_the_event_loop(client, threads):
+    response = client.post("/simulate", json={"problem": PROBLEM})
+
+    assert response.status_code == 200
+    assert response.json()["trajectory"]
+    assert threads["trajectory"] is not threads["loop"]
+
+
+def test_content_location_only_points_at_stored_results(client, threads, monkeypatch):
+    stored = client.post("/simulate", json={"problem": PROBLEM})
+    assert stored.headers["Content-Location"] == f"/simulate/result/{problem_key(PROBLEM)}"
+
+    monkeypatch.setattr(main, "has_cached_result", lambda key: False)
+    unstored = client.post("/simulate", json={"problem": PROBLEM})
+    assert "Content-Location" not in unstored.headers
+
+
+def test_fields_projection_skips_the_trajectory(client, threads):
+    response = client.post("/simulate?fields=validated", json={"problem": PROBLEM})
+
+    assert set(response.json()) >= {"validated"}
+    assert "trajectory" not in response.json()
+    assert "trajectory" not in threads
+
+
+def test_stored_result_revalidates_with_etag(client, threads):
+    url = f"/simulate/result/{problem_key(PROBLEM)}"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+
+    other = client.get(url + "?fields=validated", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_unknown_result_is_404(client, threads):
+    assert client.get("/simulate/result/" + "0" * 64).status_code == 404
+    assert client.get("/simulate/result/not-a-key").status_code == 404
+
+
+def test_stream_sends_the_trajectory_after_validated(client, threads, monkeypatch):
+    async def stream(problem):
+        threads["loop"] = threading.current_thread()
+        for stage in ("parsed", "scene", "validated"):
+            yield {"event": stage, "agent": stage, "data": RESULT[stage]}
+
+    monkeypatch.setattr(main, "stream_a2a_simulation", stream)
+    body = client.post("/simulate/stream", json={"problem": PROBLEM}).text
+
+    events = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+    assert events == ["problem", "parsed", "scene", "validated", "trajectory", "done"]
+    assert threads["trajectory"] is not threads["loop"]
+
+
+@pytest.mark.parametrize("problems", [[""], ["ok?"], ["x" * 1001], [PROBLEM, "tiny"]])
+def test_batch_items_are_length_checked(client, problems):
+    assert client.post("/simulate/batch", json={"problems": problems}).status_code == 422
+
+
+def test_problem_length_is_checked(client):
+    assert client.post("/simulate", json={"problem": "x" * 1001}).status_code == 422
+
+
+def test_sweep_runs_within_bounds(client):
+    body = {"scene": SCENE, "angle": {"start": 10, "stop": 60, "steps": 3}, "friction": {"start": 0, "stop": 0.5, "steps": 2}}
+    response = client.post("/simulate/sweep", json=body)
+    assert response.status_code == 200
+    assert response.json()["shape"][:2] == [3, 2]
+
+
+@pytest.mark.parametrize("body", [
+    {"scene": SCENE, "angle": {"start": 10, "stop": 120, "steps": 3}},
+    {"scene": SCENE, "friction": {"start": -0.1, "stop": 0.5, "steps": 3}},
+    {"scene": SCENE, "mass": {"start": 0, "stop": 5, "steps": 3}},
+    {"scene": {**SCENE, "environment": []}},
+    {"scene": {**SCENE, "environment": {**SCENE["environment"], "material": 0.2}}},
+    {"scene": {**SCENE, "objects": "box"}},
+])
+def test_sweep_rejects_out_of_range_axes_and_malformed_scenes(client, body):
+    assert client.post("/simulate/sweep", json=body).status_code == 422
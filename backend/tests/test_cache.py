@@ -0,0 +1,91 @@
+import os
+import time
+
+from utils.cache import ResultCache, normalize_problem, problem_key
+
+
+def test_problem_key_ignores_spacing_case_and_unit_variants():
+    a = "A 5 kg box on a 30 degree incline,  μ = 0.2"
+    b = "a 5kg BOX on a 30º incline, mu = 0.2"
+    assert normalize_problem(a) == normalize_problem(b)
+    assert problem_key(a) == problem_key(b)
+    assert problem_key(a) != problem_key("a 6 kg box on a 30° incline, μ = 0.2")
+
+
+def test_get_returns_a_copy():
+    cache = ResultCache(max_size=4)
+    cache.set("k", {"scene": {"angle": 30}})
+    got = cache.get("k")
+    got["scene"]["angle"] = 45
+    assert cache.get("k") == {"scene": {"angle": 30}}
+
+
+def test_lru_eviction_in_memory():
+    cache = ResultCache(max_size=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ResultCache(max_size=4, ttl=10)
+    cache.set("k", {"v": 1})
+    now[0] += 5
+    assert cache.get("k") == {"v": 1}
+    now[0] += 6
+    assert cache.get("k") is None
+
+
+def test_disk_store_survives_a_new_instance(tmp_path):
+    ResultCache(max_size=4, directory=str(tmp_path)).set("k", {"v": 1})
+    assert ResultCache(max_size=4, directory=str(tmp_path)).get("k") == {"v": 1}
+
+
+def test_disk_store_is_bounded_oldest_first(tmp_path):
+    cache = ResultCache(max_size=1, directory=str(tmp_path), disk_max_size=3)
+    for i in range(6):
+        cache.set(f"k{i}", {"v": i})
+        path = tmp_path / f"k{i}.json"
+        os.utime(path, (i, i))  # distinct mtimes, oldest first
+    cache.set("k5", {"v": 5})
+
+    files = sorted(p.name for p in tmp_path.glob("*.json"))
+    assert len(files) <= 3
+    assert "k5.json" in files and "k0.json" not in files
+    assert cache.get("k0") is None
+
+
+def test_expired_files_are_swept_without_being_read(tmp_path):
+    (tmp_path / "old.json").write_text('{"stored_at": 0, "value": {}}')
+    os.utime(tmp_path / "old.json", (0, 0))
+    ResultCache(max_size=4, ttl=60, directory=str(tmp_path))
+    assert not (tmp_path / "old.json").exists()
+
+
+def test_zero_disk_size_writes_nothing(tmp_path):
+    cache = ResultCache(max_size=4, directory=str(tmp_path), disk_max_size=0)
+    cache.set("k", {"v": 1})
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_set_reports_whether_anything_was_kept(tmp_path):
+    assert ResultCache(max_size=4).set("k", {"v": 1})
+    assert ResultCache(max_size=0, directory=str(tmp_path), disk_max_size=4).set("k", {"v": 1})
+    assert not ResultCache(max_size=0).set("k", {"v": 1})
+    assert not ResultCache(max_size=0, directory=str(tmp_path / "off"), disk_max_size=0).set("k", {"v": 1})
+
+
+def test_contains_sees_memory_and_disk_without_counting(tmp_path):
+    cache = ResultCache(max_size=1, directory=str(tmp_path), disk_max_size=4)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})  # evicts "a" from memory; its file stays
+    assert cache.contains("a") and cache.contains("b")
+    assert not cache.contains("c")
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+    assert not ResultCache(max_size=0).contains("a")
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from physics.trajectory import simulate_trajectory
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+from utils.encoding import JSON_MEDIA_TYPE, PACKED_MEDIA_TYPE, decode_packed, encode_packed, negotiate
+
+
+def _body():
+    parsed = build_parsed_spec(
+        "problem", {"angle_deg": 30, "mass_kg": 5.0, "friction": 0.2, "object_type": "box", "is_incline": True}
+    )
+    scene = build_scene(parsed)
+    return {"status": "success", "parsed": parsed, "scene": scene, "validated": scene,
+            "trajectory": simulate_trajectory(scene)}
+
+
+def _close(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_close(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return a == pytest.approx(b, rel=1e-6, abs=1e-6)
+    return a == b
+
+
+def test_round_trip_keeps_structure_and_float32_values():
+    body = _body()
+    data = encode_packed(body)
+
+    assert _close(decode_packed(data), body)
+    assert len(data) < len(json.dumps(body))
+
+
+def test_repeated_top_level_values_are_sent_once():
+    body = _body()
+    decoded = decode_packed(encode_packed(body))
+    assert decoded["validated"] == decoded["scene"] == body["scene"]  # short vectors stay exact JSON
+
+
+def test_short_arrays_stay_json():
+    body = {"values": [1.5, 2.5, 3.5]}
+    assert decode_packed(encode_packed(body)) == body
+
+
+@pytest.mark.parametrize("values", [
+    [True, False, 1, 0] * 4,
+    [1, 2, 3, 2 ** 24 + 1] * 4,
+    [0.5, None] * 8,
+    [[1, True]] * 16,
+])
+def test_lists_float32_would_change_stay_json(values):
+    decoded = decode_packed(encode_packed({"values": values}))["values"]
+    assert decoded == values
+    assert [type(v) for v in decoded] == [type(v) for v in values]
+
+
+def test_small_int_lists_are_packed_exactly():
+    values = list(range(-8, 8)) + [2 ** 24, -(2 ** 24)]
+    data = encode_packed({"values": values})
+    assert b'"$f32"' in data
+    assert decode_packed(data)["values"] == values
+
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_packed(b'{"status": "success"}')
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    (PACKED_MEDIA_TYPE, PACKED_MEDIA_TYPE),
+    (f"application/json, {PACKED_MEDIA_TYPE}", JSON_MEDIA_TYPE),
+    (f"application/json;q=0.5, {PACKED_MEDIA_TYPE}", PACKED_MEDIA_TYPE),
+    (f"{PACKED_MEDIA_TYPE};q=0", JSON_MEDIA_TYPE),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
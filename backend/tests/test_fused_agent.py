@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from agents import fused_agent, validator_agent
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+from utils.validators import compare_parsed_and_scene, validate_scene_json
+
+PROBLEM = "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
+
+
+def _parsed():
+    parsed = build_parsed_spec(
+        PROBLEM, {"angle_deg": 30, "mass_kg": 5.0, "friction": 0.2, "object_type": "box", "is_incline": True}
+    )
+    return {k: parsed[k] for k in ("environment_type", "angle_deg", "friction", "objects")}
+
+
+@pytest.fixture
+def reply(monkeypatch):
+    def no_refine(*args, **kwargs):
+        raise AssertionError("a repairable scene should not need a model refinement")
+
+    monkeypatch.setattr(validator_agent, "call_model", no_refine)
+
+    def set_reply(data):
+        monkeypatch.setattr(fused_agent, "call_model", lambda prompt, agent, config: json.dumps(data))
+
+    return set_reply
+
+
+def test_invalid_model_scene_is_repaired_before_it_is_called_validated(reply):
+    scene = build_scene(build_parsed_spec(PROBLEM, {"angle_deg": 30, "mass_kg": 2.0, "friction": 0.5,
+                                                    "object_type": "box", "is_incline": True}))
+    del scene["simulation"]
+    scene["environment"]["angle"] = "30"
+    reply({"parsed": _parsed(), "scene": scene})
+
+    result = fused_agent.parse_and_build(PROBLEM)
+
+    assert not validate_scene_json(result["scene"])[0]  # the model's own output is kept as "scene"
+    assert validate_scene_json(result["validated"])[0]
+    assert compare_parsed_and_scene(result["parsed"], result["validated"]) == {}
+
+
+@pytest.mark.parametrize("objects", [["box"], [5], "box", []])
+def test_malformed_objects_are_schema_filled(reply, objects):
+    reply({"parsed": {**_parsed(), "objects": objects}, "scene": build_scene(build_parsed_spec(
+        PROBLEM, {"angle_deg": 30, "mass_kg": 5.0, "friction": 0.2, "object_type": "box", "is_incline": True}))})
+
+    result = fused_agent.parse_and_build(PROBLEM)
+
+    assert "error" not in result
+    assert result["parsed"]["objects"][0] == {"type": "box", "mass_kg": 5.0}
+
+
+def test_non_object_stages_are_reported_as_invalid_json(reply):
+    reply({"parsed": ["box"], "scene": {}})
+    result = fused_agent.parse_and_build(PROBLEM)
+    assert all("error" in result[stage] for stage in ("parsed", "scene", "validated"))
@@ -0,0 +1,43 @@
+import pytest
+
+from utils import logger
+from utils.logger import Truncated, log
+
+
+@pytest.fixture
+def records(monkeypatch):
+    written = []
+
+    class Queue:
+        def put(self, record):
+            written.append(record)
+
+    class Writer:
+        queue = Queue()
+
+    monkeypatch.setattr(logger, "LOG_ASYNC", True)
+    monkeypatch.setattr(logger, "_get_writer", lambda: Writer)
+    monkeypatch.setattr(logger, "_threshold", logger.LEVELS["info"])
+    return written
+
+
+def test_arguments_are_rendered_when_logged(records):
+    scene = {"angle": 30}
+    log("Agent", "scene %s / %s", "info", scene, Truncated(scene))
+    scene["angle"] = 45
+    assert records[0][3] == "scene {'angle': 30} / {'angle': 30}"
+
+
+def test_disabled_levels_do_no_formatting(records):
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a dropped record")
+
+    log("Agent", "value %s", "debug", Exploding())
+    log("Agent", lambda: str(Exploding()), "debug")
+    assert records == []
+
+
+def test_bad_format_is_reported_not_raised(records):
+    log("Agent", "%d items", "info", "many")
+    assert "log formatting failed" in records[0][3]
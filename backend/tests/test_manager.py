@@ -0,0 +1,50 @@
+import asyncio
+import copy
+
+import pytest
+
+from agents import manager
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+
+PARSED = build_parsed_spec(
+    "problem", {"angle_deg": 30, "mass_kg": 5.0, "friction": 0.2, "object_type": "box", "is_incline": True}
+)
+SCENE = build_scene(PARSED)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"scene": 0, "sections": []}
+
+    def generate_scene(parsed):
+        calls["scene"] += 1
+        broken = copy.deepcopy(SCENE)
+        del broken["simulation"]
+        return broken
+
+    def generate_sections(parsed, scene, sections):
+        calls["sections"].append(list(sections))
+        return {k: copy.deepcopy(SCENE[k]) for k in sections}
+
+    monkeypatch.setattr(manager, "parse_problem", lambda text: PARSED)
+    monkeypatch.setattr(manager, "generate_scene", generate_scene)
+    monkeypatch.setattr(manager, "generate_sections", generate_sections)
+    monkeypatch.setattr(manager, "validate_and_refine", lambda scene, parsed, text: scene)
+    monkeypatch.setattr(manager, "_backoff", lambda round: 0)
+    return calls
+
+
+def test_later_rounds_only_ask_for_flagged_sections(calls):
+    result = manager.run_autonomous_simulation("problem")
+
+    assert result["attempts"] == 2
+    assert calls["scene"] == 1
+    assert calls["sections"] == [["simulation"]]
+    assert result["final_scene"] == SCENE
+
+
+def test_sync_wrapper_works_inside_a_running_loop(calls):
+    async def caller():
+        return manager.run_autonomous_simulation("problem")
+
+    assert asyncio.run(caller())["final_scene"] == SCENE
@@ -0,0 +1,77 @@
+import math
+
+import pytest
+
+from ai_processing.physics_parserer import pre_extract, pre_extract_batch
+from ai_processing.quantities import constraints_from, extract_batch, extract_quantities
+
+
+def _values(problem):
+    return [(q.kind, q.value) for q in extract_quantities(problem)["quantities"]]
+
+
+@pytest.mark.parametrize("problem, kind, value", [
+    ("a 500 g ball", "mass", 0.5),
+    ("a 10 lb box", "mass", 4.5359237),
+    ("a 3 kilograms crate", "mass", 3.0),
+    ("moving at 36 km/h", "speed", 10.0),
+    ("over 250 cm", "length", 2.5),
+    ("a 2 km road", "length", 2000.0),
+    ("pushed with 20 N", "force", 20.0),
+    ("accelerates at 2 m/s²", "acceleration", 2.0),
+    ("accelerates at 2 m/s^2", "acceleration", 2.0),
+    ("for 3 s", "time", 3.0),
+])
+def test_units_are_converted_to_si(problem, kind, value):
+    assert _values(problem) == [(kind, pytest.approx(value))]
+
+
+@pytest.mark.parametrize("problem, degrees", [
+    ("a 30° incline", 30.0),
+    ("a 30 degree incline", 30.0),
+    ("an incline at 45 degrees", 45.0),
+    ("an angle of 25", 25.0),
+    ("an incline at 0.5 rad", math.degrees(0.5)),
+])
+def test_angles_are_reported_in_degrees(problem, degrees):
+    extraction = extract_quantities(problem)
+    assert _values(problem) == [("angle", pytest.approx(degrees))]
+    assert extraction["is_incline"]
+
+
+def test_masses_bind_to_their_own_objects():
+    extraction = extract_quantities("A 2 kg block A and a 3 kg block B are connected; block A sits on a 30° incline.")
+    assert [o["mass"] for o in extraction["objects"]] == [2.0, 3.0]
+
+    extraction = extract_quantities("A block of mass 4 kg is tied to a ball of mass 1.5 kg.")
+    assert [(o["type"], o["mass"]) for o in extraction["objects"]] == [("box", 4.0), ("sphere", 1.5)]
+
+
+@pytest.mark.parametrize("problem", [
+    "μ = 0.3",
+    "mu = 0.3",
+    "μs=0.3",
+    "mu_k = 0.3",
+    "coefficient of kinetic friction of 0.3",
+    "coefficient of friction is 0.3",
+    "friction coefficient 0.3",
+    "static friction coefficient = 0.3",
+])
+def test_friction_coefficient_spellings(problem):
+    assert extract_quantities(problem)["friction"] == 0.3
+
+
+def test_frictionless_wording_means_zero_friction():
+    assert constraints_from(extract_quantities("a frictionless ramp"))["friction"] == 0.0
+    assert constraints_from(extract_quantities("a smooth incline"))["friction"] == 0.0
+
+
+def test_batch_matches_single_calls():
+    problems = [
+        "A 5 kg box slides down a 30° incline with friction coefficient 0.2.",
+        "A 500 g ball rolls at 36 km/h.",
+        "No numbers here.",
+    ]
+    assert extract_batch(problems) == [extract_quantities(p) for p in problems]
+    assert pre_extract_batch(problems) == [pre_extract(p) for p in problems]
+    assert pre_extract_batch([]) == []
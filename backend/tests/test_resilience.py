@@ -0,0 +1,173 @@
+import time
+
+import pytest
+
+from benchmarks.stub_backend import StubBackend
+from utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+from utils.resilience import (
+    CircuitBreaker, ModelUnavailable, ResiliencePolicy, TransientModelError, is_rejection, is_transient,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# Same class names as google.api_core's errors.
+SdkDeadlineExceeded = type("DeadlineExceeded", (Exception,), {})
+InvalidArgument = type("InvalidArgument", (Exception,), {"code": 400})
+
+
+def _policy(**kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(threshold=3, cooldown=10, clock=Clock()))
+    return ResiliencePolicy(retries=2, hedge_percentile=None, sleep=lambda delay: None, seed=0, **kwargs)
+
+
+def _failing(error):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise error
+
+    return fn, calls
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=2, cooldown=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # a single probe
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 1
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_released_probe_lets_the_next_call_probe():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "open" and breaker.allow()
+
+
+def test_transient_errors_are_retried():
+    backend = StubBackend(error_rate=0.5, seed=3)
+    policy = _policy()
+    answers = [policy.call("ParserAgent", lambda: backend.generate('"""A 5 kg box."""')) for _ in range(20)]
+    assert len(answers) == 20
+    assert backend.faults > 0
+    assert backend.calls == 20 + backend.faults
+
+
+def test_retries_are_exhausted_then_unavailable():
+    policy = _policy()
+    fn, calls = _failing(TransientModelError("503"))
+    with pytest.raises(ModelUnavailable):
+        policy.call("ParserAgent", fn)
+    assert len(calls) == 3
+    assert policy.breaker.failures == 3
+
+
+def test_non_idempotent_calls_are_not_retried():
+    fn, calls = _failing(TransientModelError("503"))
+    with pytest.raises(ModelUnavailable):
+        _policy().call("ParserAgent", fn, idempotent=False)
+    assert len(calls) == 1
+
+
+def test_request_errors_are_not_retried_or_counted():
+    policy = _policy()
+    fn, calls = _failing(ValueError("bad prompt"))
+    with pytest.raises(ValueError):
+        policy.call("ParserAgent", fn)
+    assert len(calls) == 1
+    assert policy.breaker.failures == 0
+
+
+def _half_open_policy():
+    clock = Clock()
+    policy = _policy(breaker=CircuitBreaker(threshold=1, cooldown=10, clock=clock))
+    policy.breaker.record_failure()
+    clock.now = 10
+    return policy
+
+
+def test_local_error_on_the_probe_leaves_the_breaker_open():
+    policy = _half_open_policy()
+    fn, calls = _failing(EnvironmentError("GEMINI_API_KEY is not set"))
+    with pytest.raises(EnvironmentError):
+        policy.call("ParserAgent", fn)
+    assert len(calls) == 1
+    assert policy.breaker.state == "open"
+    assert policy.breaker.allow()  # the next call may probe again
+
+
+def test_provider_rejection_on_the_probe_closes_the_breaker():
+    policy = _half_open_policy()
+    fn, _ = _failing(InvalidArgument("400 bad request"))
+    with pytest.raises(InvalidArgument):
+        policy.call("ParserAgent", fn)
+    assert policy.breaker.state == "closed"
+
+
+def test_rejections_are_4xx_answers_only():
+    assert is_rejection(InvalidArgument())
+    assert not is_rejection(ValueError())
+    assert not is_rejection(EnvironmentError())
+    assert not is_rejection(type("TooManyRequests", (Exception,), {"code": 429})())
+
+
+def test_sdk_timeout_past_our_deadline_is_not_retried_or_counted():
+    policy = _policy()
+    fn, calls = _failing(SdkDeadlineExceeded("504 Deadline Exceeded"))
+    with deadline_scope(Deadline(0)):
+        with pytest.raises(DeadlineExceeded):
+            policy.call("ParserAgent", fn)
+        assert not is_transient(SdkDeadlineExceeded())
+    assert len(calls) == 1
+    assert policy.breaker.failures == 0
+    assert is_transient(SdkDeadlineExceeded())  # with time left it is the provider's
+
+
+def test_open_breaker_fails_fast():
+    backend = StubBackend(error_rate=1.0)
+    policy = _policy()
+    for _ in range(5):
+        with pytest.raises(ModelUnavailable):
+            policy.call("ParserAgent", lambda: backend.generate('"""x"""'))
+    assert policy.breaker.state == "open"
+    assert backend.calls == 3
+
+
+def test_slow_attempt_is_hedged():
+    policy = ResiliencePolicy(retries=0, hedge_percentile=0.5, hedge_min_delay=0.01, hedge_min_samples=1, seed=0)
+    policy.tracker("ParserAgent").observe(0.001)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert policy.call("ParserAgent", fn) == "fast"
+    assert time.perf_counter() - start < 0.4
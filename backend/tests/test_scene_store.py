@@ -0,0 +1,129 @@
+import copy
+import math
+
+import pytest
+
+from agents import a2a_manager
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+from utils.cache import ResultCache, problem_key
+from utils.scene_store import NEIGHBOUR_SCALES, SceneStore
+
+
+def _parsed(angle, mass=5.0, friction=0.2, extra=None):
+    parsed = build_parsed_spec(
+        "problem", {"angle_deg": angle, "mass_kg": mass, "friction": friction, "object_type": "box", "is_incline": True}
+    )
+    parsed["extra_terms"] = extra or {}
+    return parsed
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SceneStore(str(tmp_path / "scenes.sqlite3"), max_size=10)
+
+
+def _put(store, angle, **kwargs):
+    parsed = _parsed(angle, **kwargs)
+    store.put(parsed, build_scene(parsed))
+
+
+def test_nearest_returns_the_closest_neighbour(store):
+    _put(store, 30)
+    _put(store, 36)
+    match = store.nearest("incline", ["box"], 34, 0.2, 5.0)
+    assert match["constraints"]["angle_deg"] == 36
+    assert match["distance"] == pytest.approx(2 / NEIGHBOUR_SCALES["angle"])
+
+
+def test_nearest_distance_combines_parameters(store):
+    _put(store, 30, mass=5.0, friction=0.2)
+    match = store.nearest("incline", ["box"], 33, 0.3, 9.0)
+    expected = math.sqrt((3 / 10) ** 2 + (0.1 / 0.2) ** 2 + (4 / 10) ** 2)
+    assert match["distance"] == pytest.approx(expected)
+
+
+def test_nearest_rejects_distant_or_different_scenes(store):
+    _put(store, 30)
+    assert store.nearest("incline", ["box"], 41, 0.2, 5.0) is None  # beyond the angle scale
+    assert store.nearest("incline", ["box"], 36, 0.2, 5.0) is not None
+    assert store.nearest("plane", ["box"], 30, 0.2, 5.0) is None
+    assert store.nearest("incline", ["sphere"], 30, 0.2, 5.0) is None
+    assert store.nearest("incline", ["box"], 30, None, 5.0) is None  # unstated only matches unstated
+
+
+def test_rows_with_extra_terms_are_never_reused(store):
+    _put(store, 30, extra={"spring_k": 100})
+    assert store.nearest("incline", ["box"], 30, 0.2, 5.0) is None
+
+
+def test_size_bound_evicts_least_used(tmp_path):
+    store = SceneStore(str(tmp_path / "s.sqlite3"), max_size=2)
+    _put(store, 10)
+    _put(store, 20)
+    store.nearest("incline", ["box"], 10, 0.2, 5.0)  # a hit keeps 10° around
+    _put(store, 30)
+    assert store.stats()["size"] == 2
+    assert store.nearest("incline", ["box"], 20, 0.2, 5.0)["constraints"]["angle_deg"] in (10, 30)
+    assert store.nearest("incline", ["box"], 10, 0.2, 5.0)["constraints"]["angle_deg"] == 10
+
+
+@pytest.fixture
+def orchestrator(store, monkeypatch):
+    monkeypatch.setattr(a2a_manager, "scene_store", store)
+    monkeypatch.setattr(a2a_manager, "result_cache", ResultCache(max_size=8))
+    return a2a_manager
+
+
+def _put_pulley(store, masses):
+    parsed = build_parsed_spec("problem", {"angle_deg": None, "mass_kg": None, "friction": None,
+                                           "object_type": "box", "is_incline": False})
+    parsed["environment_type"] = "pulley"
+    parsed["objects"] = [{"type": "box", "mass_kg": m} for m in masses]
+    parsed["extra_terms"] = {}
+    scene = build_scene(dict(parsed, environment_type="plane", objects=parsed["objects"]))
+    scene["environment"]["type"] = "pulley"
+    store.put(parsed, scene)
+
+
+def test_other_object_masses_must_match(store):
+    _put_pulley(store, [2.0, 10.0])
+    assert store.nearest("pulley", ["box", "box"], masses=[2.0, 3.0]) is None
+    assert store.nearest("pulley", ["box", "box"], masses=[2.0, None]) is None
+    assert store.nearest("pulley", ["box", "box"], masses=[2.5, 10.0])["distance"] == pytest.approx(0.05)
+    # The first mass alone would have matched.
+    assert store.nearest("pulley", ["box", "box"], mass=2.0) is not None
+
+
+def test_masses_report_the_first_stated_mass(store):
+    _put_pulley(store, [None, 2.5])
+    match = store.nearest("pulley", ["box", "box"], masses=[None, 3.0])
+    assert match["constraints"]["mass_kg"] == 2.5
+
+
+def test_pulley_neighbour_is_refilled_on_the_right_object(store, orchestrator):
+    _put_pulley(store, [None, 2.5])
+    problem = "A block on a table is connected by a string over a pulley to a hanging 3 kg block."
+
+    result = orchestrator._lookup_store(problem, problem_key(problem))
+
+    assert [o["mass_kg"] for o in result["parsed"]["objects"]] == [None, 3.0]
+    assert result["validated"]["objects"][1]["mass"] == 3.0
+
+
+def test_pulley_neighbour_with_a_different_hanging_mass_is_not_reused(store, orchestrator):
+    _put_pulley(store, [2.0, 10.0])
+    problem = "A 2 kg block on a table is connected by a string over a pulley to a hanging block."
+    assert orchestrator._lookup_store(problem, problem_key(problem)) is None
+
+
+def test_store_hit_is_refilled_with_geometry_for_the_new_angle(store, orchestrator):
+    _put(store, 30)
+    problem = "A 5 kg box slides down a 36° incline with friction coefficient 0.2."
+
+    result = orchestrator._lookup_store(problem, problem_key(problem))
+
+    expected = build_scene(_parsed(36))
+    for section in ("scene", "validated"):
+        assert result[section]["environment"]["angle"] == 36
+        assert result[section]["objects"][0]["position"] == pytest.approx(expected["objects"][0]["position"], abs=1e-3)
+    assert result["parsed"]["angle_deg"] == 36
@@ -0,0 +1,74 @@
+import copy
+
+import pytest
+
+from ai_processing.scene_builder import build_parsed_spec, build_scene, incline_to_world, world_to_incline
+from ai_processing.scene_templates import fill_template, shape_key, template_matches
+
+
+def _triple(angle, mass=5.0, friction=0.2):
+    parsed = build_parsed_spec(
+        "problem", {"angle_deg": angle, "mass_kg": mass, "friction": friction, "object_type": "box", "is_incline": True}
+    )
+    scene = build_scene(parsed)
+    return {"parsed": parsed, "scene": scene, "validated": copy.deepcopy(scene)}
+
+
+def _constraints(angle, mass=5.0, friction=0.2):
+    return {"angle_deg": angle, "mass_kg": mass, "friction": friction}
+
+
+def test_shape_key_abstracts_the_numbers():
+    assert shape_key("A 5 kg box on a 30° incline") == shape_key("A 7 kg box on a 45° incline")
+    assert shape_key("A 5 kg box on a 30° incline") != shape_key("A 5 kg ball on a 30° incline")
+
+
+def test_incline_frame_round_trip():
+    for angle in (0, 12.5, 30, 60):
+        y, z = incline_to_world(0.9, 14.0, angle)
+        assert world_to_incline(y, z, angle) == pytest.approx((0.9, 14.0))
+
+
+def test_fill_rewrites_every_slot():
+    filled = fill_template(_triple(30), _constraints(30), _constraints(30, mass=8.0, friction=0.4))
+    for section in ("scene", "validated"):
+        scene = filled[section]
+        assert scene["objects"][0]["mass"] == 8.0
+        assert scene["environment"]["material"]["friction"] == 0.4
+        assert scene["objects"][0]["material"]["friction"] == 0.4
+    assert filled["parsed"]["objects"][0]["mass_kg"] == 8.0
+    assert filled["parsed"]["friction"] == 0.4
+
+
+def test_angle_change_moves_objects_with_the_incline():
+    filled = fill_template(_triple(30), _constraints(30), _constraints(45))
+    expected = _triple(45)
+    for section in ("scene", "validated"):
+        assert filled[section]["environment"]["angle"] == 45
+        assert filled[section]["objects"][0]["position"] == pytest.approx(expected[section]["objects"][0]["position"], abs=1e-3)
+
+
+def test_angle_change_refused_without_incline_geometry():
+    triple = _triple(30)
+    triple["validated"]["environment"]["type"] = "pulley"
+    assert fill_template(triple, _constraints(30), _constraints(45)) is None
+
+    triple = _triple(30)
+    del triple["scene"]["objects"][0]["position"]
+    assert fill_template(triple, _constraints(30), _constraints(45)) is None
+
+
+def test_same_angle_keeps_positions():
+    triple = _triple(30)
+    filled = fill_template(triple, _constraints(30), _constraints(30, mass=2.0))
+    assert filled["validated"]["objects"][0]["position"] == triple["validated"]["objects"][0]["position"]
+
+
+def test_fill_refuses_different_quantities():
+    assert fill_template(_triple(30), _constraints(30), _constraints(None)) is None
+
+
+def test_template_matches_checks_the_validated_scene():
+    triple = _triple(30)
+    assert template_matches(triple, _constraints(30))
+    assert not template_matches(triple, _constraints(35))
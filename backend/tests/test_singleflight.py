@@ -0,0 +1,66 @@
+import asyncio
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"scene": 1}
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r == {"scene": 1} for r in results)
+    assert flight.stats() == {"leaders": 1, "followers": 4, "in_flight": 0}
+
+
+def test_exceptions_are_shared_and_the_key_is_freed():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        again = await flight.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert again == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_leader():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_join_reports_the_leader():
+    async def scenario():
+        flight = SingleFlight()
+        first, leader = flight.join("k", lambda: asyncio.sleep(0.01, result="x"))
+        second, follower = flight.join("k", lambda: asyncio.sleep(0, result="y"))
+        return first is second, leader, follower, await first
+
+    assert asyncio.run(scenario()) == (True, True, False, "x")
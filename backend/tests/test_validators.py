@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from agents import validator_agent
+from ai_processing.scene_builder import build_parsed_spec, build_scene
+from utils.validators import compare_parsed_and_scene, repair_scene, validate_scene_json
+
+
+def _parsed(angle=30, mass=5.0, friction=0.2):
+    return build_parsed_spec(
+        "problem", {"angle_deg": angle, "mass_kg": mass, "friction": friction, "object_type": "box", "is_incline": True}
+    )
+
+
+@pytest.fixture
+def no_model(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the model should not be called")
+
+    monkeypatch.setattr(validator_agent, "call_model", fail)
+
+
+def test_compare_reports_value_mismatches():
+    parsed = _parsed()
+    scene = build_scene(parsed)
+    assert compare_parsed_and_scene(parsed, scene) == {}
+
+    scene["environment"]["angle"] = 45
+    scene["objects"][0]["mass"] = "7"
+    assert set(compare_parsed_and_scene(parsed, scene)) == {"angle_deg", "objects[0].mass_kg"}
+
+
+def test_repair_fills_converts_and_clamps():
+    parsed = _parsed(mass=None)
+    scene = {"environment": {"type": "incline", "angle": "30", "material": {"friction": 5}}, "objects": {"type": "box"}}
+
+    repaired, changes = repair_scene(scene, parsed)
+
+    assert validate_scene_json(repaired)[0]
+    assert repaired["environment"]["angle"] == 30.0
+    assert isinstance(repaired["objects"], list)
+    assert repaired["environment"]["material"]["friction"] == 0.2  # reconciled with the ParsedSpec
+    assert changes
+    assert scene["environment"]["angle"] == "30"  # input left alone
+
+
+def test_repair_reconciles_with_parsed_spec():
+    parsed = _parsed()
+    scene = build_scene(parsed)
+    scene["environment"]["type"] = "plane"
+    scene["objects"][0]["mass"] = 1
+
+    repaired, _ = repair_scene(scene, parsed)
+
+    assert compare_parsed_and_scene(parsed, repaired) == {}
+
+
+def test_valid_matching_scene_is_returned_unchanged(no_model):
+    parsed = _parsed()
+    scene = build_scene(parsed)
+    assert validator_agent.validate_and_refine(scene, parsed, "problem") is scene
+
+
+def test_valid_but_mismatched_scene_is_repaired_locally(no_model):
+    parsed = _parsed(angle=45, mass=5.0)
+    scene = build_scene(_parsed(angle=30, mass=2.0))
+
+    validated = validator_agent.validate_and_refine(scene, parsed, "problem")
+
+    assert compare_parsed_and_scene(parsed, validated) == {}
+    expected = build_scene(parsed)["objects"][0]["position"]
+    assert validated["objects"][0]["position"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_out_of_bounds_values_are_clamped_without_refinement(no_model):
+    parsed = _parsed(mass=10_000_000)
+    scene = build_scene(_parsed())
+
+    validated = validator_agent.validate_and_refine(scene, parsed, "problem")
+
+    assert validate_scene_json(validated)[0]
+
+
+def test_scene_repair_cannot_fix_goes_to_the_model(monkeypatch):
+    parsed = _parsed()
+    good = build_scene(parsed)
+    prompts = []
+    monkeypatch.setattr(validator_agent, "call_model", lambda prompt, agent: prompts.append(prompt) or json.dumps(good))
+
+    # No objects anywhere: repair has nothing to build them from.
+    validated = validator_agent.validate_and_refine({"objects": []}, dict(parsed, objects=[]), "problem")
+
+    assert validated == good
+    assert len(prompts) == 1
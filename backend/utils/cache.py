@@ -0,0 +1,263 @@
+"""
+Result cache for simulation pipelines
+- normalize_problem: canonical form of a word problem (whitespace, case, unicode units)
+- problem_key: content address (sha256) of the normalized text
+- ResultCache: in-memory LRU with TTL, optional JSON-file backing store, hit/miss counters
+
+The file store is bounded too: expired files and, past `disk_max_size`, the
+oldest files (by mtime) are swept on write, so A2A_CACHE_DIR does not grow
+without limit.
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Look-alikes students paste in for "°" and "μ"; NFKC does not fold these the way we want.
+UNICODE_VARIANTS = {
+    "º": "°",  # masculine ordinal indicator
+    "˚": "°",  # ring above
+    "∘": "°",  # ring operator
+    "µ": "μ",  # micro sign
+}
+
+_WS_RE = re.compile(r"\s+")
+_UNIT_GAP_RE = re.compile(r"(\d)\s+(°|kg\b|μ)")
+_DEGREES_RE = re.compile(r"(\d)\s*(?:degrees|degree|deg)\b")
+_MU_RE = re.compile(r"\bmu\b")
+
+# Writes between TTL sweeps of the file store (a sweep lists the directory).
+DISK_SWEEP_INTERVAL = 64
+
+
+def normalize_problem(text: str) -> str:
+    """
+    Canonical form of a problem used for cache addressing.
+
+    Args:
+        text (str): Raw problem text.
+
+    Returns:
+        str: Lowercased text with unified unicode units and collapsed whitespace.
+    """
+    for variant, canonical in UNICODE_VARIANTS.items():
+        text = text.replace(variant, canonical)
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _DEGREES_RE.sub(r"\1°", text)
+    text = _MU_RE.sub("μ", text)
+    text = _UNIT_GAP_RE.sub(r"\1\2", text)
+    return _WS_RE.sub(" ", text).strip()
+
+
+def problem_key(text: str) -> str:
+    """
+    Content address of a problem: sha256 of its normalized form.
+    """
+    return hashlib.sha256(normalize_problem(text).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU + TTL cache for pipeline results.
+    With `directory` set, entries are also written as <key>.json files and
+    read back on a memory miss, so the cache survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+        disk_max_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            max_size (int): Max entries held in memory (0 disables memory caching).
+            ttl (float | None): Seconds an entry stays valid; None means forever.
+            directory (str | None): Optional on-disk backing store.
+            disk_max_size (int | None): Max files kept in `directory` (default
+                max_size; 0 stores nothing on disk).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.directory = directory
+        self.disk_max_size = max_size if disk_max_size is None else disk_max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_count = 0
+        self._writes_since_sweep = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._sweep_disk()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self.evictions += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._put_memory(key, *entry)
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Dict[str, Any]) -> bool:
+        """
+        Store `value` under `key` in memory and, if enabled, on disk.
+
+        Returns:
+            bool: False when both stores are disabled and nothing was kept.
+        """
+        stored_at = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_memory(key, stored_at, value)
+        return self._write_disk(key, stored_at, value) or self.max_size > 0
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` has an unexpired entry, without copying it or counting a lookup."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                return True
+        if not self.directory:
+            return False
+        try:
+            return not self._expired(os.path.getmtime(self._path(key)), now)
+        except OSError:
+            return False
+
+    def clear(self) -> None:
+        """Drop every entry, including the on-disk store."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _put_memory(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[tuple]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(record["stored_at"], now):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record["stored_at"], record["value"]
+
+    def _write_disk(self, key: str, stored_at: float, value: Dict[str, Any]) -> bool:
+        if not self.directory or self.disk_max_size <= 0:
+            return False
+        path = self._path(key)
+        existed = os.path.exists(path)
+        # Write-then-rename so concurrent readers never see a partial file.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": stored_at, "value": value}, f)
+        os.replace(tmp_path, path)
+
+        with self._disk_lock:
+            self._disk_count += 0 if existed else 1
+            self._writes_since_sweep += 1
+            due = self._disk_count > self.disk_max_size or (
+                self.ttl is not None and self._writes_since_sweep >= DISK_SWEEP_INTERVAL
+            )
+        if due:
+            self._sweep_disk()
+        return True
+
+    def _sweep_disk(self) -> None:
+        """Delete expired files, then the oldest ones beyond disk_max_size."""
+        now = time.time()
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # removed by another worker
+
+        files.sort()
+        expired = [f for f in files if self._expired(f[0], now)]
+        kept = files[len(expired):]
+        excess = kept[:max(0, len(kept) - max(self.disk_max_size, 0))]
+        removed = 0
+        for _, path in expired + excess:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        with self._disk_lock:
+            self._disk_count = len(files) - removed
+            self._writes_since_sweep = 0
+        if excess:
+            with self._lock:
+                self.evictions += len(excess)
+
+
+__all__ = ["normalize_problem", "problem_key", "ResultCache"]
@@ -0,0 +1,74 @@
+"""
+Bounded execution of blocking agent work from async code
+- The Gemini SDK calls made by the agents are synchronous.
+- Running them on a shared, size-limited thread pool keeps the event loop free.
+- A2A_MAX_WORKERS controls how many blocking agent calls may run at once.
+"""
+
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+A2A_MAX_WORKERS = int(os.getenv("A2A_MAX_WORKERS", "32"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared agent executor, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool with A2A_MAX_WORKERS threads.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            # Re-check: another thread may have created it while we waited.
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=A2A_MAX_WORKERS, thread_name_prefix="a2a-agent")
+    return _executor
+
+
+def set_max_workers(max_workers: int) -> None:
+    """
+    Resize the shared executor. Calls already running finish on the old pool.
+
+    Args:
+        max_workers (int): New concurrency limit for blocking agent calls.
+    """
+    global _executor, A2A_MAX_WORKERS
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    with _executor_lock:
+        old = _executor
+        A2A_MAX_WORKERS = max_workers
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="a2a-agent")
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the shared executor and await its result.
+
+    Args:
+        func (callable): Synchronous function to run.
+        *args, **kwargs: Passed through to `func`.
+
+    Returns:
+        Any: Whatever `func` returns.
+    """
+    loop = asyncio.get_running_loop()
+    # Like asyncio.to_thread: context variables (e.g. the stage deadline) follow the call.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+__all__ = ["A2A_MAX_WORKERS", "get_executor", "set_max_workers", "run_blocking"]
@@ -0,0 +1,69 @@
+"""
+Request deadlines for the agent pipeline
+- Deadline: a point on the monotonic clock; remaining(), expired(), split()
+- deadline_scope / current_deadline: the deadline of the stage being run,
+  held in a context variable so call_model (and the Gemini request timeout)
+  see it without every agent signature carrying it
+- DeadlineExceeded: raised by call_model when a stage has no time left
+
+run_blocking copies the caller's context into the worker thread, so a scope
+opened around `await node.send_async(...)` reaches the model call.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """No time left in the current stage's budget."""
+
+
+class Deadline:
+    """
+    An absolute deadline. `seconds=None` never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = None if seconds is None else time.monotonic() + max(0.0, seconds)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None when unlimited."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def split(self, share: float, reserve: float = 0.0) -> "Deadline":
+        """
+        A sub-deadline for one stage: `share` of the time left after holding
+        back `reserve` seconds for the stages and fallbacks that follow.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return Deadline()
+        return Deadline(max(0.0, remaining - reserve) * min(1.0, max(0.0, share)))
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("a2a_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the stage running in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Make `deadline` the current one for the enclosed block."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+__all__ = ["Deadline", "DeadlineExceeded", "current_deadline", "deadline_scope"]
@@ -0,0 +1,191 @@
+"""
+Compact binary encoding for simulation responses
+- negotiate: pick JSON or the packed layout from an Accept header
+- encode_packed / decode_packed: the packed layout, for float-heavy payloads
+
+Packed layout (little-endian):
+
+    b"VSG1" | uint32 JSON length | JSON (UTF-8) | zero padding to 4 bytes | float32 data
+
+The JSON part is the response with every rectangular numeric array of at
+least MIN_PACKED values (trajectory positions, times, sweep grids) replaced
+by {"$f32": offset, "shape": [...]}, the offset counting float32s into the
+data section, and with any top-level value equal to an earlier one (the
+`validated` scene is usually the `scene`) replaced by {"$same": key}.
+Packed numbers are float32, ~7 significant digits; everything else,
+including the scenes' own short vectors, stays exact JSON.
+"""
+
+import json
+import struct
+from itertools import chain
+from typing import Any, Optional
+
+import numpy as np
+
+PACKED_MEDIA_TYPE = "application/vnd.visigen.packed"
+JSON_MEDIA_TYPE = "application/json"
+
+MAGIC = b"VSG1"
+
+# Smaller arrays cost more as a reference than as JSON text.
+MIN_PACKED = 16
+
+# Largest integer magnitude float32 holds exactly.
+MAX_EXACT_INT = 2 ** 24
+
+
+def _media_ranges(accept: str):
+    """(media type, q) for each entry of an Accept header, in header order."""
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        yield fields[0].lower(), q
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Response media type for an Accept header: PACKED_MEDIA_TYPE only when the
+    client names it with a higher (or equal, listed-first) preference than
+    JSON; wildcards and missing headers get JSON.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for media_type, q in _media_ranges(accept):
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON_MEDIA_TYPE
+        if media_type in (PACKED_MEDIA_TYPE, JSON_MEDIA_TYPE) and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def _packable(value: list) -> bool:
+    """True if every leaf of `value` is a float, or an int float32 holds exactly."""
+    level = value
+    while level:
+        kinds = set(map(type, level))
+        if kinds == {list}:
+            level = list(chain.from_iterable(level))
+            continue
+        if not kinds <= {float, int}:  # bools, None, strings, dicts or ragged nesting
+            return False
+        return int not in kinds or all(abs(v) <= MAX_EXACT_INT for v in level if type(v) is int)
+    return False
+
+
+def _as_float_array(value) -> Optional[np.ndarray]:
+    """
+    `value` as a float32 array if it is a rectangular list of numbers, else
+    None. Lists holding bools, large ints or anything non-numeric stay JSON,
+    since float32 would turn them into different values.
+    """
+    if not value or not _packable(value):
+        return None
+    try:
+        packed = np.array(value, dtype="<f4")
+    except (TypeError, ValueError):
+        return None
+    # Lists with NaN entries stay JSON, as they came.
+    if packed.dtype != np.dtype("<f4") or np.isnan(packed).any():
+        return None
+    return packed
+
+
+def _pack(value, chunks: list, offset: int):
+    """(value with numeric arrays replaced by references, new offset)."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            out[k], offset = _pack(v, chunks, offset)
+        return out, offset
+    if isinstance(value, list):
+        packed = _as_float_array(value)
+        if packed is not None and packed.size >= MIN_PACKED:
+            chunks.append(packed.ravel())
+            return {"$f32": offset, "shape": list(packed.shape)}, offset + packed.size
+        out = []
+        for v in value:
+            item, offset = _pack(v, chunks, offset)
+            out.append(item)
+        return out, offset
+    return value, offset
+
+
+def encode_packed(payload: Any) -> bytes:
+    """
+    Encode a JSON-compatible payload in the packed layout.
+
+    Args:
+        payload: Response body (dicts, lists, numbers, strings, None).
+
+    Returns:
+        bytes: MAGIC, header length, JSON header and float32 section.
+    """
+    if isinstance(payload, dict):
+        deduped = {}
+        for key, value in payload.items():
+            same = None
+            if isinstance(value, (dict, list)) and value:
+                same = next((k for k, v in payload.items() if k == key or v == value), None)
+            deduped[key] = value if same in (None, key) else {"$same": same}
+        payload = deduped
+
+    chunks = []
+    body, _ = _pack(payload, chunks, 0)
+    header = json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+    padding = b"\0" * (-len(header) % 4)
+    data = np.concatenate(chunks).tobytes() if chunks else b""
+    return MAGIC + struct.pack("<I", len(header)) + header + padding + data
+
+
+def _unpack(value, floats: np.ndarray):
+    if isinstance(value, dict):
+        if "$f32" in value and "shape" in value:
+            offset, shape = value["$f32"], value["shape"]
+            size = int(np.prod(shape))
+            return floats[offset:offset + size].reshape(shape).tolist()
+        return {k: _unpack(v, floats) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack(v, floats) for v in value]
+    return value
+
+
+def decode_packed(data: bytes) -> Any:
+    """
+    Inverse of `encode_packed` (packed numbers come back as float32 values).
+
+    Raises:
+        ValueError: If `data` is not in the packed layout.
+    """
+    if data[:4] != MAGIC or len(data) < 8:
+        raise ValueError("Not a packed simulation payload")
+    (length,) = struct.unpack_from("<I", data, 4)
+    header = json.loads(data[8:8 + length].decode("utf-8"))
+    floats = np.frombuffer(data, dtype="<f4", offset=8 + length + (-length % 4))
+
+    payload = _unpack(header, floats)
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if isinstance(value, dict) and set(value) == {"$same"}:
+                payload[key] = payload[value["$same"]]
+    return payload
+
+
+__all__ = [
+    "PACKED_MEDIA_TYPE",
+    "JSON_MEDIA_TYPE",
+    "MIN_PACKED",
+    "negotiate",
+    "encode_packed",
+    "decode_packed",
+]
@@ -0,0 +1,24 @@
+"""
+.env loading shared by the API entry point and the Gemini backend
+- load_env: reads .env into os.environ once per process
+"""
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """Load .env (without overriding variables already set), at most once."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
+
+
+__all__ = ["load_env"]
@@ -0,0 +1,70 @@
+"""
+HTTP projection and caching helpers for simulation results
+- parse_fields / project: `?fields=validated,trajectory` response projection
+- result_etag: strong ETag from the problem's content address and the result
+- etag_matches: If-None-Match evaluation for conditional GETs
+
+A result is addressed by problem_key (sha256 of the normalized problem), so
+the same problem always maps to the same resource; the ETag additionally
+hashes the stored result and the representation (fields, media type), so it
+changes whenever any of them would change the bytes sent.
+"""
+
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+RESULT_FIELDS = ("status", "message", "key", "problem", "parsed", "scene", "validated", "trajectory", "degraded")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Requested fields from a comma-separated `fields` query value.
+
+    Returns:
+        list | None: Field names in RESULT_FIELDS order, or None for "everything".
+
+    Raises:
+        ValueError: On a field the result does not have.
+    """
+    if fields is None or not fields.strip():
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested.difference(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; expected any of {', '.join(RESULT_FIELDS)}")
+    return [f for f in RESULT_FIELDS if f in requested]
+
+
+def project(body: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """`body` restricted to `fields` (all of it when fields is None)."""
+    if fields is None:
+        return body
+    return {f: body[f] for f in fields if f in body}
+
+
+def result_etag(key: str, result: Dict[str, Any], *variant: Any) -> str:
+    """
+    Strong ETag for one representation of a stored result.
+
+    Args:
+        key (str): problem_key of the normalized problem.
+        result (dict): The stored parsed/scene/validated stages.
+        *variant: Anything else that shapes the response (fields, media type).
+    """
+    digest = hashlib.sha256(json.dumps(result, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(json.dumps(variant, default=str).encode("utf-8"))
+    return f'"{key[:16]}-{digest.hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+__all__ = ["RESULT_FIELDS", "parse_fields", "project", "result_etag", "etag_matches"]
@@ -0,0 +1,346 @@
+"""
+Pluggable LLM backends shared by all agents
+- LLMBackend: interface, `generate(prompt, generation_config) -> str`
+- GeminiBackend: Google Gemini via google.generativeai (SDK imported lazily, models pooled)
+- RecordingBackend: wraps another backend and appends every exchange to a JSONL file
+- ReplayBackend: serves recorded responses offline with simulated latency
+- get_backend / set_backend: process-wide selection (LLM_BACKEND env var)
+- call_model: what the agents call; runs each request under the resilience
+  policy (utils/resilience.py), times it and records prompt/response sizes and
+  tokens (as reported by the provider, else estimated from the text)
+
+LLM_BACKEND=gemini (default) | record | replay
+LLM_RECORD_FILE / LLM_REPLAY_FILE: JSONL path (default llm_recordings.jsonl)
+LLM_REPLAY_LATENCY: seconds added to each replayed call (default 0)
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.env import load_env
+from utils.logger import log
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.resilience import get_policy
+from utils.metrics import (
+    LLM_DURATION, LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS, LLM_PROMPT_TOKENS, LLM_RESPONSE_TOKENS, LLM_TOKENS, span,
+)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_RECORDING_FILE = "llm_recordings.jsonl"
+
+# Rough characters per token for English prose and JSON, used when a backend
+# does not report usage.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def prompt_fingerprint(prompt: str, generation_config: Optional[Dict[str, Any]] = None, model: str = DEFAULT_MODEL) -> str:
+    """Stable key for one model request, used to match recordings."""
+    payload = json.dumps({"model": model, "prompt": prompt, "config": generation_config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMBackend:
+    """
+    Minimal text-in / text-out model interface the agents depend on.
+    """
+
+    name = "base"
+    model = DEFAULT_MODEL
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Args:
+            prompt (str): Full prompt text.
+            generation_config (dict | None): Provider options, e.g. response_schema.
+
+        Returns:
+            str: Raw model output text.
+        """
+        raise NotImplementedError
+
+    def generate_with_usage(
+        self, prompt: str, generation_config: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        `generate` plus the provider's token usage, {"prompt", "response",
+        "cached_prompt"}, or None when the backend cannot report it.
+        """
+        return self.generate(prompt, generation_config), None
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Calls Gemini. The SDK is imported and configured on first use, so
+    importing the agents (or main.py) neither pulls it in nor requires
+    GOOGLE_API_KEY. GenerativeModel instances are pooled per generation
+    config and shared by every agent and request.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None):
+        self.model = model
+        self._api_key = api_key
+        self._genai = None
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        if self._genai is not None:
+            return self._genai
+        with self._lock:
+            if self._genai is None:
+                load_env()
+                api_key = self._api_key or os.getenv('GOOGLE_API_KEY')
+                if not api_key:
+                    raise EnvironmentError("Missing GOOGLE_API_KEY in .env file")
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                self._genai = genai
+        return self._genai
+
+    def get_model(self, generation_config: Optional[Dict[str, Any]] = None):
+        """The shared GenerativeModel for `generation_config`, created on first request."""
+        key = json.dumps(generation_config, sort_keys=True, default=str)
+        model = self._models.get(key)
+        if model is None:
+            genai = self._configure()
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = genai.GenerativeModel(self.model, generation_config=generation_config)
+                    self._models[key] = model
+        return model
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        return self.generate_with_usage(prompt, generation_config)[0]
+
+    def generate_with_usage(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None):
+        deadline = current_deadline()
+        timeout = deadline.remaining() if deadline is not None else None
+        request_options = {"timeout": timeout} if timeout is not None else None
+        response = self.get_model(generation_config).generate_content(prompt, request_options=request_options)
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return response.text, None
+        return response.text, {
+            "prompt": getattr(metadata, "prompt_token_count", 0) or 0,
+            "response": getattr(metadata, "candidates_token_count", 0) or 0,
+            "cached_prompt": getattr(metadata, "cached_content_token_count", 0) or 0,
+        }
+
+
+class RecordingBackend(LLMBackend):
+    """
+    Passes calls through to `inner` and appends {key, prompt, response} lines
+    to `path`, producing a file ReplayBackend can serve.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: LLMBackend, path: str = DEFAULT_RECORDING_FILE):
+        self.inner = inner
+        self.model = inner.model
+        self.path = path
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        return self.generate_with_usage(prompt, generation_config)[0]
+
+    def generate_with_usage(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None):
+        text, usage = self.inner.generate_with_usage(prompt, generation_config)
+        record = {
+            "key": prompt_fingerprint(prompt, generation_config, self.model),
+            "prompt": prompt,
+            "response": text,
+            "usage": usage,
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return text, usage
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Serves recorded responses without any network access.
+
+    Responses are matched on the prompt fingerprint. Each call sleeps for
+    `latency` seconds (plus up to `jitter` more) to mimic the real service.
+    Unmatched prompts return `default_response` if set, else raise LookupError.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        responses: Optional[Dict[str, str]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        default_response: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            path (str | None): JSONL file written by RecordingBackend.
+            responses (dict | None): Extra {fingerprint: response} entries.
+            latency (float): Base simulated latency in seconds.
+            jitter (float): Max extra random latency in seconds.
+            default_response (str | None): Served for unknown prompts.
+            model (str): Model name used in fingerprints.
+            seed (int | None): Seed for the jitter, for repeatable runs.
+        """
+        self.model = model
+        self.latency = latency
+        self.jitter = jitter
+        self.default_response = default_response
+        self.calls = 0
+        self.misses = 0
+        self._rng = random.Random(seed)
+        self._responses: Dict[str, str] = {}
+
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._responses[record["key"]] = record["response"]
+        if responses:
+            self._responses.update(responses)
+
+    def add(self, prompt: str, response: str, generation_config: Optional[Dict[str, Any]] = None) -> None:
+        """Register a response for an exact prompt."""
+        self._responses[prompt_fingerprint(prompt, generation_config, self.model)] = response
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        self.calls += 1
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        key = prompt_fingerprint(prompt, generation_config, self.model)
+        if key in self._responses:
+            return self._responses[key]
+
+        self.misses += 1
+        if self.default_response is not None:
+            return self.default_response
+        raise LookupError(f"No recorded response for prompt {key[:12]}")
+
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _backend_from_env() -> LLMBackend:
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "replay":
+        return ReplayBackend(
+            path=os.getenv("LLM_REPLAY_FILE", DEFAULT_RECORDING_FILE),
+            latency=float(os.getenv("LLM_REPLAY_LATENCY", "0")),
+        )
+    if kind == "record":
+        return RecordingBackend(GeminiBackend(), os.getenv("LLM_RECORD_FILE", DEFAULT_RECORDING_FILE))
+    if kind == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+
+
+def get_backend() -> LLMBackend:
+    """The process-wide backend, created from LLM_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _backend_from_env()
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Swap the process-wide backend (None re-reads LLM_BACKEND on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def call_model(
+    prompt: str, agent: str, generation_config: Optional[Dict[str, Any]] = None, idempotent: bool = True
+) -> str:
+    """
+    Send one prompt through the current backend, inside a latency span.
+    Slow requests are hedged and transient failures retried; once the
+    circuit breaker opens, calls fail fast with ModelUnavailable.
+    Raises DeadlineExceeded instead of calling when the current stage's
+    deadline (utils/deadline.py) has already passed.
+
+    Args:
+        prompt (str): Full prompt text.
+        agent (str): Caller name used as the metrics label (e.g. 'ParserAgent').
+        generation_config (dict | None): Provider options.
+        idempotent (bool): Whether the request may be hedged and retried.
+
+    Returns:
+        str: Raw model output text.
+
+    Raises:
+        ModelUnavailable: No answer (breaker open or retries exhausted).
+    """
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"{agent}: request budget exhausted before the model call")
+
+    backend = get_backend()
+    LLM_PROMPT_CHARS.observe(len(prompt), agent=agent)
+    policy = get_policy()
+    with span(LLM_DURATION, agent=agent, backend=backend.name):
+        if policy is None:
+            text, usage = backend.generate_with_usage(prompt, generation_config)
+        else:
+            text, usage = policy.call(agent, lambda: backend.generate_with_usage(prompt, generation_config), idempotent)
+    LLM_RESPONSE_CHARS.observe(len(text), agent=agent)
+    _record_usage(agent, prompt, text, usage)
+    return text
+
+
+def _record_usage(agent: str, prompt: str, text: str, usage: Optional[Dict[str, int]]) -> None:
+    """Token metrics for one call: the provider's counts, or estimates from the text."""
+    if usage:
+        source = "reported"
+        prompt_tokens, response_tokens = usage.get("prompt", 0), usage.get("response", 0)
+        cached_tokens = usage.get("cached_prompt", 0)
+    else:
+        source = "estimated"
+        prompt_tokens, response_tokens, cached_tokens = estimate_tokens(prompt), estimate_tokens(text), 0
+
+    LLM_PROMPT_TOKENS.observe(prompt_tokens, agent=agent)
+    LLM_RESPONSE_TOKENS.observe(response_tokens, agent=agent)
+    LLM_TOKENS.inc(prompt_tokens, agent=agent, kind="prompt", source=source)
+    LLM_TOKENS.inc(response_tokens, agent=agent, kind="response", source=source)
+    if cached_tokens:
+        LLM_TOKENS.inc(cached_tokens, agent=agent, kind="cached_prompt", source=source)
+    log(agent, "Tokens (%s): prompt=%d (cached %d), response=%d", "debug",
+        source, prompt_tokens, cached_tokens, response_tokens)
+
+
+__all__ = [
+    "LLMBackend",
+    "GeminiBackend",
+    "RecordingBackend",
+    "ReplayBackend",
+    "prompt_fingerprint",
+    "estimate_tokens",
+    "get_backend",
+    "set_backend",
+    "call_model",
+]
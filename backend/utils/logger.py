@@ -1,25 +1,218 @@
 """
 Logger function shared by all agents
+- DEBUG (grey)
 - INFO (yellow)
 - SUCCESS (green)
+- WARN (orange)
 - ERROR (red)
+
+Records below LOG_LEVEL are dropped before any formatting happens.
+Enabled records are %-formatted by the caller, so a dict that is changed
+after the call is logged as it was, and handed to a background writer
+thread, which does the timestamping and stdout/file writes off the request path.
+Set LOG_TO_FILE to a path to also write JSON lines there, and LOG_ASYNC=0
+to write synchronously (handy when debugging).
 """
 
+import os
+import sys
+import json
+import atexit
+import queue
+import time
+import reprlib
 import datetime
+import threading
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()
+LOG_TO_FILE = os.getenv("LOG_TO_FILE") or None
+LOG_ASYNC = os.getenv("LOG_ASYNC", "1") != "0"
 
-LOG_TO_FILE = False
+LEVELS = {
+    "debug": 10,
+    "info": 20,
+    "success": 25,
+    "warn": 30,
+    "error": 40,
+}
 COLORS = {
+    "debug": "\033[90m",
     "info": "\033[93m",
     "success": "\033[92m",
+    "warn": "\033[33m",
     "error": "\033[91m",
     "reset": "\033[0m"
 }
 
-def log(agent: str, message: str, level: str = 'info') -> None:
+_threshold = LEVELS.get(LOG_LEVEL, LEVELS["info"])
+
+# Bounded repr: caps depth, items per container and string length, so large
+# scene dicts are never rendered in full just to be cut down for a log line.
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxdict = 8
+_repr.maxlist = 6
+_repr.maxstring = 120
+_repr.maxother = 120
+
+
+def truncate(data, max_len: int = 250) -> str:
+    """
+    Short, bounded representation of `data` for log lines.
+    Strings are sliced directly; containers go through a bounded repr.
+    """
+    text = data if isinstance(data, str) else _repr.repr(data)
+    return text[:max_len] + ("..." if len(text) > max_len else "")
+
+
+class Truncated:
+    """Log argument rendered with `truncate` only when its level is enabled."""
+
+    __slots__ = ("data", "max_len")
+
+    def __init__(self, data, max_len: int = 250):
+        self.data = data
+        self.max_len = max_len
+
+    def __str__(self) -> str:
+        return truncate(self.data, self.max_len)
+
+
+def is_enabled(level: str) -> bool:
+    """True if records at `level` would be written."""
+    return LEVELS.get(level, LEVELS["info"]) >= _threshold
+
+
+def set_level(level: str) -> None:
+    """Change the minimum level at runtime."""
+    global _threshold
+    _threshold = LEVELS[level]
+
+
+def _format(message, args) -> str:
+    if callable(message):
+        message = message()
+    if args:
+        try:
+            message = message % args
+        except Exception as e:
+            message = f"{message} [log formatting failed: {e}]"
+    return message
+
+
+def _write(record, file_handle) -> None:
+    created, agent, level, message = record
+    stamp = datetime.datetime.fromtimestamp(created)
     color = COLORS.get(level, COLORS['info'])
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted = f"[{timestamp}] [{agent}] [{level.upper()}] {message}"
+    formatted = f"[{stamp.strftime('%Y-%m-%d %H:%M:%S')}] [{agent}] [{level.upper()}] {message}"
+    sys.stdout.write(f"{color}{formatted}{COLORS['reset']}\n")
+
+    if file_handle is not None:
+        file_handle.write(json.dumps({
+            "ts": stamp.isoformat(timespec="milliseconds"),
+            "agent": agent,
+            "level": level,
+            "message": message,
+        }) + "\n")
+
+
+class _Writer:
+    """Single background thread draining log records from a queue."""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.file = open(LOG_TO_FILE, "a", encoding="utf-8", buffering=1) if LOG_TO_FILE else None
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            if isinstance(record, threading.Event):
+                sys.stdout.flush()
+                record.set()
+                continue
+            try:
+                _write(record, self.file)
+            except Exception as e:
+                sys.stderr.write(f"logger: failed to write record: {e}\n")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join(timeout=5.0)
+        sys.stdout.flush()
+        if self.file is not None:
+            self.file.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_sync_file = None
+
+
+def _get_writer() -> _Writer:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _Writer()
+    return _writer
+
+
+def _reset_after_fork() -> None:
+    # The writer thread does not survive fork(); each worker starts its own.
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def log(agent: str, message, level: str = 'info', *args) -> None:
+    """
+    Queue one log line.
+
+    Args:
+        agent (str): Source name shown in brackets.
+        message (str | callable): Text, a %-format string for `args`, or a
+            zero-argument callable producing the text. Formatting only runs
+            if `level` is enabled; only the write is left to the writer thread.
+        level (str): debug | info | success | warn | error.
+        *args: Values for %-formatting `message`.
+    """
+    if LEVELS.get(level, LEVELS["info"]) < _threshold:
+        return
+
+    global _sync_file
+    record = (time.time(), agent, level, _format(message, args))
+    if LOG_ASYNC:
+        _get_writer().queue.put(record)
+        return
+
+    if LOG_TO_FILE and _sync_file is None:
+        _sync_file = open(LOG_TO_FILE, "a", encoding="utf-8", buffering=1)
+    _write(record, _sync_file)
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Block until every record queued so far has been written."""
+    if _writer is not None:
+        _writer.flush(timeout)
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _writer is not None:
+        _writer.close()
 
-    print(f"{color}{formatted}{COLORS['reset']}")
 
-__all__ = ["log"]
\ No newline at end of file
+__all__ = ["log", "flush", "truncate", "Truncated", "is_enabled", "set_level"]
@@ -0,0 +1,236 @@
+"""
+In-process metrics with Prometheus text exposition
+- Counter / Histogram: labelled, thread-safe
+- span: context manager timing a block into a histogram
+- register_collector: callbacks that add gauges at scrape time (cache sizes, etc.)
+- render: text for the /metrics route
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts..., sum, count]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(_label_key(self.labelnames, labels))
+            return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                base = list(zip(self.labelnames, key))
+                for bound, n in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(base + [('le', _format_value(bound))])} {n}")
+                lines.append(f"{self.name}_bucket{_format_labels(base + [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(base)} {series[-1]}")
+        return lines
+
+
+_metrics: Dict[str, object] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]] = []
+_registry_lock = threading.Lock()
+
+
+def counter(name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    """Get or create a registered Counter."""
+    with _registry_lock:
+        if name not in _metrics:
+            _metrics[name] = Counter(name, help_text, labelnames)
+        return _metrics[name]
+
+
+def histogram(name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    """Get or create a registered Histogram."""
+    with _registry_lock:
+        if name not in _metrics:
+            _metrics[name] = Histogram(name, help_text, labelnames, buckets)
+        return _metrics[name]
+
+
+def register_collector(fn: Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]) -> None:
+    """
+    Add a scrape-time callback yielding (name, help, labels, value) gauge samples.
+    """
+    with _registry_lock:
+        _collectors.append(fn)
+
+
+@contextmanager
+def span(hist: Histogram, **labels):
+    """
+    Time the enclosed block into `hist`. If the histogram has a `status`
+    label, a raised exception is recorded as status="error".
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        if "status" in hist.labelnames:
+            labels["status"] = status
+        hist.observe(time.perf_counter() - start, **labels)
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+
+    gauges: Dict[str, Tuple[str, List[Tuple[Dict[str, str], float]]]] = {}
+    for collect in collectors:
+        for name, help_text, labels, value in collect():
+            gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+    for name, (help_text, samples) in gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# Pipeline metrics shared by the agents, the LLM layer and the orchestrator.
+AGENT_DURATION = histogram(
+    "a2a_agent_duration_seconds", "Time spent in one AgentNode.send call", ("agent", "status"))
+LLM_DURATION = histogram(
+    "llm_call_duration_seconds", "Latency of one model call", ("agent", "backend", "status"))
+LLM_PROMPT_CHARS = histogram(
+    "llm_prompt_chars", "Prompt size per model call, in characters", ("agent",), SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = histogram(
+    "llm_response_chars", "Response size per model call, in characters", ("agent",), SIZE_BUCKETS)
+LLM_PROMPT_TOKENS = histogram(
+    "llm_prompt_tokens", "Input tokens per model call", ("agent",), TOKEN_BUCKETS)
+LLM_RESPONSE_TOKENS = histogram(
+    "llm_response_tokens", "Output tokens per model call", ("agent",), TOKEN_BUCKETS)
+LLM_TOKENS = counter(
+    "llm_tokens_total", "Model tokens by direction (cached_prompt is the part of prompt served from the provider cache)",
+    ("agent", "kind", "source"))
+LLM_RESILIENCE = counter(
+    "llm_resilience_events_total",
+    "Hedged requests (and hedges that won), retries, breaker rejections, deadline expiries and give-ups per agent", ("agent", "event"))
+VALIDATOR_REFINEMENTS = counter(
+    "validator_refinements_total", "Validator runs by whether LLM refinement was needed", ("outcome",))
+JSON_FALLBACKS = counter(
+    "json_repair_fallbacks_total", "Times an agent fell back after bad or incomplete model JSON", ("agent", "kind"))
+SIMULATION_RESULTS = counter(
+    "a2a_simulation_results_total", "Simulation results by where they came from", ("source",))
+SPECULATIVE_SCENES = counter(
+    "a2a_speculative_scenes_total",
+    "SceneAgent runs started on the locally extracted ParsedSpec, by whether the scene was kept", ("outcome",))
+PIPELINE_DEGRADATIONS = counter(
+    "a2a_degraded_stages_total", "Pipeline stages replaced by a local fallback (timeout or model unavailable)", ("stage", "reason"))
+
+
+__all__ = [
+    "AGENT_DURATION",
+    "LLM_DURATION",
+    "LLM_PROMPT_CHARS",
+    "LLM_RESPONSE_CHARS",
+    "LLM_PROMPT_TOKENS",
+    "LLM_RESPONSE_TOKENS",
+    "LLM_TOKENS",
+    "LLM_RESILIENCE",
+    "VALIDATOR_REFINEMENTS",
+    "JSON_FALLBACKS",
+    "SIMULATION_RESULTS",
+    "SPECULATIVE_SCENES",
+    "PIPELINE_DEGRADATIONS",
+    "Counter",
+    "Histogram",
+    "counter",
+    "histogram",
+    "register_collector",
+    "span",
+    "render",
+    "LATENCY_BUCKETS",
+    "SIZE_BUCKETS",
+    "TOKEN_BUCKETS",
+]
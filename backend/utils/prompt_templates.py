@@ -0,0 +1,308 @@
+"""
+Prompt templates shared by the agents
+- PromptTemplate: fixed instruction prefix + short variable suffix, compiled once
+- PARSER_PROMPT, SCENE_PROMPT, SCENE_SECTIONS_PROMPT, VALIDATOR_PROMPT, FUSED_PROMPT, EXTRACTOR_PROMPT
+- compact_json: the JSON form every template splices values in as
+
+Everything that does not depend on the request (role, formats, rules,
+examples) lives in the prefix, byte-identical on every call, so the
+provider's prefix/context caching can reuse it. The suffix only carries the
+problem text and the documents the agent works on, as non-indented JSON.
+"""
+
+import json
+import string
+from textwrap import dedent
+from typing import Any, List, Tuple
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class PromptTemplate:
+    """
+    A prompt split into a static prefix and a `str.format`-style suffix.
+    Placeholders are only allowed in the suffix; dicts and lists passed to
+    `render` are inserted as compact JSON, everything else with str().
+    """
+
+    def __init__(self, name: str, prefix: str, suffix: str):
+        self.name = name
+        self.prefix = dedent(prefix).strip() + "\n\n"
+        # Pre-split the suffix into (literal, field) pairs so render is a join.
+        self._parts: List[Tuple[str, str]] = [
+            (literal, field or "") for literal, field, _, _ in string.Formatter().parse(dedent(suffix).strip() + "\n")
+        ]
+        self.fields = tuple(field for _, field in self._parts if field)
+
+    def render(self, **values: Any) -> str:
+        """Full prompt text for one call."""
+        out = [self.prefix]
+        for literal, field in self._parts:
+            out.append(literal)
+            if field:
+                value = values[field]
+                out.append(compact_json(value) if isinstance(value, (dict, list)) else str(value))
+        return "".join(out)
+
+
+PARSER_PROMPT = PromptTemplate(
+    "ParserAgent",
+    """
+    You are a Physics Problem Parser.
+    Your job is to read a natural-language physics problem and extract all key details
+    for building a 3D physics simulation.
+
+    ---
+
+    OUTPUT FORMAT (must always be valid JSON):
+    {
+    "environment_type": "string (incline | plane | pulley | unknown)",
+    "angle_deg": "float or null",
+    "friction": "float or null",
+    "objects": [{"type": "string (e.g., box, sphere, ball)", "mass_kg": "float or null"}],
+    "extra_terms": {"key": "value"},
+    "source_text": "original input text"
+    }
+
+    ---
+
+    RULES:
+    1. Output only JSON, no explanations or markdown.
+    2. All keywords and types should be lowercase.
+    3. Use null if a value is not explicitly stated.
+    4. Detect angles (in degrees) and friction coefficients.
+    5. Detect object masses and assign them to "mass_kg".
+    6. Recognize environment context (incline, plane, pulley, etc.).
+    7. Use conservative defaults — do not assume values not mentioned.
+    8. Include "source_text" identical to the given problem.
+    9. Return nothing except the final JSON object.
+
+    ---
+
+    EXAMPLE:
+    Problem: "A 5 kg box slides down a 30° incline with friction coefficient 0.2."
+    Output: {"environment_type":"incline","angle_deg":30,"friction":0.2,"objects":[{"type":"box","mass_kg":5}],"extra_terms":{},"source_text":"A 5 kg box slides down a 30° incline with friction coefficient 0.2."}
+
+    ---
+
+    Process the problem below carefully and return only the JSON.
+    """,
+    '''
+    Problem:
+    """{problem}"""
+    ''',
+)
+
+SCENE_PROMPT = PromptTemplate(
+    "SceneAgent",
+    """
+    You are a Physics Simulation Scene Generator.
+
+    Your job is to take structured physics data (ParsedSpec) and generate
+    a complete 3D physics simulation configuration (SceneJSON) that can
+    be rendered in Three.js + Cannon.js.
+
+    ---
+
+    INPUT FORMAT (ParsedSpec):
+    {"environment_type": "string (incline | plane | pulley | unknown)", "angle_deg": "float or null", "friction": "float or null", "objects": [{"type": "string", "mass_kg": "float or null"}], "extra_terms": {"key": "value"}, "source_text": "original problem text"}
+
+    ---
+
+    OUTPUT FORMAT (SceneJSON):
+    {
+    "scene": {
+        "gravity": {"x": 0, "y": -9.81, "z": 0},
+        "camera": {"position": {"x": 5, "y": 5, "z": 10}, "lookAt": {"x": 0, "y": 0, "z": 0}},
+        "lighting": [{"type": "ambient", "intensity": 0.5}, {"type": "directional", "direction": {"x": 0.5, "y": -1, "z": 0.5}, "intensity": 0.8}]
+    },
+    "environment": {
+        "type": "string (from environment_type)",
+        "angle": "float (use angle_deg if available)",
+        "material": {"friction": "float (use friction if available)", "restitution": 0.2}
+    },
+    "objects": [{
+        "type": "string",
+        "mass": "float",
+        "size": {"width": 1, "height": 1, "depth": 1},
+        "position": {"x": 0, "y": 2, "z": 0},
+        "material": {"color": "#E2562C", "friction": "float", "restitution": 0.3}
+    }],
+    "simulation": {"timestep": 0.016, "duration": 5.0, "solver": "Cannon"}
+    }
+
+    ---
+
+    RULES:
+    1. Use ParsedSpec values to guide physics setup.
+    2. If environment_type = "incline", include "angle".
+    3. If friction is missing, assume 0.3.
+    4. If mass is missing, assume 1.
+    5. Return only valid JSON, no markdown or text.
+    6. Maintain physical realism — gravity must act downward (y = -9.81).
+    7. Ensure each object rests correctly on its environment (e.g., above incline).
+    8. Use lowercase for keywords.
+
+    ---
+
+    Return only the SceneJSON for the ParsedSpec below.
+    """,
+    '''
+    ParsedSpec:
+    """{parsed}"""
+    ''',
+)
+
+SCENE_SECTIONS_PROMPT = PromptTemplate(
+    "SceneAgent",
+    """
+    You are a Physics Simulation Scene Section Repairer.
+
+    A SceneJSON for Three.js + Cannon.js has top-level sections "scene",
+    "environment", "objects" and "simulation". Some of them were rejected by
+    validation. Regenerate ONLY the listed sections so they match the
+    ParsedSpec and the rest of the SceneJSON.
+
+    ---
+
+    SECTION FORMATS:
+    - "scene": {"gravity": {"x": 0, "y": -9.81, "z": 0}, "camera": {"position": {"x": 5, "y": 5, "z": 10}, "lookAt": {"x": 0, "y": 0, "z": 0}}, "lighting": [{"type": "ambient", "intensity": 0.5}]}
+    - "environment": {"type": "incline | plane | pulley | unknown", "angle": "float (inclines)", "material": {"friction": "float", "restitution": 0.2}}
+    - "objects": [{"type": "string", "mass": "float", "size": {"width": 1, "height": 1, "depth": 1}, "position": {"x": 0, "y": 2, "z": 0}, "material": {"color": "#E2562C", "friction": "float", "restitution": 0.3}}]
+    - "simulation": {"timestep": 0.016, "duration": 5.0, "solver": "Cannon"}
+
+    ---
+
+    RULES:
+    1. Return one JSON object whose keys are exactly the listed sections.
+    2. Use ParsedSpec values; friction defaults to 0.3 and mass to 1.
+    3. Objects must rest on the environment given in the SceneJSON.
+    4. Numbers as numbers, lowercase keywords, no markdown or text.
+    """,
+    '''
+    Sections: {sections}
+
+    ParsedSpec:
+    """{parsed}"""
+
+    SceneJSON:
+    """{scene}"""
+    ''',
+)
+
+VALIDATOR_PROMPT = PromptTemplate(
+    "ValidatorAgent",
+    """
+    You are a Physics Simulation Validator and Refiner.
+    Your task is to ensure a simulation JSON accurately represents
+    a given word problem and parsed specification.
+
+    ---
+
+    INPUTS
+    1. Problem Text: the full physics word problem
+    2. ParsedSpec: structured description (environment, friction, mass, etc.)
+    3. SceneJSON: proposed simulation setup for Three.js + Cannon.js
+
+    ---
+
+    YOUR JOB
+    - Verify that SceneJSON matches the ParsedSpec.
+    - Fix missing or incorrect fields.
+    - Ensure consistency with physical reality.
+
+    ---
+
+    CHECKLIST
+    1. Does environment.type match ParsedSpec.environment_type?
+    2. If environment_type = "incline", ensure angle is present and numeric.
+    3. If friction is missing or unrealistic (<0 or >1), replace with 0.3.
+    4. If object mass or type is missing, use ParsedSpec.objects values.
+    5. Ensure each object has a valid position (above environment).
+    6. Add default camera, lighting, and gravity if missing.
+    7. Simulation block must include: timestep, duration, solver.
+    8. All numbers must be floats, not strings.
+    9. Return only valid JSON (no text, no comments).
+
+    ---
+
+    Return only the corrected SceneJSON for the inputs below.
+    """,
+    '''
+    Problem Text:
+    """{problem}"""
+
+    ParsedSpec:
+    """{parsed}"""
+
+    SceneJSON:
+    """{scene}"""
+    ''',
+)
+
+FUSED_PROMPT = PromptTemplate(
+    "FusedAgent",
+    """
+    You are a Physics Simulation Compiler for Three.js + Cannon.js.
+    From the problem below return one JSON object with two keys:
+    - "parsed": the ParsedSpec (environment_type incline|plane|pulley|unknown, angle_deg, friction, objects[{type, mass_kg}]); use null for values not stated.
+    - "scene": the SceneJSON (scene, environment, objects, simulation) built from that ParsedSpec.
+
+    Scene rules:
+    - gravity {"x": 0, "y": -9.81, "z": 0}; camera at (5, 5, 10) looking at the origin; ambient + directional lighting.
+    - environment.type = parsed.environment_type; include environment.angle for inclines.
+    - friction defaults to 0.3 and mass to 1 when missing; restitution 0.2 for the environment, 0.3 for objects.
+    - Each object gets size, a position resting on the environment, and material {color, friction, restitution}.
+    - simulation {"timestep": 0.016, "duration": 5.0, "solver": "Cannon"}.
+    - Lowercase keywords, SI units, numbers as numbers.
+    - Values listed as already extracted from the text must be used verbatim when not null.
+    """,
+    '''
+    Already extracted: {constraints}
+
+    Problem:
+    """{problem}"""
+    ''',
+)
+
+EXTRACTOR_PROMPT = PromptTemplate(
+    "SimulationExtractor",
+    """
+    You convert physics word problems into a JSON scene for a 3D simulation.
+    You MUST honor the CONSTRAINTS given with the problem EXACTLY: use each
+    value verbatim when it is not null.
+
+    Rules:
+    - If constraints.angle_deg is not null -> environment.type = "incline" and environment.angle = that exact number.
+    - If constraints.is_incline is true and angle_deg is null -> still use "incline" but omit angle.
+    - If constraints.object_type is not null -> objects[0].type = that exact value.
+    - If constraints.mass_kg is not null -> objects[0].mass = that exact value.
+    - If constraints.friction is not null -> set BOTH environment.material.friction and objects[0].material.friction to that exact value.
+    - Always use gravity -9.81 on Y.
+    - Use meters, kilograms, seconds.
+    - Return ONLY JSON (no markdown, no text).
+
+    The JSON MUST have these keys: scene, environment, objects, simulation.
+    """,
+    '''
+    CONSTRAINTS: {constraints}
+
+    Problem:
+    """{problem}"""
+    ''',
+)
+
+
+__all__ = [
+    "PromptTemplate",
+    "compact_json",
+    "PARSER_PROMPT",
+    "SCENE_PROMPT",
+    "SCENE_SECTIONS_PROMPT",
+    "VALIDATOR_PROMPT",
+    "FUSED_PROMPT",
+    "EXTRACTOR_PROMPT",
+]
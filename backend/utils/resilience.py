@@ -0,0 +1,399 @@
+"""
+Resilient model calls, applied by call_model to every agent's requests
+- CircuitBreaker: opens after consecutive transient failures, lets one probe through after a cooldown
+- LatencyTracker: recent per-agent latencies; their percentile is the hedging delay
+- ResiliencePolicy.call: breaker check → attempt (hedged when slow) → jittered-backoff retries
+- ModelUnavailable: the policy gave up (breaker open or retries exhausted)
+- is_transient / is_rejection: retryable failures vs. the provider rejecting the
+  request; only those two say anything about the service to the breaker
+- failure_scope: collects ModelUnavailable raised inside a block even when the
+  caller turns it into an {"error"} payload, so AgentNode can flag the response
+  and the orchestrator answers with its local fallback instead
+- get_policy / set_policy: process-wide policy (LLM_RESILIENCE=0 disables it)
+
+LLM_RETRIES: extra attempts for idempotent calls (default 2)
+LLM_RETRY_BASE_DELAY / LLM_RETRY_MAX_DELAY: backoff bounds in seconds (0.25 / 4)
+LLM_HEDGE_PERCENTILE: latency percentile after which a duplicate request is sent (0.95, 0 = off)
+LLM_HEDGE_MIN_DELAY: never hedge sooner than this many seconds (0.5)
+LLM_BREAKER_THRESHOLD / LLM_BREAKER_COOLDOWN: failures to open, seconds until the probe (5 / 30)
+"""
+
+import os
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger import log
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.metrics import LLM_RESILIENCE, register_collector
+
+LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE", "1") != "0"
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.25"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "4"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")) or None
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "32"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# Provider errors worth retrying, by class name (google.api_core is only
+# imported by the Gemini SDK, so it is not imported here) or HTTP status.
+TRANSIENT_ERRORS = {
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "InternalServerError",
+    "GatewayTimeout", "DeadlineExceeded", "Aborted", "Unknown",
+}
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+# Answers from the provider that reject the request itself (4xx): the service
+# is up, so they close the breaker. Any other non-transient error is local.
+REJECTION_ERRORS = {
+    "InvalidArgument", "BadRequest", "FailedPrecondition", "OutOfRange", "PermissionDenied",
+    "Unauthenticated", "Unauthorized", "Forbidden", "NotFound", "ClientError",
+}
+
+
+class TransientModelError(RuntimeError):
+    """A failure the next attempt may not see (also what fake backends raise)."""
+
+
+class ModelUnavailable(RuntimeError):
+    """No model answer: the circuit breaker is open or every attempt failed."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether `error` is worth retrying and counts against the circuit breaker.
+    Any failure once the current deadline has passed is not: the provider's
+    DeadlineExceeded is then usually the request timeout we set from it.
+    """
+    if isinstance(error, DeadlineExceeded):
+        # Our own budget ran out; another attempt cannot help.
+        return False
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired():
+        return False
+    if isinstance(error, (TransientModelError, TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERRORS or getattr(error, "code", None) in TRANSIENT_STATUS
+
+
+def is_rejection(error: BaseException) -> bool:
+    """Whether `error` is the provider rejecting the request (a 4xx answer)."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code not in TRANSIENT_STATUS:
+        return True
+    return type(error).__name__ in REJECTION_ERRORS
+
+
+_failures: contextvars.ContextVar[Optional[List[ModelUnavailable]]] = contextvars.ContextVar("llm_failures", default=None)
+
+
+@contextmanager
+def failure_scope():
+    """Collect the ModelUnavailable errors raised by call_model inside the block."""
+    failures: List[ModelUnavailable] = []
+    token = _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _failures.reset(token)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `threshold` consecutive failures it opens
+    and rejects calls for `cooldown` seconds, then lets a single probe
+    through (half-open): success closes it, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now (claims the probe when half-opening)."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a claimed probe whose call said nothing about the service."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                if self.state == "closed":
+                    self.trips += 1
+                self.state = "open"
+                self._opened_at = self.clock()
+
+
+class LatencyTracker:
+    """Latencies of the last `window` successful attempts."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The `q` quantile (0..1), or None with fewer than `min_samples` samples."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    # Separate from the agent executor: call_model already runs on an agent
+    # worker, and waiting there on work queued behind it could deadlock.
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+    return _hedge_executor
+
+
+class ResiliencePolicy:
+    """
+    Hedging, retries and circuit breaking around one model request.
+    Everything time- or chance-dependent (`sleep`, `seed`, the breaker's
+    clock) is injectable so the behaviour can be exercised offline.
+    """
+
+    def __init__(
+        self,
+        retries: int = LLM_RETRIES,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+        hedge_percentile: Optional[float] = LLM_HEDGE_PERCENTILE,
+        hedge_min_delay: float = LLM_HEDGE_MIN_DELAY,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            retries (int): Extra attempts for idempotent calls after a transient failure.
+            base_delay (float): First backoff bound; doubles per retry up to `max_delay`.
+            max_delay (float): Largest backoff bound in seconds.
+            hedge_percentile (float | None): Send a duplicate once an attempt is slower
+                than this quantile of recent latencies (None disables hedging).
+            hedge_min_delay (float): Lower bound on the hedging delay in seconds.
+            hedge_min_samples (int): Latencies needed per agent before hedging starts.
+            breaker (CircuitBreaker | None): Shared breaker (default: one from LLM_BREAKER_*).
+            sleep (callable): Used for backoff waits.
+            seed (int | None): Seed for the backoff jitter.
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def tracker(self, agent: str) -> LatencyTracker:
+        tracker = self._trackers.get(agent)
+        if tracker is None:
+            with self._lock:
+                tracker = self._trackers.setdefault(agent, LatencyTracker())
+        return tracker
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before retry number `retry` (0-based)."""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        threshold = self.tracker(agent).percentile(self.hedge_percentile, self.hedge_min_samples)
+        return None if threshold is None else max(self.hedge_min_delay, threshold)
+
+    def call(self, agent: str, fn: Callable[[], Any], idempotent: bool = True) -> Any:
+        """
+        Run `fn` (one model request) under the policy.
+
+        Args:
+            agent (str): Caller name; latencies and metrics are kept per agent.
+            fn (callable): Makes the request and returns its result.
+            idempotent (bool): Whether `fn` may be hedged and retried.
+
+        Returns:
+            Any: What `fn` returned.
+
+        Raises:
+            ModelUnavailable: The breaker is open or every attempt failed transiently.
+        """
+        if not self.breaker.allow():
+            LLM_RESILIENCE.inc(agent=agent, event="rejected")
+            raise self._unavailable(agent, "circuit breaker open")
+
+        attempts = 1 + (self.retries if idempotent else 0)
+        for attempt in range(attempts):
+            try:
+                result = self._attempt(agent, fn, hedge=idempotent)
+            except Exception as e:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired():
+                    # Our budget ran out (the SDK timeout is set from it): no
+                    # retry, and no verdict on the service for the breaker.
+                    self.breaker.release()
+                    LLM_RESILIENCE.inc(agent=agent, event="deadline")
+                    if isinstance(e, DeadlineExceeded):
+                        raise
+                    raise DeadlineExceeded(f"{agent}: request budget exhausted during the model call") from e
+                if not is_transient(e):
+                    if is_rejection(e):
+                        # The service answered; the request itself was bad.
+                        self.breaker.record_success()
+                    else:
+                        # Local failure (no API key, a bug, bad JSON): no verdict on the service.
+                        self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                error = e
+            else:
+                self.breaker.record_success()
+                return result
+
+            if attempt + 1 == attempts or not self.breaker.allow():
+                break
+            delay = self.backoff(attempt)
+            deadline = current_deadline()
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and remaining <= delay:
+                break
+            LLM_RESILIENCE.inc(agent=agent, event="retried")
+            log(agent, "Model call failed (%s); retrying in %.2fs.", "warn", error, delay)
+            self.sleep(delay)
+
+        LLM_RESILIENCE.inc(agent=agent, event="gave_up")
+        raise self._unavailable(agent, f"{type(error).__name__}: {error}")
+
+    def _attempt(self, agent: str, fn: Callable[[], Any], hedge: bool) -> Any:
+        tracker = self.tracker(agent)
+
+        def timed():
+            start = time.perf_counter()
+            result = fn()
+            tracker.observe(time.perf_counter() - start)
+            return result
+
+        delay = self.hedge_delay(agent) if hedge else None
+        if delay is None:
+            return timed()
+
+        # Each attempt runs in its own copy of the caller's context (deadline included).
+        executor = _get_hedge_executor()
+        primary = executor.submit(contextvars.copy_context().run, timed)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        LLM_RESILIENCE.inc(agent=agent, event="hedged")
+        log(agent, "No answer after %.2fs; sending a hedged request.", "debug", delay)
+        hedged = executor.submit(contextvars.copy_context().run, timed)
+        pending, error = {primary, hedged}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        LLM_RESILIENCE.inc(agent=agent, event="hedge_won")
+                    # The slower request is left to finish; its answer is dropped.
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _unavailable(self, agent: str, reason: str) -> ModelUnavailable:
+        error = ModelUnavailable(f"{agent}: model unavailable ({reason})")
+        failures = _failures.get()
+        if failures is not None:
+            failures.append(error)
+        return error
+
+
+_policy: Optional[ResiliencePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_policy() -> Optional[ResiliencePolicy]:
+    """The process-wide policy, or None when LLM_RESILIENCE=0."""
+    global _policy
+    if _policy is None and LLM_RESILIENCE_ENABLED:
+        with _policy_lock:
+            if _policy is None:
+                _policy = ResiliencePolicy()
+    return _policy
+
+
+def set_policy(policy: Optional[ResiliencePolicy]) -> None:
+    """Swap the process-wide policy (None re-creates the default on next use)."""
+    global _policy
+    with _policy_lock:
+        _policy = policy
+
+
+def _collect_resilience_metrics():
+    policy = _policy
+    if policy is None:
+        return
+    breaker = policy.breaker
+    yield "llm_circuit_breaker_open", "Whether model calls are being rejected (1) or not (0)", {}, int(breaker.state == "open")
+    yield "llm_circuit_breaker_trips", "Times the breaker opened", {}, breaker.trips
+
+
+register_collector(_collect_resilience_metrics)
+
+
+__all__ = [
+    "TransientModelError",
+    "ModelUnavailable",
+    "is_transient",
+    "is_rejection",
+    "failure_scope",
+    "CircuitBreaker",
+    "LatencyTracker",
+    "ResiliencePolicy",
+    "get_policy",
+    "set_policy",
+]
@@ -0,0 +1,246 @@
+"""
+Persistent scene library on SQLite
+- SceneStore.put: record a (ParsedSpec, validated SceneJSON) pair
+- SceneStore.nearest: closest stored scene with the same environment and objects
+- bounded size: rows older than `ttl` go first, then the least-hit, least-recently used
+
+One database file shared by every worker process: WAL journaling lets
+readers proceed while one worker writes, and each thread gets its own
+connection. Rows are indexed on environment type, object types and
+angle/friction/mass, the parameters a scene is re-filled from.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+# Largest difference per parameter that still counts as a neighbour; a
+# match's distance is the root of the summed squared scaled differences (<= 1).
+NEIGHBOUR_SCALES = {"angle": 10.0, "friction": 0.2, "mass": 10.0}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    signature TEXT NOT NULL UNIQUE,
+    environment_type TEXT NOT NULL,
+    object_types TEXT NOT NULL,
+    angle REAL,
+    friction REAL,
+    mass REAL,
+    masses TEXT NOT NULL,
+    has_extra INTEGER NOT NULL,
+    parsed TEXT NOT NULL,
+    validated TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scenes_lookup ON scenes (environment_type, object_types, angle, friction, mass);
+CREATE INDEX IF NOT EXISTS scenes_eviction ON scenes (hits, last_used);
+"""
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def scene_parameters(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Index columns of a ParsedSpec: environment type, object types (in order),
+    angle, friction, first object's mass and all masses.
+    """
+    objects = [o for o in parsed.get("objects") or [] if isinstance(o, dict)]
+    return {
+        "environment_type": str(parsed.get("environment_type") or "unknown").lower(),
+        "object_types": ",".join(str(o.get("type") or "unknown").lower() for o in objects),
+        "angle": _number(parsed.get("angle_deg")),
+        "friction": _number(parsed.get("friction")),
+        "mass": _number(objects[0].get("mass_kg")) if objects else None,
+        "masses": [_number(o.get("mass_kg")) for o in objects],
+    }
+
+
+class SceneStore:
+    """
+    SQLite-backed library of validated scenes, safe to share between threads
+    and between processes using the same file.
+    """
+
+    def __init__(self, path: str, max_size: int = 5000, ttl: Optional[float] = None):
+        """
+        Args:
+            path (str): Database file (created with its directory if missing).
+            max_size (int): Rows kept; the least-hit, least-recently used go first.
+            ttl (float | None): Seconds since last use after which a row is dropped.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: each statement is its own short transaction, so locks are held briefly.
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, parsed: Dict[str, Any], validated: Dict[str, Any]) -> None:
+        """Store (or refresh) the scene for a ParsedSpec, then enforce the size bounds."""
+        params = scene_parameters(parsed)
+        has_extra = bool(parsed.get("extra_terms"))
+        signature = hashlib.sha256(json.dumps(
+            [params, has_extra, parsed.get("extra_terms")], sort_keys=True, default=str
+        ).encode("utf-8")).hexdigest()
+        now = time.time()
+
+        conn = self._connect()
+        conn.execute(
+            """
+            INSERT INTO scenes (signature, environment_type, object_types, angle, friction, mass, masses,
+                                has_extra, parsed, validated, stored_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(signature) DO UPDATE SET
+                parsed = excluded.parsed, validated = excluded.validated,
+                stored_at = excluded.stored_at, last_used = excluded.last_used
+            """,
+            (
+                signature, params["environment_type"], params["object_types"],
+                params["angle"], params["friction"], params["mass"], json.dumps(params["masses"]),
+                int(has_extra), json.dumps(parsed), json.dumps(validated), now, now,
+            ),
+        )
+        self._evict(conn, now)
+
+    def nearest(
+        self,
+        environment_type: str,
+        object_types: List[str],
+        angle: Optional[float] = None,
+        friction: Optional[float] = None,
+        mass: Optional[float] = None,
+        masses: Optional[List[Optional[float]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Closest stored scene with the same environment type and objects whose
+        ParsedSpec had no extra terms. A parameter given as None only matches
+        rows where it was also unstated.
+
+        Args:
+            masses (list | None): Mass of every object, in order. When given it
+                replaces `mass`: the first stated mass may be a neighbour,
+                every other object's mass must be the same (or unstated on
+                both sides), since a re-fill only swaps one mass.
+
+        Returns:
+            dict | None: {"parsed", "validated", "constraints", "distance"},
+            where constraints are the row's angle_deg/friction/mass_kg (with
+            `masses`, mass_kg is the row's first stated mass).
+        """
+        where = ["environment_type = ?", "object_types = ?", "has_extra = 0"]
+        args: List[Any] = [environment_type.lower(), ",".join(t.lower() for t in object_types)]
+        if self.ttl is not None:
+            where.append("last_used >= ?")
+            args.append(time.time() - self.ttl)
+        parameters = [("angle", angle, "angle"), ("friction", friction, "friction")]
+        if masses is None:
+            parameters.append(("mass", mass, "mass"))
+        else:
+            refilled = next((i for i, m in enumerate(masses) if m is not None), None)
+            for i, m in enumerate(masses):
+                column = f"json_extract(masses, '$[{i}]')"
+                if i == refilled:
+                    parameters.append((column, m, "mass"))
+                elif m is None:
+                    where.append(f"{column} IS NULL")
+                else:
+                    where.append(f"{column} = ?")
+                    args.append(float(m))
+        terms, term_args = [], []
+        for column, value, kind in parameters:
+            if value is None:
+                where.append(f"{column} IS NULL")
+                continue
+            scale = NEIGHBOUR_SCALES[kind]
+            where.append(f"{column} BETWEEN ? AND ?")
+            args += [value - scale, value + scale]
+            terms.append(f"(({column} - ?) / ?) * (({column} - ?) / ?)")
+            term_args += [value, scale, value, scale]
+
+        distance = " + ".join(terms) or "0"
+        row = self._connect().execute(
+            f"""
+            SELECT id, parsed, validated, angle, friction, mass, masses, {distance} AS d
+            FROM scenes WHERE {' AND '.join(where)} AND {distance} <= 1
+            ORDER BY d, hits DESC LIMIT 1
+            """,
+            term_args + args + term_args,
+        ).fetchone()
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._connect().execute("UPDATE scenes SET hits = hits + 1, last_used = ? WHERE id = ?", (time.time(), row[0]))
+        with self._lock:
+            self.hits += 1
+        row_mass = row[5]
+        if masses is not None:
+            row_mass = next((m for m in json.loads(row[6]) if m is not None), None)
+        return {
+            "parsed": json.loads(row[1]),
+            "validated": json.loads(row[2]),
+            "constraints": {"angle_deg": row[3], "friction": row[4], "mass_kg": row_mass},
+            "distance": row[7] ** 0.5,
+        }
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute("DELETE FROM scenes WHERE last_used < ?", (now - self.ttl,)).rowcount
+        (size,) = conn.execute("SELECT COUNT(*) FROM scenes").fetchone()
+        if size > self.max_size:
+            removed += conn.execute(
+                "DELETE FROM scenes WHERE id IN (SELECT id FROM scenes ORDER BY hits, last_used LIMIT ?)",
+                (size - self.max_size,),
+            ).rowcount
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+    def clear(self) -> None:
+        """Drop every stored scene."""
+        self._connect().execute("DELETE FROM scenes")
+
+    def stats(self) -> Dict[str, Any]:
+        """This process's hit/miss/eviction counters and the shared row count."""
+        (size,) = self._connect().execute("SELECT COUNT(*) FROM scenes").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": size,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+__all__ = ["NEIGHBOUR_SCALES", "scene_parameters", "SceneStore"]
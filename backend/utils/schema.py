@@ -44,10 +44,34 @@ NUMERIC_BOUNDS: Dict[str, tuple] = {
     "mass": (0.01, 1000.0),
 }
 
+# Values SceneAgent's template falls back to; used when repairing scenes locally.
+DEFAULT_FRICTION: float = 0.3
+DEFAULT_MASS: float = 1.0
+DEFAULT_GRAVITY: Dict[str, float] = {"x": 0, "y": -9.81, "z": 0}
+DEFAULT_CAMERA: Dict[str, Dict] = {
+    "position": {"x": 5, "y": 5, "z": 10},
+    "lookAt": {"x": 0, "y": 0, "z": 0},
+}
+DEFAULT_LIGHTING: List[Dict] = [
+    {"type": "ambient", "intensity": 0.5},
+    {"type": "directional", "direction": {"x": 0.5, "y": -1, "z": 0.5}, "intensity": 0.8},
+]
+DEFAULT_SIMULATION: Dict[str, Union[float, str]] = {
+    "timestep": 0.016,
+    "duration": 5.0,
+    "solver": "Cannon",
+}
+
 __all__ = [
     "ParsedSpecSchema",
     "SceneJSONSchema",
     "VALID_ENVIRONMENTS",
     "VALID_OBJECT_TYPES",
     "NUMERIC_BOUNDS",
+    "DEFAULT_FRICTION",
+    "DEFAULT_MASS",
+    "DEFAULT_GRAVITY",
+    "DEFAULT_CAMERA",
+    "DEFAULT_LIGHTING",
+    "DEFAULT_SIMULATION",
 ]
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+In-flight request coalescing
+- SingleFlight.do runs one coroutine per key at a time.
+- SingleFlight.join registers a caller without waiting, for leaders that
+  also consume the run as it goes (e.g. a streamed response).
+- Concurrent callers with the same key await the leader's result instead of
+  starting their own, and the leader keeps running even if its caller goes away.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key. Lives on one event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def pending(self, key: str) -> Optional[asyncio.Future]:
+        """The in-flight call for `key`, or None."""
+        return self._calls.get(key)
+
+    def join(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Future, bool]:
+        """
+        The in-flight call for `key`, starting `fn()` as a task if there is none.
+
+        Returns:
+            (Future, bool): The call, and whether this caller started it (the leader).
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            return task, False
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self.leaders += 1
+        return task, True
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `fn()` for the first caller of `key`; later callers share its result
+        (or its exception) until it completes.
+
+        Args:
+            key (str): Coalescing key, e.g. the normalized problem hash.
+            fn (callable): Zero-argument coroutine factory, only called by the leader.
+
+        Returns:
+            Any: The leader's result.
+        """
+        task, _ = self.join(key, fn)
+        # Shield so a disconnecting caller cannot cancel work others are waiting on.
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Leader/follower counts and calls currently in flight."""
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self._calls)}
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when no caller is left to see it.
+            task.exception()
+
+
+__all__ = ["SingleFlight"]
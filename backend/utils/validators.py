@@ -4,10 +4,15 @@ Shared validation functions used by the agents
 - Enforce numeric sanity (angle, friction, mass, etc.).
 - Compare parsed and generated data for consistency.
 - Clamp numeric values within safe ranges.
+- Repair SceneJSON locally (defaults, bounds, ParsedSpec reconciliation).
 """
 
+import copy
 from typing import Dict, Any, Tuple, List
-from utils.schema import NUMERIC_BOUNDS, VALID_ENVIRONMENTS, VALID_OBJECT_TYPES
+from utils.schema import (
+    NUMERIC_BOUNDS, VALID_ENVIRONMENTS, VALID_OBJECT_TYPES,
+    DEFAULT_FRICTION, DEFAULT_MASS, DEFAULT_GRAVITY, DEFAULT_CAMERA, DEFAULT_LIGHTING, DEFAULT_SIMULATION,
+)
 
 def validate_parsed_spec(parsed: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """
@@ -44,52 +49,120 @@ def validate_parsed_spec(parsed: Dict[str, Any]) -> Tuple[bool, List[str]]:
 
     return (len(errors) == 0, errors)
 
-def validate_scene_json(scene: Dict[str, Any]) -> Tuple[bool, List[str]]:
+def scene_section_errors(scene: Dict[str, Any]) -> Dict[str, List[str]]:
     """
-    Validate SceneJSON structure for required keys and numeric ranges.
+    Validate SceneJSON like `validate_scene_json`, grouping the errors by the
+    top-level section they belong to, so callers can fix only those sections.
 
     Args:
         scene (dict): SceneJSON output from Scene Agent.
 
     Returns:
-        (bool, List[str]): (is_valid, list_of_errors)
+        dict: { section: [errors] } for each section with at least one error.
     """
-    errors = []
+    errors: Dict[str, List[str]] = {}
+
+    def add(section: str, message: str) -> None:
+        errors.setdefault(section, []).append(message)
+
+    def block(section: str) -> Dict[str, Any]:
+        value = scene.get(section)
+        return value if isinstance(value, dict) else {}
 
     required_sections = ["scene", "environment", "objects", "simulation"]
     for section in required_sections:
         if section not in scene:
-            errors.append(f"Missing top-level section: {section}")
+            add(section, f"Missing top-level section: {section}")
 
     # Scene checks
-    scene = scene.get("scene", {})
-    if "gravity" not in scene:
-        errors.append("Missing gravity in scene")
-    if "camera" not in scene:
-        errors.append("Missing camera in scene")
+    settings = block("scene")
+    if "gravity" not in settings:
+        add("scene", "Missing gravity in scene")
+    if "camera" not in settings:
+        add("scene", "Missing camera in scene")
 
     # Environment checks
-    env = scene.get("environment", {})
+    env = block("environment")
+    env_errors: List[str] = []
     if "type" not in env:
-        errors.append("Missing environment type")
+        env_errors.append("Missing environment type")
+    elif env["type"] not in VALID_ENVIRONMENTS:
+        env_errors.append(f"Unknown environment type: {env['type']}")
     if "material" not in env:
-        errors.append("Missing environment material")
+        env_errors.append("Missing environment material")
+    if env.get("type") == "incline" and not _is_number(env.get("angle")):
+        env_errors.append("Incline environment needs a numeric angle")
+    _check_range(env_errors, "environment angle", env.get("angle"), "angle")
+    _check_range(env_errors, "environment friction", (env.get("material") or {}).get("friction"), "friction")
+    for message in env_errors:
+        add("environment", message)
 
     # Objects list sanity check
     objs = scene.get("objects", [])
+    obj_errors: List[str] = []
     if not isinstance(objs, list):
-        errors.append("objects must be a list")
+        obj_errors.append("objects must be a list")
     elif len(objs) == 0:
-        errors.append("objects list is empty")
+        obj_errors.append("objects list is empty")
+    else:
+        for i, obj in enumerate(objs):
+            if not isinstance(obj, dict):
+                obj_errors.append(f"Object {i} must be a dict")
+                continue
+            if "type" not in obj:
+                obj_errors.append(f"Object {i} missing 'type'")
+            if "position" not in obj:
+                obj_errors.append(f"Object {i} missing 'position'")
+            _check_range(obj_errors, f"Object {i} mass", obj.get("mass"), "mass")
+            _check_range(obj_errors, f"Object {i} friction", (obj.get("material") or {}).get("friction"), "friction")
+    for message in obj_errors:
+        add("objects", message)
 
     # Simulation block
-    sim = scene.get("simulation", {})
+    sim = block("simulation")
     for key in ["timestep", "duration", "solver"]:
         if key not in sim:
-            errors.append(f"Missing simulation parameter: {key}")
+            add("simulation", f"Missing simulation parameter: {key}")
+
+    return errors
+
+def validate_scene_json(scene: Dict[str, Any]) -> Tuple[bool, List[str]]:
+    """
+    Validate SceneJSON structure for required keys and numeric ranges.
 
+    Args:
+        scene (dict): SceneJSON output from Scene Agent.
+
+    Returns:
+        (bool, List[str]): (is_valid, list_of_errors)
+    """
+    errors = [message for messages in scene_section_errors(scene).values() for message in messages]
     return (len(errors) == 0, errors)
 
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _check_range(errors: List[str], label: str, value: Any, key: str) -> None:
+    if value is None:
+        return
+    if not _is_number(value):
+        errors.append(f"{label} must be numeric")
+        return
+    low, high = NUMERIC_BOUNDS[key]
+    if not low <= value <= high:
+        errors.append(f"{label} {value} outside [{low}, {high}]")
+
+def _as_number(value: Any):
+    """`value` as a float if it is numeric or a numeric string, else None."""
+    if _is_number(value):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return None
+    return None
+
 def compare_parsed_and_scene(parsed: Dict[str, Any], scene: Dict[str, Any]) -> Dict[str, str]:
     """
     Compare values from Parser Agent and Scene Agent outputs.
@@ -101,7 +174,38 @@ def compare_parsed_and_scene(parsed: Dict[str, Any], scene: Dict[str, Any]) -> D
     Returns:
         dict: { field_name: "mismatch description" } for any inconsistencies.
     """
-    pass
+    mismatches = {}
+    env = scene.get("environment") or {}
+    objs = scene.get("objects") if isinstance(scene.get("objects"), list) else []
+
+    env_type = parsed.get("environment_type")
+    if env_type in VALID_ENVIRONMENTS and env_type != "unknown" and env.get("type") != env_type:
+        mismatches["environment_type"] = f"parsed {env_type!r}, scene {env.get('type')!r}"
+
+    angle = _as_number(parsed.get("angle_deg"))
+    if angle is not None and _as_number(env.get("angle")) != angle:
+        mismatches["angle_deg"] = f"parsed {angle}, scene {env.get('angle')!r}"
+
+    friction = _as_number(parsed.get("friction"))
+    if friction is not None:
+        scene_friction = (env.get("material") or {}).get("friction")
+        if _as_number(scene_friction) != friction:
+            mismatches["friction"] = f"parsed {friction}, scene {scene_friction!r}"
+
+    parsed_objs = parsed.get("objects") or []
+    if len(parsed_objs) > len(objs):
+        mismatches["objects"] = f"parsed {len(parsed_objs)} objects, scene {len(objs)}"
+
+    for i, (p_obj, s_obj) in enumerate(zip(parsed_objs, objs)):
+        if not isinstance(p_obj, dict) or not isinstance(s_obj, dict):
+            continue
+        if p_obj.get("type") and s_obj.get("type") != p_obj["type"]:
+            mismatches[f"objects[{i}].type"] = f"parsed {p_obj['type']!r}, scene {s_obj.get('type')!r}"
+        mass = _as_number(p_obj.get("mass_kg"))
+        if mass is not None and _as_number(s_obj.get("mass")) != mass:
+            mismatches[f"objects[{i}].mass_kg"] = f"parsed {mass}, scene {s_obj.get('mass')!r}"
+
+    return mismatches
 
 def apply_numeric_bounds(value: float, key: str) -> float:
     """
@@ -114,11 +218,145 @@ def apply_numeric_bounds(value: float, key: str) -> float:
     Returns:
         float: Clamped numeric value.
     """
-    pass
+    if key not in NUMERIC_BOUNDS:
+        return value
+    low, high = NUMERIC_BOUNDS[key]
+    return min(max(value, low), high)
+
+def _default_object(spec: Dict[str, Any], friction: float) -> Dict[str, Any]:
+    mass = _as_number(spec.get("mass_kg"))
+    return {
+        "type": spec.get("type") or "box",
+        "mass": mass if mass is not None else DEFAULT_MASS,
+        "size": {"width": 1, "height": 1, "depth": 1},
+        "position": {"x": 0, "y": 2, "z": 0},
+        "material": {"color": "#E2562C", "friction": friction, "restitution": 0.3},
+    }
+
+def repair_scene(scene: Dict[str, Any], parsed: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Fix what rules can fix in a SceneJSON, without any model call:
+    fill missing sections with SceneAgent's defaults, turn numeric strings
+    into numbers, clamp angle/friction/mass to NUMERIC_BOUNDS and reconcile
+    environment and object values with the ParsedSpec.
+
+    Args:
+        scene (dict): SceneJSON from Scene Agent (not modified).
+        parsed (dict): ParsedSpec from Parser Agent.
+
+    Returns:
+        (dict, List[str]): (repaired SceneJSON, description of each change)
+    """
+    if not isinstance(scene, dict):
+        return scene, []
+    scene = copy.deepcopy(scene)
+    parsed = parsed if isinstance(parsed, dict) else {}
+    changes = []
+    if isinstance(scene.get("objects"), dict):
+        scene["objects"] = [scene["objects"]]
+        changes.append("objects: wrapped single object in a list")
+
+    def section(container: Dict[str, Any], key: str, default, label: str = None):
+        if not isinstance(container.get(key), type(default)):
+            container[key] = default
+            changes.append(f"{label or key}: filled default")
+        return container[key]
+
+    def number(container: Dict[str, Any], key: str, label: str, default=None, bound: str = None):
+        value = container.get(key)
+        num = _as_number(value)
+        if num is None:
+            if default is None:
+                return
+            num = default
+            changes.append(f"{label}: set to {num}")
+        elif not _is_number(value):
+            changes.append(f"{label}: converted {value!r} to {num}")
+        if bound is not None:
+            clamped = apply_numeric_bounds(num, bound)
+            if clamped != num:
+                changes.append(f"{label}: clamped {num} to {clamped}")
+                num = clamped
+        container[key] = num
+
+    settings = section(scene, "scene", {})
+    for key, default in (("gravity", DEFAULT_GRAVITY), ("camera", DEFAULT_CAMERA), ("lighting", DEFAULT_LIGHTING)):
+        if key not in settings:
+            settings[key] = copy.deepcopy(default)
+            changes.append(f"scene.{key}: filled default")
+
+    # Environment, reconciled with the ParsedSpec where it states a value.
+    env = section(scene, "environment", {})
+    parsed_type = parsed.get("environment_type")
+    if parsed_type in VALID_ENVIRONMENTS and parsed_type != "unknown" and env.get("type") != parsed_type:
+        changes.append(f"environment.type: {env.get('type')!r} -> {parsed_type!r} (ParsedSpec)")
+        env["type"] = parsed_type
+    elif env.get("type") not in VALID_ENVIRONMENTS:
+        changes.append(f"environment.type: {env.get('type')!r} -> 'unknown'")
+        env["type"] = "unknown"
+
+    parsed_angle = _as_number(parsed.get("angle_deg"))
+    if parsed_angle is not None and _as_number(env.get("angle")) != parsed_angle:
+        changes.append(f"environment.angle: {env.get('angle')!r} -> {parsed_angle} (ParsedSpec)")
+        env["angle"] = parsed_angle
+    number(env, "angle", "environment.angle", bound="angle")
+
+    parsed_friction = _as_number(parsed.get("friction"))
+    material = section(env, "material", {}, "environment.material")
+    if parsed_friction is not None and _as_number(material.get("friction")) != parsed_friction:
+        changes.append(f"environment.material.friction: {material.get('friction')!r} -> {parsed_friction} (ParsedSpec)")
+        material["friction"] = parsed_friction
+    number(material, "friction", "environment.material.friction", DEFAULT_FRICTION, "friction")
+    material.setdefault("restitution", 0.2)
+    friction = material["friction"]
+
+    # Objects: build missing ones from the ParsedSpec, fill and clamp the rest.
+    parsed_objs = [o for o in parsed.get("objects") or [] if isinstance(o, dict)]
+    objs = section(scene, "objects", [])
+    for i, spec in enumerate(parsed_objs[len(objs):], start=len(objs)):
+        objs.append(_default_object(spec, friction))
+        changes.append(f"objects[{i}]: built from ParsedSpec")
+
+    for i, obj in enumerate(objs):
+        if not isinstance(obj, dict):
+            continue
+        spec = parsed_objs[i] if i < len(parsed_objs) else {}
+        if not obj.get("type"):
+            obj["type"] = spec.get("type") or "box"
+            changes.append(f"objects[{i}].type: set to {obj['type']!r}")
+        parsed_mass = _as_number(spec.get("mass_kg"))
+        if parsed_mass is not None and _as_number(obj.get("mass")) != parsed_mass:
+            changes.append(f"objects[{i}].mass: {obj.get('mass')!r} -> {parsed_mass} (ParsedSpec)")
+            obj["mass"] = parsed_mass
+        number(obj, "mass", f"objects[{i}].mass", DEFAULT_MASS, "mass")
+        if "position" not in obj:
+            obj["position"] = {"x": 0, "y": 2, "z": 0}
+            changes.append(f"objects[{i}].position: filled default")
+        obj_material = section(obj, "material", {}, f"objects[{i}].material")
+        if parsed_friction is not None and _as_number(obj_material.get("friction")) != parsed_friction:
+            obj_material["friction"] = parsed_friction
+            changes.append(f"objects[{i}].material.friction: set to {parsed_friction} (ParsedSpec)")
+        number(obj_material, "friction", f"objects[{i}].material.friction", friction, "friction")
+
+    sim = section(scene, "simulation", {})
+    for key, default in DEFAULT_SIMULATION.items():
+        if key == "solver":
+            if not sim.get("solver"):
+                sim["solver"] = default
+                changes.append("simulation.solver: filled default")
+            continue
+        number(sim, key, f"simulation.{key}", default)
+        if sim[key] <= 0:
+            sim[key] = default
+            changes.append(f"simulation.{key}: non-positive, reset to {default}")
+
+    return scene, changes
 
 __all__ = [
     "validate_parsed_spec",
     "validate_scene_json",
+    "scene_section_errors",
     "compare_parsed_and_scene",
     "apply_numeric_bounds",
+    "repair_scene",
 ]
\ No newline at end of file
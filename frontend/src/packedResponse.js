@@ -0,0 +1,71 @@
+import { API_URL } from "./config"
+
+// Compact binary responses (backend/utils/encoding.py):
+//   "VSG1" | uint32 JSON length | JSON | padding to 4 bytes | float32 data
+// Packed arrays are {"$f32": offset, "shape": [...]} in the JSON; they decode
+// to Float32Array views over the response buffer (rows of a 2-D array are
+// views too), so trajectories are never copied or parsed number by number.
+export const PACKED_MEDIA_TYPE = "application/vnd.visigen.packed"
+
+const MAGIC = "VSG1"
+
+function view(floats, offset, shape) {
+  if (shape.length === 1) return floats.subarray(offset, offset + shape[0])
+  const step = shape.slice(1).reduce((a, b) => a * b, 1)
+  const rows = new Array(shape[0])
+  for (let i = 0; i < shape[0]; i++) rows[i] = view(floats, offset + i * step, shape.slice(1))
+  return rows
+}
+
+export function decodePacked(buffer) {
+  const bytes = new Uint8Array(buffer)
+  if (String.fromCharCode(...bytes.subarray(0, 4)) !== MAGIC) throw new Error("Not a packed simulation payload")
+
+  const length = new DataView(buffer).getUint32(4, true)
+  const header = new TextDecoder().decode(bytes.subarray(8, 8 + length))
+  // Float32Array reads the platform's byte order; every browser target is little-endian.
+  const floats = new Float32Array(buffer, 8 + Math.ceil(length / 4) * 4)
+
+  const payload = JSON.parse(header, (key, value) =>
+    value && typeof value === "object" && "$f32" in value ? view(floats, value.$f32, value.shape) : value
+  )
+  if (payload && typeof payload === "object") {
+    for (const [key, value] of Object.entries(payload)) {
+      if (value && typeof value === "object" && "$same" in value) payload[key] = payload[value.$same]
+    }
+  }
+  return payload
+}
+
+async function readResult(response) {
+  if (!response.ok) throw new Error("Server error")
+  if ((response.headers.get("Content-Type") || "").startsWith(PACKED_MEDIA_TYPE)) {
+    return decodePacked(await response.arrayBuffer())
+  }
+  return response.json()
+}
+
+// POSTs `body` as JSON to `path`, asking for the packed layout, and decodes
+// whichever encoding the server answered with.
+export async function postForResult(path, body) {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: `${PACKED_MEDIA_TYPE}, application/json;q=0.9`,
+    },
+    body: JSON.stringify(body),
+  })
+  return readResult(response)
+}
+
+// GETs a stored result (`key` from a /simulate response). The response is
+// cacheable with an ETag, so the browser answers repeats from its cache or
+// with a 304 revalidation instead of the backend recomputing anything.
+export async function getResult(key, fields) {
+  const query = fields ? `?fields=${encodeURIComponent(fields)}` : ""
+  const response = await fetch(`${API_URL}/simulate/result/${key}${query}`, {
+    headers: { Accept: `${PACKED_MEDIA_TYPE}, application/json;q=0.9` },
+  })
+  return readResult(response)
+}
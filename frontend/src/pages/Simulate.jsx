@@ -1,10 +1,14 @@
 import Header from "../components/Header";
 import { SlidersHorizontal, RefreshCw, Play, Send } from "lucide-react";
-import { useState } from "react";
-import { API_URL } from "../config";
+import { useEffect, useState } from "react";
 import Loader from "../components/Loader";
 import { DotLottieReact } from '@lottiefiles/dotlottie-react';
 import SceneRenderer from "../components/SceneRenderer";
+import { streamSimulation } from "../simulationStream";
+import { getResult, postForResult } from "../packedResponse";
+
+// Key of the last generated simulation, so a reload re-fetches it (usually a 304) instead of recomputing.
+const RESULT_KEY = "simulationResultKey"
 
 export default function SimulationPage() {
   const [problem, setProblem] = useState()
@@ -12,26 +16,23 @@ export default function SimulationPage() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
   const [replayKey, setReplayKey] = useState(0)
+
+  useEffect(() => {
+    const key = sessionStorage.getItem(RESULT_KEY)
+    if (!key) return
+    getResult(key, "validated")
+      .then((data) => setSceneData(data.validated))
+      .catch(() => sessionStorage.removeItem(RESULT_KEY))
+  }, [])
   
   const handleGenerate = async() => {
     setLoading(true)
     setError('')
 
     try {
-      const response = await fetch(`${API_URL}/simulate`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({ problem })
-      })
-
-      if (!response.ok) {
-        setError('Server error')
-      }
-
-      const data = await response.json()
+      const data = await postForResult('/simulate?fields=key,scene,validated', { problem })
       setSceneData(data.validated || data.scene)
+      if (data.key) sessionStorage.setItem(RESULT_KEY, data.key)
     } catch (error) {
       console.log(error)
       setError('Failed to generate simulation')
@@ -45,19 +46,16 @@ export default function SimulationPage() {
     setError("")
 
     try {
-      const response = await fetch(`${API_URL}/simulate`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({ problem }),
+      // Render the raw scene as soon as SceneAgent returns, then swap in the validated one.
+      await streamSimulation(problem, (event, payload) => {
+        if (event === "scene" || event === "validated") {
+          setSceneData(payload.data)
+          setLoading(false)
+        } else if (event === "error") {
+          throw new Error(payload.detail)
+        }
+        console.log(`Simulation event received: ${event}`, payload)
       })
-
-      if (!response.ok) throw new Error("Server error")
-
-      const data = await response.json()
-      setSceneData(data.validated || data.scene)
-      console.log("Simulation JSON received:", data)
     } catch (err) {
       console.error(err)
       setError("Failed to generate simulation")
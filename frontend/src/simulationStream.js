@@ -0,0 +1,37 @@
+import { API_URL } from "./config"
+
+// POSTs to /simulate/stream and calls onEvent(name, payload) for every
+// server-sent event: problem, parsed, scene, validated, trajectory, done or error.
+export async function streamSimulation(problem, onEvent) {
+  const response = await fetch(`${API_URL}/simulate/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ problem }),
+  })
+
+  if (!response.ok || !response.body) throw new Error("Server error")
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let name = "message"
+      let data = ""
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event: ")) name = line.slice(7)
+        else if (line.startsWith("data: ")) data += line.slice(6)
+      }
+      onEvent(name, data ? JSON.parse(data) : null)
+    }
+  }
+}